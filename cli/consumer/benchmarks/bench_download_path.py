@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+BRC-26 Download Path Microbenchmark
+Compares fixed 8 KB reads with one executor write per chunk against adaptive
+reads with coalesced writes, over a local aiohttp server
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+from aiohttp import web
+import aiohttp
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from brc_integrations.brc26_transfer import CoalescingWriter, adaptive_chunks
+
+PAYLOAD_BLOCK = os.urandom(1024 * 1024)
+
+
+async def start_server(size: int) -> web.AppRunner:
+    async def download(request):
+        response = web.StreamResponse(headers={'Content-Length': str(size)})
+        await response.prepare(request)
+        sent = 0
+        while sent < size:
+            block = PAYLOAD_BLOCK[:min(len(PAYLOAD_BLOCK), size - sent)]
+            await response.write(block)
+            sent += len(block)
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_get('/download', download)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', 0).start()
+    return runner
+
+
+async def fixed_chunks(session, url, f):
+    """Previous data path: iter_chunked(8192) and an executor hop per chunk"""
+    loop = asyncio.get_running_loop()
+    async with session.get(url) as response:
+        async for chunk in response.content.iter_chunked(8192):
+            await loop.run_in_executor(None, f.write, chunk)
+
+
+async def coalesced_chunks(session, url, f):
+    """Current data path: adaptive reads gathered into large writes"""
+    writer = CoalescingWriter(f.write)
+    async with session.get(url) as response:
+        async for chunk in adaptive_chunks(response.content):
+            await writer.write(chunk)
+    await writer.flush()
+    return writer.flushes
+
+
+async def measure(name, strategy, url, size, directory):
+    path = os.path.join(directory, name)
+    async with aiohttp.ClientSession(auto_decompress=False) as session:
+        with open(path, 'wb') as f:
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            await strategy(session, url, f)
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+    assert os.path.getsize(path) == size
+    os.remove(path)
+    gigabytes = size / 1e9
+    return {
+        'path': name,
+        'bytes_per_second': round(size / wall),
+        'mb_per_second': round(size / wall / 1e6, 1),
+        'cpu_seconds_per_gb': round(cpu / gigabytes, 3)
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='BRC-26 download path microbenchmark')
+    parser.add_argument('--size-mb', type=int, default=256, help='Object size in MB')
+    parser.add_argument('--rounds', type=int, default=3, help='Rounds per strategy (best is reported)')
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    runner = await start_server(size)
+    port = runner.addresses[0][1]
+    url = f"http://127.0.0.1:{port}/download"
+
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            for name, strategy in (('fixed_8k_executor_writes', fixed_chunks),
+                                   ('adaptive_coalesced_writes', coalesced_chunks)):
+                rounds = [await measure(name, strategy, url, size, directory) for _ in range(args.rounds)]
+                results.append(max(rounds, key=lambda result: result['bytes_per_second']))
+    finally:
+        await runner.cleanup()
+
+    print(json.dumps({'size_bytes': size, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
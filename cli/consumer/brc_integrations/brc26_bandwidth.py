@@ -0,0 +1,353 @@
+"""
+BRC-26 Bandwidth Governor for Consumer
+Token-bucket pacing of content transfers under global, per-host and per-receipt caps
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional, Any
+
+from .brc26_transfer import PathLock
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BURST_SECONDS = 1.0
+RATE_WINDOW_SECONDS = 5.0
+
+# Field names overlays use for receipt caps, in purchase/receipt responses
+# and in access token claims
+_RATE_FIELDS = ('bandwidthBytesPerSecond', 'bandwidth_bytes_per_second', 'maxBytesPerSecond',
+                'max_bytes_per_second', 'bandwidthLimit', 'bandwidth_limit')
+_LIMIT_FIELDS = ('bytesLimit', 'bytes_limit', 'bytesMax', 'bytes_max', 'maxBytes', 'max_bytes')
+_USED_FIELDS = ('bytesUsed', 'bytes_used')
+_EXPIRY_FIELDS = ('expiresAt', 'expires_at', 'exp')
+_RECEIPT_FIELDS = ('receiptId', 'receipt_id')
+_TOKEN_FIELDS = ('accessToken', 'access_token')
+
+
+def _first(sources, fields):
+    for source in sources:
+        for field in fields:
+            if isinstance(source, dict) and source.get(field) is not None:
+                return source[field]
+    return None
+
+
+def _token_key(access_token: str) -> str:
+    return 'token-' + hashlib.sha256(access_token.encode()).hexdigest()
+
+
+def _epoch(value) -> Optional[float]:
+    """Expiry as epoch seconds, from epoch numbers or ISO-8601 strings"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) / 1000 if value > 1e12 else float(value)
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+def grant_caps(grant: Dict[str, Any]) -> Dict[str, Any]:
+    """Receipt id and caps carried by a purchase/receipt response or token claims"""
+    sources = [grant, grant.get('metadata'), grant.get('receipt'), grant.get('quota')]
+    rate = _first(sources, _RATE_FIELDS)
+    limit = _first(sources, _LIMIT_FIELDS)
+    return {
+        'receipt_id': _first(sources, _RECEIPT_FIELDS),
+        'rate': float(rate) if rate else None,
+        'bytes_limit': int(limit) if limit else None,
+        'bytes_used': int(_first(sources, _USED_FIELDS) or 0),
+        'expires_at': _epoch(_first(sources, _EXPIRY_FIELDS))
+    }
+
+
+def token_claims(access_token: str) -> Dict[str, Any]:
+    """
+    Claims of a JWT-style access token, read without verification: they are
+    only used to pace transfers, the overlay still enforces them
+    """
+    parts = access_token.split('.')
+    if len(parts) != 3:
+        return {}
+    try:
+        payload = parts[1] + '=' * (-len(parts[1]) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return claims if isinstance(claims, dict) else {}
+    except (ValueError, UnicodeDecodeError):
+        return {}
+
+
+class TokenBucket:
+    """
+    Byte-rate token bucket
+
+    Consumers take tokens for bytes they have already received and may go
+    into debt; the returned delay is how long to wait before reading more, so
+    concurrent transfers sharing a bucket are paced to its rate together.
+    A rate of None means unlimited (the bucket still measures throughput).
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst_seconds: float = DEFAULT_BURST_SECONDS):
+        self._lock = threading.Lock()
+        self._window = deque()
+        self.bytes_total = 0
+        self.set_rate(rate, burst_seconds)
+
+    def set_rate(self, rate: Optional[float], burst_seconds: float = DEFAULT_BURST_SECONDS):
+        with self._lock:
+            self.rate = rate if rate and rate > 0 else None
+            self.burst = self.rate * burst_seconds if self.rate else 0.0
+            self._tokens = self.burst
+            self._updated = time.monotonic()
+
+    def reserve(self, nbytes: int, now: Optional[float] = None) -> float:
+        """Take nbytes of tokens; returns the seconds to wait before continuing"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self.bytes_total += nbytes
+            self._window.append((now, nbytes))
+            if not self.rate:
+                return 0.0
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= nbytes
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    def current_rate(self, now: Optional[float] = None) -> float:
+        """Bytes per second over the last RATE_WINDOW_SECONDS"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            while self._window and self._window[0][0] < now - RATE_WINDOW_SECONDS:
+                self._window.popleft()
+            return sum(nbytes for _, nbytes in self._window) / RATE_WINDOW_SECONDS
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'rate_limit': self.rate,
+            'current_rate': round(self.current_rate(), 1),
+            'bytes_total': self.bytes_total
+        }
+
+
+class BandwidthGovernor:
+    """
+    Paces content transfers under a global cap, a per-host cap and the cap
+    of each receipt
+
+    Every chunk a transfer receives is charged to all buckets that apply and
+    the transfer waits for the slowest, so running transfers slow down to fit
+    their caps instead of being cut off. A receipt's byte allowance is checked
+    before a transfer starts.
+
+    With a state_path, receipt caps, the bytes drawn on them and the tokens
+    issued with them are kept in a JSON file, so a download run by a later
+    process is paced under the caps of an earlier purchase.
+    """
+
+    def __init__(self, global_rate: Optional[float] = None, per_host_rate: Optional[float] = None,
+                 burst_seconds: float = DEFAULT_BURST_SECONDS, state_path: Optional[str] = None):
+        self.per_host_rate = per_host_rate
+        self.burst_seconds = burst_seconds
+        self.state_path = state_path
+        self.global_bucket = TokenBucket(global_rate, burst_seconds)
+        self._hosts: Dict[str, TokenBucket] = {}
+        self._receipts: Dict[str, Dict[str, Any]] = {}
+        # SHA-256 keys of tokens issued with a receipt -> receipt id
+        self._tokens: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        if state_path:
+            self._load_state()
+
+    def set_global_rate(self, rate: Optional[float]):
+        self.global_bucket.set_rate(rate, self.burst_seconds)
+
+    # ------------------------------------------------------------------
+    # Receipts
+    # ------------------------------------------------------------------
+
+    def register_receipt(self, receipt_id: str, rate: Optional[float] = None,
+                         bytes_limit: Optional[int] = None, bytes_used: int = 0,
+                         expires_at: Optional[float] = None):
+        with self._lock:
+            receipt = self._receipts.get(receipt_id)
+            if receipt is None:
+                receipt = self._receipts[receipt_id] = {
+                    'bucket': TokenBucket(rate, self.burst_seconds), 'consumed': 0
+                }
+            elif rate != receipt['bucket'].rate:
+                receipt['bucket'].set_rate(rate, self.burst_seconds)
+            # bytes_used is the overlay's count, which includes what we consumed so far;
+            # until saved it replaces the count in the state file
+            receipt.update(bytes_limit=bytes_limit, bytes_used=bytes_used, expires_at=expires_at, consumed=0,
+                           synced=False)
+            logger.debug(f"Registered receipt {receipt_id}: rate={rate}, limit={bytes_limit}")
+
+    def register_grant(self, grant: Dict[str, Any], receipt_id: Optional[str] = None) -> Optional[str]:
+        """Register the caps of a purchase or receipt response; returns the receipt id"""
+        caps = grant_caps(grant)
+        receipt_id = receipt_id or caps['receipt_id']
+        del caps['receipt_id']
+        if not receipt_id:
+            return None
+        self.register_receipt(receipt_id, **caps)
+        access_token = _first([grant, grant.get('receipt')], _TOKEN_FIELDS)
+        if access_token:
+            self._tokens[_token_key(access_token)] = receipt_id
+        self.save()
+        return receipt_id
+
+    def receipt_for_token(self, access_token: Optional[str]) -> Optional[str]:
+        """
+        Receipt an access token draws on, registering caps carried in its claims
+
+        Tokens without a receipt id claim are keyed by their SHA-256, so the
+        bearer token itself never shows up in status() or the logs.
+        """
+        if not access_token:
+            return None
+        token_key = _token_key(access_token)
+        if self._tokens.get(token_key) in self._receipts:
+            return self._tokens[token_key]
+        claims = token_claims(access_token)
+        receipt_id = _first([claims], _RECEIPT_FIELDS) or token_key
+        if receipt_id not in self._receipts:
+            caps = grant_caps(claims)
+            if caps['rate'] or caps['bytes_limit'] or caps['expires_at']:
+                self.register_grant(claims, receipt_id)
+        return receipt_id if receipt_id in self._receipts else None
+
+    def save(self):
+        """
+        Atomically persist receipts to state_path, adding the bytes drawn on
+        them since the last save to the count on disk. The state file is
+        locked across the read-modify-write, so processes sharing it add up
+        their consumption; receipts only other processes know are kept.
+        """
+        if not self.state_path:
+            return
+        lock = PathLock(f"{self.state_path}.lock")
+        lock.acquire()
+        try:
+            with self._lock:
+                state = self._read_state()
+                for receipt_id, receipt in self._receipts.items():
+                    saved = state['receipts'].get(receipt_id)
+                    if saved is not None and receipt['synced']:
+                        bytes_used = int(saved.get('bytes_used') or 0) + receipt['consumed']
+                    else:
+                        bytes_used = receipt['bytes_used'] + receipt['consumed']
+                    state['receipts'][receipt_id] = {
+                        'rate': receipt['bucket'].rate,
+                        'bytes_limit': receipt['bytes_limit'],
+                        'bytes_used': bytes_used,
+                        'expires_at': receipt['expires_at']
+                    }
+                    # Also picks up what other processes drew on the receipt
+                    receipt.update(bytes_used=bytes_used, consumed=0, synced=True)
+                state['tokens'].update(self._tokens)
+                temp_path = f"{self.state_path}.{os.getpid()}.tmp"
+                with open(temp_path, 'w') as f:
+                    json.dump(state, f)
+                os.replace(temp_path, self.state_path)
+        finally:
+            lock.release()
+
+    def _read_state(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_path, 'r') as f:
+                state = json.load(f)
+            return {'receipts': dict(state.get('receipts') or {}), 'tokens': dict(state.get('tokens') or {})}
+        except FileNotFoundError:
+            return {'receipts': {}, 'tokens': {}}
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable receipt state {self.state_path}: {e}")
+            return {'receipts': {}, 'tokens': {}}
+
+    def _load_state(self):
+        state = self._read_state()
+        for receipt_id, caps in state['receipts'].items():
+            self.register_receipt(receipt_id, rate=caps.get('rate'), bytes_limit=caps.get('bytes_limit'),
+                                  bytes_used=caps.get('bytes_used') or 0, expires_at=caps.get('expires_at'))
+            self._receipts[receipt_id]['synced'] = True
+        self._tokens.update(state['tokens'])
+
+    def remaining_bytes(self, receipt_id: str) -> Optional[int]:
+        receipt = self._receipts.get(receipt_id)
+        if not receipt or receipt['bytes_limit'] is None:
+            return None
+        return max(0, receipt['bytes_limit'] - receipt['bytes_used'] - receipt['consumed'])
+
+    def admit(self, receipt_id: Optional[str], size: int):
+        """Refuse up front a transfer its receipt cannot cover, rather than fail mid-object"""
+        receipt = self._receipts.get(receipt_id) if receipt_id else None
+        if not receipt:
+            return
+        if receipt['expires_at'] and time.time() >= receipt['expires_at']:
+            raise Exception(f"Receipt {receipt_id} expired")
+        remaining = self.remaining_bytes(receipt_id)
+        if remaining is not None and size > remaining:
+            raise Exception(f"Receipt {receipt_id} allowance too small: {size} bytes needed, {remaining} left")
+        rate = receipt['bucket'].rate
+        if rate and receipt['expires_at'] and time.time() + size / rate > receipt['expires_at']:
+            logger.warning(f"Receipt {receipt_id} may expire before {size} bytes arrive at {rate:.0f} B/s")
+
+    # ------------------------------------------------------------------
+    # Pacing
+    # ------------------------------------------------------------------
+
+    def _reserve(self, nbytes: int, host: Optional[str], receipt_id: Optional[str]) -> float:
+        now = time.monotonic()
+        delay = self.global_bucket.reserve(nbytes, now)
+        if host:
+            with self._lock:
+                bucket = self._hosts.get(host)
+                if bucket is None:
+                    bucket = self._hosts[host] = TokenBucket(self.per_host_rate, self.burst_seconds)
+            delay = max(delay, bucket.reserve(nbytes, now))
+        receipt = self._receipts.get(receipt_id) if receipt_id else None
+        if receipt:
+            with self._lock:
+                receipt['consumed'] += nbytes
+            delay = max(delay, receipt['bucket'].reserve(nbytes, now))
+        return delay
+
+    async def pace(self, nbytes: int, host: Optional[str] = None, receipt_id: Optional[str] = None):
+        """Charge received bytes and wait until the caps allow more"""
+        delay = self._reserve(nbytes, host, receipt_id)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pace_blocking(self, nbytes: int, host: Optional[str] = None, receipt_id: Optional[str] = None):
+        """pace() for transfers running in worker threads"""
+        delay = self._reserve(nbytes, host, receipt_id)
+        if delay > 0:
+            time.sleep(delay)
+
+    def status(self) -> Dict[str, Any]:
+        """Current rates, caps and remaining receipt allowances"""
+        with self._lock:
+            hosts = dict(self._hosts)
+            receipts = dict(self._receipts)
+        return {
+            'global': self.global_bucket.status(),
+            'hosts': {host: bucket.status() for host, bucket in hosts.items()},
+            'receipts': {
+                receipt_id: dict(
+                    receipt['bucket'].status(),
+                    bytes_limit=receipt['bytes_limit'],
+                    remaining_bytes=self.remaining_bytes(receipt_id),
+                    expires_at=receipt['expires_at']
+                )
+                for receipt_id, receipt in receipts.items()
+            }
+        }
@@ -0,0 +1,415 @@
+"""
+BRC-26 Content-defined Chunk Store for Consumer
+Deduplicates UHRP objects across dataset versions by storing them as chunk lists
+"""
+
+import bisect
+import hashlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Any, BinaryIO, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Chunking parameters are part of the recipe format: publisher and consumer
+# must agree on them for boundaries (and so chunk hashes) to line up
+CDC_VERSION = 1
+CDC_MIN_SIZE = 256 * 1024
+CDC_MAX_SIZE = 4 * 1024 * 1024
+CDC_READ_SIZE = 16 * 1024 * 1024
+CDC_WINDOW = 48
+CDC_CRC_MASK = 0xFFF  # with the 1-in-256 window hash prefilter: ~1 MiB between cuts
+# A download stores its chunks before its recipe; younger orphans are left alone
+ORPHAN_GRACE_SECONDS = 3600
+EVICTION_BATCH = 64
+CHUNK_INDEX_FILENAME = 'index.sqlite3'
+
+# Chunk sizes and reference counts and recipe last use, so budgets and
+# eviction are index queries rather than walks of the chunk tree
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    refs INTEGER NOT NULL DEFAULT 0,
+    stored_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_orphans ON chunks (refs, stored_at);
+CREATE TABLE IF NOT EXISTS recipes (
+    uhrp_hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS recipes_lru ON recipes (last_used);
+CREATE TABLE IF NOT EXISTS recipe_chunks (
+    uhrp_hash TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    PRIMARY KEY (uhrp_hash, sha256)
+);
+CREATE INDEX IF NOT EXISTS recipe_chunks_sha256 ON recipe_chunks (sha256);
+CREATE TABLE IF NOT EXISTS store_state (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO store_state (key, value) VALUES ('stored_bytes', 0);
+CREATE TRIGGER IF NOT EXISTS chunks_insert AFTER INSERT ON chunks BEGIN
+    UPDATE store_state SET value = value + NEW.size WHERE key = 'stored_bytes';
+END;
+CREATE TRIGGER IF NOT EXISTS chunks_delete AFTER DELETE ON chunks BEGIN
+    UPDATE store_state SET value = value - OLD.size WHERE key = 'stored_bytes';
+END;
+CREATE TRIGGER IF NOT EXISTS recipe_chunks_insert AFTER INSERT ON recipe_chunks BEGIN
+    UPDATE chunks SET refs = refs + 1 WHERE sha256 = NEW.sha256;
+END;
+CREATE TRIGGER IF NOT EXISTS recipe_chunks_delete AFTER DELETE ON recipe_chunks BEGIN
+    UPDATE chunks SET refs = refs - 1 WHERE sha256 = OLD.sha256;
+END;
+"""
+
+# Byte permutations for the window hash: step k mixes in the hash of the bytes
+# 2**k positions earlier, so four steps cover a 16-byte window
+_rng = random.Random(CDC_VERSION)
+_PERMUTATIONS = [bytes(_rng.sample(range(256), 256)) for _ in range(5)]
+
+
+def _window_hash(data: bytes) -> bytes:
+    """
+    One byte per position hashing the 16 bytes ending there
+
+    Per-byte rolling hashes are far too slow in pure Python, so the window is
+    built by repeated doubling: each step permutes the previous hash with
+    bytes.translate and XORs it onto a shifted copy using big-integer
+    arithmetic, all of which runs in C.
+    """
+    size = len(data)
+    hashed = data.translate(_PERMUTATIONS[0])
+    span = 1
+    for permutation in _PERMUTATIONS[1:]:
+        mixed = int.from_bytes(hashed, 'little') ^ (
+            int.from_bytes(hashed.translate(permutation), 'little') << (8 * span)
+        )
+        hashed = mixed.to_bytes(size + span, 'little')[:size]
+        span *= 2
+    return hashed
+
+
+def _candidate_cuts(data: bytes, first: int) -> List[int]:
+    """Content-defined cut positions in data at or after first"""
+    hashed = _window_hash(data)
+    cuts = []
+    position = hashed.find(0, max(first - 1, CDC_WINDOW))
+    while position >= 0:
+        if not zlib.crc32(data[position + 1 - CDC_WINDOW:position + 1]) & CDC_CRC_MASK:
+            cuts.append(position + 1)
+        position = hashed.find(0, position + 1)
+    return cuts
+
+
+def iter_chunks(stream: BinaryIO, min_size: int = CDC_MIN_SIZE, max_size: int = CDC_MAX_SIZE,
+                read_size: int = CDC_READ_SIZE) -> Iterator[bytes]:
+    """Split a binary stream into content-defined chunks"""
+    buffer = b''
+    eof = False
+    while True:
+        pieces = [buffer]
+        size = len(buffer)
+        while not eof and size < max(read_size, max_size):
+            data = stream.read(read_size)
+            if not data:
+                eof = True
+            pieces.append(data)
+            size += len(data)
+        buffer = b''.join(pieces)
+
+        cuts = _candidate_cuts(buffer, min_size)
+        start = 0
+        # Only cut where a full max_size window is available, unless at EOF,
+        # so boundaries do not depend on how the stream was read
+        while start < len(buffer) and (eof or len(buffer) - start >= max_size):
+            limit = min(start + max_size, len(buffer))
+            index = bisect.bisect_left(cuts, start + min_size)
+            end = cuts[index] if index < len(cuts) and cuts[index] <= limit else limit
+            yield buffer[start:end]
+            start = end
+        buffer = buffer[start:]
+
+        if eof and not buffer:
+            return
+
+
+class ChunkStore:
+    """
+    Deduplicating store of content-defined chunks
+
+    Chunks live at <root>/chunks/ab/<sha256>; each object is a recipe at
+    <root>/recipes/<uhrp_hash>.json listing its chunk hashes and lengths in
+    order. Versions that share most of their bytes share most of their chunks.
+    A SQLite index at <root>/index.sqlite3 keeps chunk sizes, how many
+    recipes use each chunk and when each recipe was last used, so
+    stored_bytes() and evict() never walk the chunk tree. evict() drops the
+    least recently used recipes together with the chunks no remaining recipe
+    refers to.
+    """
+
+    def __init__(self, root: str = './cache/chunks'):
+        self.root = root
+        self.chunks_dir = os.path.join(root, 'chunks')
+        self.recipes_dir = os.path.join(root, 'recipes')
+        self.index_path = os.path.join(root, CHUNK_INDEX_FILENAME)
+        os.makedirs(self.chunks_dir, exist_ok=True)
+        os.makedirs(self.recipes_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        # Shared across executor threads; self._lock serialises access
+        self._db = sqlite3.connect(self.index_path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(_SCHEMA)
+        self._index_existing()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def chunk_path(self, chunk_hash: str) -> str:
+        return os.path.join(self.chunks_dir, chunk_hash[:2], chunk_hash)
+
+    def recipe_path(self, uhrp_hash: str) -> str:
+        return os.path.join(self.recipes_dir, f"{uhrp_hash}.json")
+
+    def has_chunk(self, chunk_hash: str) -> bool:
+        return os.path.exists(self.chunk_path(chunk_hash))
+
+    def put_chunk(self, data: bytes, chunk_hash: Optional[str] = None) -> str:
+        """Store a chunk, verifying it against chunk_hash when given"""
+        calculated_hash = hashlib.sha256(data).hexdigest()
+        if chunk_hash and calculated_hash != chunk_hash:
+            raise ValueError(f"Chunk hash mismatch: expected {chunk_hash}, got {calculated_hash}")
+        path = self.chunk_path(calculated_hash)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{threading.get_ident()}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        with self._lock, self._db:
+            # Recipes already naming the chunk (a concurrent writer's) count as references
+            self._db.execute(
+                'INSERT OR IGNORE INTO chunks (sha256, size, refs, stored_at) '
+                'VALUES (?, ?, (SELECT COUNT(*) FROM recipe_chunks WHERE sha256 = ?), ?)',
+                (calculated_hash, len(data), calculated_hash, time.time())
+            )
+        return calculated_hash
+
+    def read_chunk(self, chunk_hash: str) -> bytes:
+        with open(self.chunk_path(chunk_hash), 'rb') as f:
+            return f.read()
+
+    def get_recipe(self, uhrp_hash: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.recipe_path(uhrp_hash), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put_recipe(self, uhrp_hash: str, chunks: List[Dict[str, Any]], content_hash: str) -> Dict[str, Any]:
+        recipe = {
+            'version': CDC_VERSION,
+            'uhrp_hash': uhrp_hash,
+            'content_hash': content_hash,
+            'size': sum(chunk['length'] for chunk in chunks),
+            'chunks': [{'sha256': chunk['sha256'], 'length': chunk['length']} for chunk in chunks]
+        }
+        temp_path = self.recipe_path(uhrp_hash) + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(recipe, f)
+        os.replace(temp_path, self.recipe_path(uhrp_hash))
+        with self._lock, self._db:
+            self._index_recipe(recipe, time.time())
+        return recipe
+
+    def ingest_file(self, uhrp_hash: str, path: str) -> Dict[str, Any]:
+        """Chunk a local file into the store and record its recipe"""
+        chunks = []
+        content_hash = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for data in iter_chunks(f):
+                content_hash.update(data)
+                chunks.append({'sha256': self.put_chunk(data), 'length': len(data)})
+        return self.put_recipe(uhrp_hash, chunks, content_hash.hexdigest())
+
+    def missing_ranges(self, chunks: List[Dict[str, Any]],
+                       max_range: int = CDC_MAX_SIZE * 4) -> List[Tuple[int, int, List[Dict[str, Any]]]]:
+        """
+        Group chunks not held locally into byte ranges [start, end) of the
+        object, merging neighbours so each range needs one request
+        """
+        ranges = []
+        offset = 0
+        current = None
+        for chunk in chunks:
+            if self.has_chunk(chunk['sha256']):
+                current = None
+            elif current and current[1] == offset and current[1] - current[0] + chunk['length'] <= max_range:
+                current[1] += chunk['length']
+                current[2].append(chunk)
+            else:
+                current = [offset, offset + chunk['length'], [chunk]]
+                ranges.append(current)
+            offset += chunk['length']
+        return [tuple(item) for item in ranges]
+
+    def materialize(self, uhrp_hash: str, output_path: str, recipe: Optional[Dict[str, Any]] = None) -> str:
+        """Write an object out from its chunks; returns its SHA-256"""
+        recipe = recipe or self.get_recipe(uhrp_hash)
+        if recipe is None:
+            raise KeyError(f"No chunk recipe for {uhrp_hash}")
+        content_hash = hashlib.sha256()
+        temp_path = output_path + '.part'
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        with open(temp_path, 'wb') as f:
+            for chunk in recipe['chunks']:
+                data = self.read_chunk(chunk['sha256'])
+                content_hash.update(data)
+                f.write(data)
+        os.replace(temp_path, output_path)
+        self.touch_recipe(uhrp_hash)
+        return content_hash.hexdigest()
+
+    def touch_recipe(self, uhrp_hash: str, used_at: Optional[float] = None):
+        """Mark a recipe as used (now, or at used_at), for eviction"""
+        with self._lock, self._db:
+            self._db.execute('UPDATE recipes SET last_used = ? WHERE uhrp_hash = ?',
+                             (time.time() if used_at is None else used_at, uhrp_hash))
+
+    def remove_recipe(self, uhrp_hash: str):
+        with self._lock, self._db:
+            self._remove_recipe(uhrp_hash)
+
+    def stored_bytes(self) -> int:
+        """Bytes held in chunk files, from the index"""
+        with self._lock:
+            return self._db.execute("SELECT value FROM store_state WHERE key = 'stored_bytes'").fetchone()[0]
+
+    def collect_garbage(self) -> Dict[str, int]:
+        """Delete chunks no recipe refers to, past ORPHAN_GRACE_SECONDS"""
+        return self.evict(max_bytes=None)
+
+    def evict(self, max_bytes: Optional[int] = None, protect: Optional[str] = None,
+              used_before: Optional[float] = None) -> Dict[str, int]:
+        """
+        Delete chunks no recipe refers to (once older than
+        ORPHAN_GRACE_SECONDS), then drop the least recently used recipes
+        (except protect, and only those last used before used_before) and the
+        chunks only they used until the store holds at most max_bytes.
+        max_bytes=None only collects garbage.
+        """
+        removed = freed = recipes_removed = 0
+        with self._lock, self._db:
+            orphans = self._db.execute(
+                'SELECT sha256, size FROM chunks WHERE refs <= 0 AND stored_at < ?',
+                (time.time() - ORPHAN_GRACE_SECONDS,)
+            ).fetchall()
+            for chunk_hash, size in orphans:
+                removed += 1
+                freed += self._remove_chunk(chunk_hash, size)
+
+            stored = self._db.execute("SELECT value FROM store_state WHERE key = 'stored_bytes'").fetchone()[0]
+            while max_bytes is not None and stored > max_bytes:
+                rows = self._db.execute(
+                    'SELECT uhrp_hash FROM recipes WHERE uhrp_hash != ? AND last_used < ? '
+                    'ORDER BY last_used LIMIT ?',
+                    (protect or '', float('inf') if used_before is None else used_before, EVICTION_BATCH)
+                ).fetchall()
+                if not rows:
+                    break
+                for (uhrp_hash,) in rows:
+                    if stored <= max_bytes:
+                        break
+                    for chunk_hash, size in self._remove_recipe(uhrp_hash):
+                        removed += 1
+                        chunk_freed = self._remove_chunk(chunk_hash, size)
+                        freed += chunk_freed
+                        stored -= chunk_freed
+                    recipes_removed += 1
+        if recipes_removed:
+            logger.info(f"Evicted {recipes_removed} chunk recipes, freeing {freed} bytes")
+        return {'recipes_removed': recipes_removed, 'chunks_removed': removed, 'bytes_freed': freed}
+
+    def _remove_recipe(self, uhrp_hash: str) -> List[Tuple[str, int]]:
+        """Drop a recipe; returns the chunks no recipe refers to any more. Caller holds the lock"""
+        chunk_hashes = [row[0] for row in self._db.execute(
+            'SELECT sha256 FROM recipe_chunks WHERE uhrp_hash = ?', (uhrp_hash,)
+        )]
+        self._db.execute('DELETE FROM recipe_chunks WHERE uhrp_hash = ?', (uhrp_hash,))
+        self._db.execute('DELETE FROM recipes WHERE uhrp_hash = ?', (uhrp_hash,))
+        if os.path.exists(self.recipe_path(uhrp_hash)):
+            os.remove(self.recipe_path(uhrp_hash))
+        unreferenced = []
+        for chunk_hash in chunk_hashes:
+            row = self._db.execute('SELECT size FROM chunks WHERE sha256 = ? AND refs <= 0',
+                                   (chunk_hash,)).fetchone()
+            if row:
+                unreferenced.append((chunk_hash, row[0]))
+        return unreferenced
+
+    def _remove_chunk(self, chunk_hash: str, size: int) -> int:
+        """Delete a chunk file and its row; returns the bytes freed. Caller holds the lock"""
+        self._db.execute('DELETE FROM chunks WHERE sha256 = ?', (chunk_hash,))
+        try:
+            os.remove(self.chunk_path(chunk_hash))
+        except FileNotFoundError:
+            pass
+        return size
+
+    def _index_recipe(self, recipe: Dict[str, Any], used_at: float):
+        """(Re)record a recipe and the chunks it refers to. Caller holds the lock"""
+        uhrp_hash = recipe['uhrp_hash']
+        self._db.execute('DELETE FROM recipe_chunks WHERE uhrp_hash = ?', (uhrp_hash,))
+        self._db.execute('INSERT OR REPLACE INTO recipes (uhrp_hash, size, last_used) VALUES (?, ?, ?)',
+                         (uhrp_hash, recipe['size'], used_at))
+        self._db.executemany('INSERT OR IGNORE INTO recipe_chunks (uhrp_hash, sha256) VALUES (?, ?)',
+                             [(uhrp_hash, chunk['sha256']) for chunk in recipe['chunks']])
+
+    def _index_existing(self):
+        """Index chunks and recipes of a store written before the index existed, once"""
+        with self._lock, self._db:
+            if self._db.execute("SELECT value FROM store_state WHERE key = 'indexed'").fetchone():
+                return
+            for dirpath, _, filenames in os.walk(self.chunks_dir):
+                for filename in filenames:
+                    if filename.endswith('.tmp'):
+                        continue
+                    try:
+                        stat = os.stat(os.path.join(dirpath, filename))
+                    except FileNotFoundError:
+                        continue
+                    self._db.execute('INSERT OR IGNORE INTO chunks (sha256, size, stored_at) VALUES (?, ?, ?)',
+                                     (filename, stat.st_size, stat.st_mtime))
+            for filename in os.listdir(self.recipes_dir):
+                if not filename.endswith('.json'):
+                    continue
+                recipe = self.get_recipe(filename[:-len('.json')])
+                if recipe is not None:
+                    self._index_recipe(recipe, os.path.getmtime(self.recipe_path(recipe['uhrp_hash'])))
+            self._db.execute("INSERT OR REPLACE INTO store_state (key, value) VALUES ('indexed', 1)")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            chunk_count, chunk_bytes = self._db.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM chunks'
+            ).fetchone()
+            recipe_count, logical_bytes = self._db.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM recipes'
+            ).fetchone()
+        return {
+            'objects': recipe_count,
+            'chunks': chunk_count,
+            'stored_bytes': chunk_bytes,
+            'logical_bytes': logical_bytes,
+            'dedup_ratio': round(logical_bytes / chunk_bytes, 3) if chunk_bytes else 0.0
+        }
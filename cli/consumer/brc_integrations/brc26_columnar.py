@@ -0,0 +1,215 @@
+"""
+BRC-26 Columnar Hand-off for Consumer
+Conversion of streamed CSV and JSONL content into memory-mapped Arrow IPC files
+"""
+
+import io
+import os
+import time
+from typing import Dict, List, Optional, Any
+
+from .brc26_records import RecordParser, DEFAULT_MAX_RECORD_BYTES
+
+try:
+    import pyarrow
+    import pyarrow.csv
+    import pyarrow.ipc
+    import pyarrow.json
+except ImportError:  # pyarrow is optional; only the columnar hand-off needs it
+    pyarrow = None
+
+ARROW_KIND = 'arrow'
+# Record bytes decoded before the schema is fixed; types are widened across them
+SCHEMA_LOOKAHEAD_BYTES = 1024 * 1024
+
+
+def _require_pyarrow():
+    if pyarrow is None:
+        raise Exception("Arrow conversion requires pyarrow (pip install pyarrow)")
+
+
+class ArrowConverter:
+    """
+    Incremental conversion of one record stream into an Arrow IPC file
+
+    A RecordParser cuts complete records out of the byte stream and Arrow's
+    own CSV/JSON readers decode them, so rows are never materialised as
+    Python objects. The schema is inferred over the first
+    schema_lookahead_bytes of records, widening types that differ between
+    blocks (int64 and double become double, a field missing from a block is
+    null there). Later blocks are read against it; a block whose columns
+    cannot be cast to it, or a JSON field it lacks, fails the conversion
+    rather than being silently dropped. Once the schema is fixed, each block's
+    record batches are returned by feed() as soon as they are decoded and
+    appended to the IPC file at output_path.
+    """
+
+    def __init__(self, record_format: str, output_path: str, uhrp_hash: str,
+                 max_record_bytes: int = DEFAULT_MAX_RECORD_BYTES, delimiter: str = ',',
+                 schema_lookahead_bytes: int = SCHEMA_LOOKAHEAD_BYTES):
+        _require_pyarrow()
+        self.record_format = record_format
+        self.output_path = output_path
+        self.uhrp_hash = uhrp_hash
+        self.delimiter = delimiter
+        self.schema_lookahead_bytes = schema_lookahead_bytes
+        self.splitter = RecordParser(record_format, max_record_bytes=max_record_bytes, delimiter=delimiter)
+
+        self.schema: Optional['pyarrow.Schema'] = None
+        self._column_names: Optional[List[str]] = None
+        # Tables decoded while the schema is still being inferred
+        self._pending: List['pyarrow.Table'] = []
+        self._pending_bytes = 0
+        self._writer = None
+        self.rows = 0
+        self.batches = 0
+        self.convert_cpu_seconds = 0.0
+
+    def feed(self, data: bytes) -> List['pyarrow.RecordBatch']:
+        """Add a chunk; returns the record batches of the rows it completed"""
+        return self._convert(self.splitter.split(data))
+
+    def finish(self) -> List['pyarrow.RecordBatch']:
+        """End of stream: convert the final rows and close the IPC file"""
+        batches = self._convert(self.splitter.split_end())
+        if self.schema is None:
+            # Short stream: fix the schema from what there is (an empty file if no rows)
+            batches += self._fix_schema()
+        self._writer.close()
+        return batches
+
+    def abort(self):
+        if self._writer is not None:
+            self._writer.close()
+        if os.path.exists(self.output_path):
+            os.remove(self.output_path)
+
+    def _convert(self, block: bytes) -> List['pyarrow.RecordBatch']:
+        if not block.strip():
+            return []
+        started = time.thread_time()
+        try:
+            table = self._read(block)
+        except pyarrow.ArrowInvalid as e:
+            raise Exception(f"Could not convert rows {self._row_number()}+ of {self.uhrp_hash} to Arrow: {e}")
+        if self._column_names is None:
+            self._column_names = table.column_names
+
+        if self.schema is None:
+            self._pending.append(table)
+            self._pending_bytes += len(block)
+            batches = self._fix_schema() if self._pending_bytes >= self.schema_lookahead_bytes else []
+        else:
+            batches = self._write(self._conform(table, self.schema))
+        self.convert_cpu_seconds += time.thread_time() - started
+        return batches
+
+    def _read(self, block: bytes) -> 'pyarrow.Table':
+        if self.record_format == 'jsonl':
+            if self.schema is not None:
+                try:
+                    # Fast path: the block fits the schema as it stands
+                    return pyarrow.json.read_json(io.BytesIO(block), parse_options=pyarrow.json.ParseOptions(
+                        explicit_schema=self.schema, unexpected_field_behavior='error'
+                    ))
+                except pyarrow.ArrowInvalid:
+                    pass  # Infer the block on its own; _conform reports what does not fit
+            return pyarrow.json.read_json(io.BytesIO(block))
+
+        parse_options = pyarrow.csv.ParseOptions(delimiter=self.delimiter, newlines_in_values=True)
+        if self._column_names is None:
+            return pyarrow.csv.read_csv(io.BytesIO(block), parse_options=parse_options)
+        read_options = pyarrow.csv.ReadOptions(column_names=self._column_names)
+        if self.schema is not None:
+            try:
+                # Fast path, which also keeps text columns as text ("007" stays "007")
+                return pyarrow.csv.read_csv(io.BytesIO(block), read_options=read_options,
+                                            parse_options=parse_options,
+                                            convert_options=pyarrow.csv.ConvertOptions(column_types=self.schema))
+            except pyarrow.ArrowInvalid:
+                pass
+        return pyarrow.csv.read_csv(io.BytesIO(block), read_options=read_options, parse_options=parse_options)
+
+    def _fix_schema(self) -> List['pyarrow.RecordBatch']:
+        """Unify the look-ahead tables into the file schema and write them out"""
+        if not self._pending:
+            schema = pyarrow.schema([])
+        else:
+            try:
+                schema = pyarrow.unify_schemas([table.schema for table in self._pending],
+                                               promote_options='permissive')
+            except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError) as e:
+                raise Exception(f"Could not infer one Arrow schema for {self.uhrp_hash}: {e}")
+        self._open_writer(schema)
+        pending, self._pending = self._pending, []
+        batches = []
+        for table in pending:
+            batches += self._write(self._conform(table, self.schema))
+        return batches
+
+    def _conform(self, table: 'pyarrow.Table', schema: 'pyarrow.Schema') -> 'pyarrow.Table':
+        """Cast table to schema, filling fields it lacks with nulls"""
+        extra = [name for name in table.column_names if schema.get_field_index(name) < 0]
+        if extra:
+            raise Exception(
+                f"Rows {self._row_number()}+ of {self.uhrp_hash} add fields {extra} not in the schema "
+                f"inferred from the first {self.schema_lookahead_bytes} bytes; raise schema_lookahead_bytes"
+            )
+        columns = []
+        for field in schema:
+            if field.name not in table.column_names:
+                columns.append(pyarrow.nulls(table.num_rows, field.type))
+                continue
+            column = table.column(field.name)
+            if column.type != field.type:
+                try:
+                    column = column.cast(field.type)
+                except (pyarrow.ArrowInvalid, pyarrow.ArrowNotImplementedError) as e:
+                    raise Exception(
+                        f"Rows {self._row_number()}+ of {self.uhrp_hash} do not fit column {field.name!r} "
+                        f"({field.type}, inferred from the first {self.schema_lookahead_bytes} bytes; "
+                        f"raise schema_lookahead_bytes): {e}"
+                    )
+            columns.append(column)
+        return pyarrow.Table.from_arrays(columns, schema=schema)
+
+    def _write(self, table: 'pyarrow.Table') -> List['pyarrow.RecordBatch']:
+        batches = table.to_batches()
+        for batch in batches:
+            self._writer.write_batch(batch)
+        self.rows += table.num_rows
+        self.batches += len(batches)
+        return batches
+
+    def _row_number(self) -> int:
+        """1-based number of the first row not yet written or pending"""
+        return self.rows + sum(table.num_rows for table in self._pending) + 1
+
+    def _open_writer(self, schema: 'pyarrow.Schema'):
+        # The raw object's hash travels with the columns it was decoded from
+        self.schema = schema.with_metadata({b'uhrp_hash': self.uhrp_hash.encode()})
+        self._writer = pyarrow.ipc.new_file(self.output_path, self.schema)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'record_format': self.record_format,
+            'rows': self.rows,
+            'batches': self.batches,
+            'columns': len(self.schema) if self.schema is not None else 0,
+            'convert_cpu_seconds': round(self.convert_cpu_seconds, 4)
+        }
+
+
+def open_arrow_file(path: str, uhrp_hash: Optional[str] = None) -> 'pyarrow.Table':
+    """
+    Open an Arrow IPC file memory-mapped; the table's buffers point into the
+    mapping, so nothing is read until columns are used. With uhrp_hash, the
+    file must have been converted from that object.
+    """
+    _require_pyarrow()
+    table = pyarrow.ipc.open_file(pyarrow.memory_map(path, 'r')).read_all()
+    if uhrp_hash is not None:
+        source = (table.schema.metadata or {}).get(b'uhrp_hash', b'').decode()
+        if source != uhrp_hash:
+            raise Exception(f"Arrow file {path} was converted from {source or 'unknown content'}, not {uhrp_hash}")
+    return table
@@ -8,23 +8,56 @@ import hashlib
 import json
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Any, AsyncGenerator
 import aiohttp
 from datetime import datetime
-import aiofiles
+from urllib.parse import urlparse
+
+from .brc26_transfer import (
+    SegmentedDownload, TransferCheckpoint, ResumableFile, RangeNotSupportedError, hash_file_range,
+    CoalescingWriter, PathLock, adaptive_chunks,
+    DEFAULT_SEGMENT_SIZE, MAX_READ_SIZE, DEFAULT_WORKERS, MAX_WORKERS, SEGMENT_RETRIES, LOCK_REFRESH_SECONDS
+)
+from .brc26_store import (
+    ContentStore, MappedObject, DEFAULT_MAX_BYTES, DEFAULT_MEMORY_BYTES, DEFAULT_MEMORY_OBJECT_MAX
+)
+from .brc26_merkle import ChunkMerkleTree
+from .brc26_encoding import StreamDecoder, accept_encoding, combined_stats
+from .brc26_bandwidth import BandwidthGovernor
+from .brc26_metrics import TransferMonitor, TransferRegistry, ProgressCallback
+from .brc26_records import RecordParser, iter_record_batches, record_format_for, DEFAULT_BATCH_ROWS
+from .brc26_columnar import ArrowConverter, open_arrow_file, ARROW_KIND
+from .brc26_delta import DeltaApplier, block_signatures, encode_signatures, choose_block_size
 
 logger = logging.getLogger(__name__)
 
+VERIFY_WORKERS = min(8, os.cpu_count() or 1)
+CHUNK_REFETCH_RETRIES = 2
+
 class BRC26ContentClient:
     """
     BRC-26 UHRP Content Storage Client
     Provides content retrieval and streaming capabilities for consumers
     """
 
-    def __init__(self, overlay_url: str):
+    def __init__(self, overlay_url: str, bandwidth: Optional[BandwidthGovernor] = None,
+                 progress_callback: Optional[ProgressCallback] = None,
+                 memory_cache_bytes: int = DEFAULT_MEMORY_BYTES,
+                 memory_object_max: int = DEFAULT_MEMORY_OBJECT_MAX):
         self.overlay_url = overlay_url.rstrip('/')
         self.content_endpoint = f"{self.overlay_url}/api/content"
+        self.bandwidth = bandwidth or BandwidthGovernor()
+        self.progress_callback = progress_callback
+        self.transfers = TransferRegistry()
+        self.memory_cache_bytes = memory_cache_bytes
+        self.memory_object_max = memory_object_max
+        self._host = urlparse(self.overlay_url).netloc
         self.session = None
+        self._transfer_session = None
+        self._stores: Dict[str, ContentStore] = {}
+        self._metadata_cache: Dict[str, Dict[str, Any]] = {}
+        self._verify_pool: Optional[ThreadPoolExecutor] = None
 
     async def __aenter__(self):
         """Async context manager entry"""
@@ -33,8 +66,7 @@ class BRC26ContentClient:
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit"""
-        if self.session:
-            await self.session.close()
+        await self.close()
 
     async def get_content(self, uhrp_hash: str, consumer_identity: str,
                          access_token: str = None, verify_integrity: bool = True) -> Dict[str, Any]:
@@ -81,82 +113,395 @@ class BRC26ContentClient:
 
     async def download_content_to_file(self, uhrp_hash: str, consumer_identity: str,
                                      output_path: str, access_token: str = None,
-                                     verify_integrity: bool = True) -> Dict[str, Any]:
+                                     verify_integrity: bool = True,
+                                     max_retries: int = SEGMENT_RETRIES,
+                                     on_progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
         """
-        Download content directly to file with progress tracking
+        Download content directly to file with progress tracking.
+        Progress is checkpointed next to the output so an interrupted transfer
+        resumes with a Range request instead of starting from byte zero.
+        on_progress receives TransferMonitor snapshots while bytes arrive.
         """
         try:
             # Get content metadata first
             metadata = await self.get_content_metadata(uhrp_hash, consumer_identity)
 
-            download_request = {
+            session = self._get_transfer_session()
+            loop = asyncio.get_running_loop()
+            total_size = metadata.get('size', 0)
+            part = ResumableFile(
+                output_path=output_path,
+                uhrp_hash=uhrp_hash,
+                content_hash=metadata.get('content_hash'),
+                total_size=total_size
+            )
+            resumed_from = await loop.run_in_executor(None, part.open)
+            receipt_id = self.bandwidth.receipt_for_token(access_token)
+            self.bandwidth.admit(receipt_id, max(total_size - resumed_from, 0))
+
+            # One decoder per response; bodies are decoded in the writer's executor thread
+            decoders: List[StreamDecoder] = []
+
+            def write_decoded(data: bytes):
+                for piece in decoders[-1].decode(data):
+                    part.write(piece)
+
+            writer = CoalescingWriter(write_decoded)
+
+            monitor = self._monitor(uhrp_hash, 'download', total_size, resumed_from, on_progress)
+            async with monitor.running():
+                attempt = 0
+                while True:
+                    download_request = {
+                        'uhrp_hash': uhrp_hash,
+                        'consumer_identity': consumer_identity,
+                        'access_token': access_token,
+                        'stream_download': True,
+                        'timestamp': datetime.now().isoformat()
+                    }
+                    headers = {'Accept-Encoding': accept_encoding()}
+                    if part.offset:
+                        # Offsets refer to the uncompressed object, so resume uncompressed
+                        headers = {'Range': f"bytes={part.offset}-", 'Accept-Encoding': 'identity'}
+
+                    started = monitor.request_started(self._host)
+                    try:
+                        async with session.post(
+                            f"{self.content_endpoint}/download",
+                            json=download_request,
+                            headers=headers,
+                            timeout=None  # No timeout for large downloads
+                        ) as response:
+                            monitor.response_started(started, self._host)
+                            if response.status == 200 and part.offset:
+                                # Server ignored the Range request; start over
+                                await loop.run_in_executor(None, part.restart)
+                                monitor.resumed_bytes = 0
+                            elif response.status not in (200, 206):
+                                error_text = await response.text()
+                                raise Exception(f"Content download failed: {error_text}")
+                            decoders.append(StreamDecoder(response.headers.get('Content-Encoding')))
+                            if not decoders[-1].is_identity:
+                                # The monitor counts wire bytes
+                                monitor.total_size = int(response.headers.get('Content-Length') or 0)
+
+                            async for chunk in self._paced(adaptive_chunks(response.content), receipt_id, monitor):
+                                await writer.write(chunk)
+
+                        await writer.flush()
+                        try:
+                            tail = decoders[-1].flush()
+                        except Exception as e:
+                            # A compressed body cut short is a dropped connection: resume what was decoded
+                            raise aiohttp.ClientPayloadError(str(e))
+                        if tail:
+                            await loop.run_in_executor(None, part.write, tail)
+                        if total_size and part.offset < total_size:
+                            raise aiohttp.ClientPayloadError(
+                                f"Connection closed at byte {part.offset} of {total_size}"
+                            )
+                        break
+
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        # Keep whatever arrived before the connection dropped
+                        await writer.flush()
+                        monitor.request_failed(self._host)
+                        attempt += 1
+                        if attempt > max_retries:
+                            await loop.run_in_executor(None, part.suspend)
+                            raise
+                        delay = 0.5 * (2 ** (attempt - 1))
+                        logger.warning(f"Download interrupted at byte {part.offset} ({e}), resuming in {delay:.1f}s")
+                        await asyncio.sleep(delay)
+                    except BaseException:
+                        try:
+                            await writer.flush()
+                        finally:
+                            await loop.run_in_executor(None, part.suspend)
+                        raise
+
+                # Verified before the monitor closes, so a mismatch is recorded as a failed transfer
+                downloaded_size = part.offset
+                calculated_hash = part.hasher.hexdigest()
+                integrity_verified = True
+                if verify_integrity and metadata.get('content_hash'):
+                    integrity_verified = calculated_hash == metadata['content_hash'].lower()
+                    if not integrity_verified:
+                        await loop.run_in_executor(None, part.discard)
+                        raise Exception(
+                            f"Content integrity verification failed for {uhrp_hash}: calculated {calculated_hash}"
+                        )
+                await loop.run_in_executor(None, part.commit)
+
+            result = {
                 'uhrp_hash': uhrp_hash,
-                'consumer_identity': consumer_identity,
-                'access_token': access_token,
-                'stream_download': True,
-                'timestamp': datetime.now().isoformat()
+                'file_path': output_path,
+                'file_size': downloaded_size,
+                'resumed_from': resumed_from,
+                'content_hash': calculated_hash,
+                'integrity_verified': integrity_verified,
+                'content_type': metadata.get('content_type', 'application/octet-stream'),
+                'metadata': metadata,
+                'transfer_record': monitor.end_record,
+                **combined_stats(decoders)
             }
 
-            if not self.session:
-                self.session = aiohttp.ClientSession()
+            logger.info(f"Downloaded content to: {output_path}")
+            return result
 
-            # Create output directory if needed
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        except Exception as e:
+            logger.error(f"Content download failed: {e}")
+            raise
 
-            total_size = metadata.get('size', 0)
-            downloaded_size = 0
-            content_hash = hashlib.sha256()
+    async def download_content_segmented(self, uhrp_hash: str, consumer_identity: str,
+                                       output_path: str, access_token: str = None,
+                                       verify_integrity: bool = True,
+                                       workers: int = DEFAULT_WORKERS,
+                                       max_workers: int = MAX_WORKERS,
+                                       segment_size: int = DEFAULT_SEGMENT_SIZE,
+                                       auto_tune: bool = True,
+                                       on_progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """
+        Download content as concurrent byte ranges over pooled connections.
+        Falls back to a single-stream download when the size is unknown or the
+        server does not honour Range requests. Completed segments are
+        checkpointed, so rerunning after a failure only fetches what is missing.
+        """
+        try:
+            metadata = await self.get_content_metadata(uhrp_hash, consumer_identity)
+            total_size = int(metadata.get('size') or 0)
+
+            if total_size <= segment_size:
+                return await self.download_content_to_file(
+                    uhrp_hash, consumer_identity, output_path, access_token, verify_integrity,
+                    on_progress=on_progress
+                )
+
+            self.bandwidth.admit(self.bandwidth.receipt_for_token(access_token), total_size)
+
+            os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+            temp_path = output_path + '.part'
+
+            checkpoint_path = TransferCheckpoint.path_for(temp_path)
+            checkpoint = TransferCheckpoint.load(checkpoint_path)
+            if not (checkpoint and os.path.exists(temp_path) and checkpoint.matches(
+                    uhrp_hash, metadata.get('content_hash'), total_size, segment_size)):
+                # Missing, foreign or stale (the server's content hash changed)
+                if checkpoint:
+                    logger.info(f"Discarding stale partial download of {uhrp_hash}")
+                    checkpoint.discard()
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                checkpoint = TransferCheckpoint(
+                    checkpoint_path, uhrp_hash, metadata.get('content_hash'), total_size, segment_size
+                )
+
+            resumed_bytes = sum(block['end'] - block['start'] for block in checkpoint.completed.values())
+            monitor = self._monitor(uhrp_hash, 'segmented', total_size, resumed_bytes, on_progress)
+            downloader = SegmentedDownload(
+                fetch_range=lambda start, end: self._fetch_range(
+                    uhrp_hash, consumer_identity, access_token, start, end, monitor
+                ),
+                output_path=temp_path,
+                total_size=total_size,
+                segment_size=segment_size,
+                workers=workers,
+                max_workers=max_workers,
+                auto_tune=auto_tune,
+                checkpoint=checkpoint
+            )
 
-            async with self.session.post(
-                f"{self.content_endpoint}/download",
-                json=download_request,
-                timeout=None  # No timeout for large downloads
-            ) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    raise Exception(f"Content download failed: {error_text}")
+            try:
+                async with monitor.running():
+                    transfer = await downloader.run()
+                    integrity_verified = True
+                    if verify_integrity and metadata.get('content_hash'):
+                        integrity_verified = transfer['content_hash'] == metadata['content_hash'].lower()
+                        if not integrity_verified:
+                            checkpoint.discard()
+                            os.remove(temp_path)
+                            raise Exception(f"Content integrity verification failed for {uhrp_hash}")
+            except RangeNotSupportedError:
+                logger.info(f"Range requests not supported for {uhrp_hash}, using single stream")
+                checkpoint.discard()
+                os.remove(temp_path)
+                return await self.download_content_to_file(
+                    uhrp_hash, consumer_identity, output_path, access_token, verify_integrity,
+                    on_progress=on_progress
+                )
+            # Any other failure, except a failed verification, keeps the partial file and checkpoint for a resume
+
+            os.replace(temp_path, output_path)
+            checkpoint.discard()
+
+            result = {
+                'uhrp_hash': uhrp_hash,
+                'file_path': output_path,
+                'file_size': transfer['file_size'],
+                'integrity_verified': integrity_verified,
+                'content_type': metadata.get('content_type', 'application/octet-stream'),
+                'metadata': metadata,
+                'transfer': transfer,
+                'transfer_record': monitor.end_record
+            }
 
-                async with aiofiles.open(output_path, 'wb') as file:
-                    async for chunk in response.content.iter_chunked(8192):
-                        await file.write(chunk)
-                        downloaded_size += len(chunk)
-                        content_hash.update(chunk)
+            logger.info(
+                f"Downloaded content to: {output_path} ({transfer['segment_count']} segments, "
+                f"{transfer['peak_workers']} workers, {transfer['bytes_per_second'] / 1e6:.2f} MB/s)"
+            )
+            return result
 
-                        # Log progress for large files
-                        if total_size > 0 and downloaded_size % (1024 * 1024) == 0:  # Every MB
-                            progress = (downloaded_size / total_size) * 100
-                            logger.info(f"Download progress: {progress:.1f}%")
+        except Exception as e:
+            logger.error(f"Segmented content download failed: {e}")
+            raise
 
-            # Verify integrity if requested
-            integrity_verified = True
-            if verify_integrity and metadata.get('content_hash'):
-                calculated_hash = content_hash.hexdigest()
-                expected_hash = metadata['content_hash']
-                integrity_verified = calculated_hash == expected_hash
+    async def download_content_deduplicated(self, uhrp_hash: str, consumer_identity: str,
+                                            output_path: str, access_token: str = None,
+                                            cache_dir: str = './cache',
+                                            workers: int = DEFAULT_WORKERS,
+                                            on_progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """
+        Download content as content-defined chunks, fetching only the chunks
+        not already held in the local chunk store. Needs the object's chunk
+        recipe from the overlay; without one the whole object is downloaded
+        and chunked locally so later versions can reuse it. The chunks count
+        against the cache budget of the content store at cache_dir.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+            store = self._get_store(cache_dir)
+            chunk_store = store.chunks
+            metadata = await self.get_content_metadata(uhrp_hash, consumer_identity)
+            expected_hash = metadata.get('content_hash') or uhrp_hash
+
+            recipe = chunk_store.get_recipe(uhrp_hash) or await self.get_content_recipe(uhrp_hash, consumer_identity)
+            if recipe is None:
+                return await self._download_and_chunk(uhrp_hash, consumer_identity, output_path,
+                                                      access_token, store, on_progress)
+
+            missing = await loop.run_in_executor(None, chunk_store.missing_ranges, recipe['chunks'])
+            semaphore = asyncio.Semaphore(workers)
+            monitor = self._monitor(uhrp_hash, 'deduplicated', sum(end - start for start, end, _ in missing),
+                                    on_progress=on_progress)
+
+            async def fetch_missing(start: int, end: int, wanted: List[Dict[str, Any]]):
+                async with semaphore:
+                    parts = []
+                    async for part in self._fetch_range(uhrp_hash, consumer_identity, access_token, start, end):
+                        monitor.record(len(part), self._host)
+                        parts.append(part)
+                    data = b''.join(parts)
+                if len(data) != end - start:
+                    raise Exception(f"Range {start}-{end} of {uhrp_hash} returned {len(data)} bytes")
+                offset = 0
+                for chunk in wanted:
+                    piece = data[offset:offset + chunk['length']]
+                    offset += chunk['length']
+                    await loop.run_in_executor(None, chunk_store.put_chunk, piece, chunk['sha256'])
 
-                if not integrity_verified:
-                    logger.error(f"Content integrity verification failed for {uhrp_hash}")
+            try:
+                async with monitor.running():
+                    await asyncio.gather(*[fetch_missing(*missing_range) for missing_range in missing])
+            except RangeNotSupportedError:
+                logger.info(f"Range requests not supported for {uhrp_hash}, downloading whole object")
+                return await self._download_and_chunk(uhrp_hash, consumer_identity, output_path,
+                                                      access_token, store, on_progress)
+
+            calculated_hash = await loop.run_in_executor(
+                None, chunk_store.materialize, uhrp_hash, output_path, recipe
+            )
+            if calculated_hash != expected_hash:
+                os.remove(output_path)
+                chunk_store.remove_recipe(uhrp_hash)
+                raise Exception(f"Content integrity verification failed for {uhrp_hash}")
+            chunk_store.put_recipe(uhrp_hash, recipe['chunks'], calculated_hash)
+            await loop.run_in_executor(None, lambda: store.evict(protect=uhrp_hash))
+
+            total_size = sum(chunk['length'] for chunk in recipe['chunks'])
+            bytes_fetched = sum(end - start for start, end, _ in missing)
+            logger.info(f"Downloaded {uhrp_hash}: fetched {bytes_fetched} of {total_size} bytes, "
+                        f"reused {total_size - bytes_fetched} from local chunks")
 
-            result = {
+            return {
                 'uhrp_hash': uhrp_hash,
                 'file_path': output_path,
-                'file_size': downloaded_size,
-                'integrity_verified': integrity_verified,
+                'file_size': total_size,
+                'content_hash': calculated_hash,
+                'integrity_verified': True,
                 'content_type': metadata.get('content_type', 'application/octet-stream'),
-                'metadata': metadata
+                'chunk_count': len(recipe['chunks']),
+                'chunks_fetched': sum(len(wanted) for _, _, wanted in missing),
+                'bytes_fetched': bytes_fetched,
+                'bytes_reused': total_size - bytes_fetched,
+                'transfer_record': monitor.end_record
             }
 
-            logger.info(f"Downloaded content to: {output_path}")
-            return result
+        except Exception as e:
+            logger.error(f"Deduplicated download failed: {e}")
+            raise
+
+    async def get_content_recipe(self, uhrp_hash: str, consumer_identity: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the published content-defined chunk list of an object, or None if
+        the overlay has none
+        """
+        try:
+            metadata = self._metadata_cache.get(uhrp_hash) or {}
+            if metadata.get('chunk_recipe'):
+                return metadata['chunk_recipe']
+
+            if not self.session:
+                self.session = aiohttp.ClientSession()
+
+            async with self.session.post(
+                f"{self.content_endpoint}/chunks",
+                json={'uhrp_hash': uhrp_hash, 'consumer_identity': consumer_identity},
+                timeout=10
+            ) as response:
+                if response.status == 404:
+                    return None
+                elif response.status != 200:
+                    error_text = await response.text()
+                    raise Exception(f"Chunk recipe retrieval failed: {error_text}")
+                return await response.json()
 
         except Exception as e:
-            logger.error(f"Content download failed: {e}")
+            logger.error(f"Chunk recipe retrieval failed: {e}")
             raise
 
+    async def _download_and_chunk(self, uhrp_hash: str, consumer_identity: str, output_path: str,
+                                  access_token: Optional[str], store: ContentStore,
+                                  on_progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        result = await self.download_content_to_file(uhrp_hash, consumer_identity, output_path, access_token,
+                                                     on_progress=on_progress)
+        if not result['integrity_verified']:
+            raise Exception(f"Content integrity verification failed for {uhrp_hash}")
+        recipe = await loop.run_in_executor(None, store.chunks.ingest_file, uhrp_hash, output_path)
+        await loop.run_in_executor(None, lambda: store.evict(protect=uhrp_hash))
+        result.update(
+            chunk_count=len(recipe['chunks']),
+            chunks_fetched=len(recipe['chunks']),
+            bytes_fetched=result['file_size'] - result['resumed_from'],
+            bytes_reused=0
+        )
+        return result
+
+    def _get_transfer_session(self) -> aiohttp.ClientSession:
+        """Session for content bodies, which are decoded by StreamDecoder instead of aiohttp"""
+        if self._transfer_session is None:
+            self._transfer_session = aiohttp.ClientSession(auto_decompress=False)
+        return self._transfer_session
+
     async def stream_content(self, uhrp_hash: str, consumer_identity: str,
-                           access_token: str = None) -> AsyncGenerator[bytes, None]:
+                           access_token: str = None, verify_chunks: bool = False,
+                           on_progress: Optional[ProgressCallback] = None) -> AsyncGenerator[bytes, None]:
         """
-        Stream content in chunks for real-time consumption
+        Stream content in chunks for real-time consumption.
+        With verify_chunks, every Merkle chunk is verified before it is yielded
+        and a corrupt chunk is refetched from its offset. The whole stream is
+        also hashed and must match the object's content hash at the end, so a
+        tree that does not belong to the object cannot vouch for its data.
         """
         try:
             stream_request = {
@@ -167,28 +512,339 @@ class BRC26ContentClient:
                 'timestamp': datetime.now().isoformat()
             }
 
+            tree = await self.get_content_merkle_tree(uhrp_hash, consumer_identity) if verify_chunks else None
+
+            metadata = self._metadata_cache.get(uhrp_hash) or {}
+            total_size = tree.total_size if tree else int(metadata.get('size') or 0)
+            monitor = self._monitor(uhrp_hash, 'stream', total_size, on_progress=on_progress)
+            async with monitor.running():
+                started = monitor.request_started(self._host)
+                async with self._get_transfer_session().post(
+                    f"{self.content_endpoint}/stream",
+                    json=stream_request,
+                    headers={'Accept-Encoding': accept_encoding()},
+                    timeout=None
+                ) as response:
+                    monitor.response_started(started, self._host)
+                    if response.status != 200:
+                        error_text = await response.text()
+                        raise Exception(f"Content streaming failed: {error_text}")
+
+                    logger.info(f"Started streaming content: {uhrp_hash}")
+                    decoder = StreamDecoder(response.headers.get('Content-Encoding'))
+                    if not decoder.is_identity:
+                        monitor.total_size = int(response.headers.get('Content-Length') or 0)
+
+                    if tree is None:
+                        async for chunk in self._decoded_chunks(response, decoder, access_token, monitor):
+                            yield chunk
+                        logger.info(f"Finished streaming {uhrp_hash}: {decoder.stats()}")
+                        return
+
+                    index = 0
+                    received = 0
+                    buffer = bytearray()
+                    hasher = hashlib.sha256()
+                    async for data in self._decoded_chunks(response, decoder, access_token, monitor):
+                        received += len(data)
+                        if received > tree.total_size:
+                            raise Exception(f"Stream for {uhrp_hash} overran its {tree.total_size} bytes")
+                        buffer += data
+                        while index < tree.chunk_count and len(buffer) >= tree.chunk_size:
+                            chunk = bytes(buffer[:tree.chunk_size])
+                            del buffer[:tree.chunk_size]
+                            chunk = await self._verified_chunk(tree, index, chunk, uhrp_hash,
+                                                               consumer_identity, access_token)
+                            hasher.update(chunk)
+                            yield chunk
+                            index += 1
+
+                # Last (short) chunk, plus anything a truncated stream never delivered
+                while index < tree.chunk_count:
+                    start, end = tree.chunk_range(index)
+                    chunk = bytes(buffer[:end - start])
+                    del buffer[:end - start]
+                    chunk = await self._verified_chunk(tree, index, chunk, uhrp_hash,
+                                                       consumer_identity, access_token)
+                    hasher.update(chunk)
+                    yield chunk
+                    index += 1
+
+                expected_hash = metadata.get('content_hash') or uhrp_hash
+                if hasher.hexdigest() != expected_hash.lower():
+                    raise Exception(f"Content integrity verification failed for {uhrp_hash}: "
+                                    f"streamed {hasher.hexdigest()}")
+                logger.info(f"Finished streaming {uhrp_hash}: {decoder.stats()}")
+
+        except Exception as e:
+            logger.error(f"Content streaming failed: {e}")
+            raise
+
+    async def stream_records(self, uhrp_hash: str, consumer_identity: str, record_format: str = None,
+                             access_token: str = None, batch_rows: int = DEFAULT_BATCH_ROWS,
+                             verify_chunks: bool = False, on_progress: Optional[ProgressCallback] = None,
+                             **parser_options) -> AsyncGenerator[List[Any], None]:
+        """
+        Stream CSV or JSONL content as batches of parsed records.
+        Each batch is yielded as soon as the chunk completing it arrives;
+        record_format defaults to the one implied by the content type.
+        """
+        if record_format is None:
+            record_format = await self._record_format(uhrp_hash, consumer_identity)
+
+        parser = RecordParser(record_format, batch_rows=batch_rows, **parser_options)
+        chunks = self.stream_content(uhrp_hash, consumer_identity, access_token,
+                                     verify_chunks=verify_chunks, on_progress=on_progress)
+        try:
+            async for batch in iter_record_batches(chunks, parser):
+                yield batch
+        finally:
+            await chunks.aclose()
+        logger.info(f"Finished parsing {uhrp_hash}: {parser.stats()}")
+
+    async def stream_arrow_batches(self, uhrp_hash: str, consumer_identity: str, cache_dir: str = './cache',
+                                   record_format: str = None, access_token: str = None,
+                                   verify_chunks: bool = False, max_cache_bytes: int = None,
+                                   **converter_options) -> AsyncGenerator['pyarrow.RecordBatch', None]:
+        """
+        Stream CSV or JSONL content as Arrow record batches while it downloads.
+        The raw object is cached alongside and stays the integrity anchor: the
+        Arrow IPC file is kept only once the raw bytes hash to uhrp_hash (a
+        mismatch raises after the batches already yielded), and later calls
+        read it memory-mapped instead of downloading and parsing again.
+        """
+        loop = asyncio.get_running_loop()
+        store = self._get_store(cache_dir, max_cache_bytes)
+        path = await loop.run_in_executor(None, store.lookup_derived, uhrp_hash, ARROW_KIND)
+        if path is None:
+            lock = store.object_lock(uhrp_hash)
+            if not lock.acquire(blocking=False):
+                logger.info(f"Waiting for another download of {uhrp_hash}")
+                await lock.acquire_async()
+            try:
+                path = await loop.run_in_executor(None, store.lookup_derived, uhrp_hash, ARROW_KIND)
+                if path is None:
+                    async for batch in self._convert_to_arrow(store, lock, uhrp_hash, consumer_identity,
+                                                              record_format, access_token, verify_chunks,
+                                                              converter_options):
+                        yield batch
+                    return
+            finally:
+                lock.release()
+
+        table = await loop.run_in_executor(None, open_arrow_file, path, uhrp_hash)
+        for batch in table.to_batches():
+            yield batch
+
+    async def load_arrow_table(self, uhrp_hash: str, consumer_identity: str, cache_dir: str = './cache',
+                               **options) -> 'pyarrow.Table':
+        """
+        Arrow table of CSV or JSONL content, converted on first use and
+        memory-mapped from the cache afterwards
+        """
+        async for _ in self.stream_arrow_batches(uhrp_hash, consumer_identity, cache_dir, **options):
+            pass
+        loop = asyncio.get_running_loop()
+        path = await loop.run_in_executor(None, self._get_store(cache_dir).lookup_derived, uhrp_hash, ARROW_KIND)
+        if path is None:
+            raise Exception(f"Arrow conversion of {uhrp_hash} was evicted before it could be opened")
+        return await loop.run_in_executor(None, open_arrow_file, path, uhrp_hash)
+
+    async def _convert_to_arrow(self, store: ContentStore, lock: PathLock, uhrp_hash: str,
+                                consumer_identity: str, record_format: Optional[str],
+                                access_token: Optional[str], verify_chunks: bool,
+                                converter_options: Dict[str, Any]) -> AsyncGenerator['pyarrow.RecordBatch', None]:
+        """Convert the cached object, or the download teed into the store, holding the object's lock"""
+        loop = asyncio.get_running_loop()
+        record = await loop.run_in_executor(None, store.lookup, uhrp_hash)
+        content_type = record['content_type'] if record else \
+            (self._metadata_cache.get(uhrp_hash) or {}).get('content_type')
+        if record_format is None:
+            record_format = await self._record_format(uhrp_hash, consumer_identity, content_type)
+
+        raw_path = store.staging_path(uhrp_hash)
+        converter = ArrowConverter(record_format, f"{raw_path}.{ARROW_KIND}", uhrp_hash, **converter_options)
+        if record:
+            raw, hasher = None, None
+            chunks = self._file_chunks(record['path'])
+        else:
+            raw, hasher = open(raw_path, 'wb'), hashlib.sha256()
+            chunks = self.stream_content(uhrp_hash, consumer_identity, access_token, verify_chunks=verify_chunks)
+
+        def absorb(chunk: bytes) -> list:
+            if raw:
+                raw.write(chunk)
+                hasher.update(chunk)
+            return converter.feed(chunk)
+
+        refresher = asyncio.create_task(self._refresh_lock(lock))
+        try:
+            async for chunk in chunks:
+                for batch in await loop.run_in_executor(None, absorb, chunk):
+                    yield batch
+            for batch in await loop.run_in_executor(None, converter.finish):
+                yield batch
+
+            if raw:
+                raw.close()
+                if hasher.hexdigest() != uhrp_hash.lower():
+                    raise Exception(f"Refusing to cache {uhrp_hash}: integrity verification failed")
+                await loop.run_in_executor(
+                    None, lambda: store.commit(uhrp_hash, raw_path, sha256=hasher.hexdigest(),
+                                               content_type=content_type)
+                )
+            await loop.run_in_executor(None, store.commit_derived, uhrp_hash, ARROW_KIND, converter.output_path)
+            logger.info(f"Converted {uhrp_hash} to Arrow: {converter.stats()}")
+        except BaseException:
+            converter.abort()
+            if raw:
+                raw.close()
+                if os.path.exists(raw_path):
+                    os.remove(raw_path)
+            raise
+        finally:
+            refresher.cancel()
+            await chunks.aclose()
+
+    async def _record_format(self, uhrp_hash: str, consumer_identity: str, content_type: str = None) -> str:
+        """Record format implied by the content type of an object"""
+        if content_type is None:
+            metadata = self._metadata_cache.get(uhrp_hash) or \
+                await self.get_content_metadata(uhrp_hash, consumer_identity)
+            content_type = metadata.get('content_type')
+        record_format = record_format_for(content_type)
+        if record_format is None:
+            raise Exception(f"Content type {content_type!r} of {uhrp_hash} is not a record format")
+        return record_format
+
+    @staticmethod
+    async def _file_chunks(path: str, read_size: int = MAX_READ_SIZE) -> AsyncGenerator[bytes, None]:
+        loop = asyncio.get_running_loop()
+        with open(path, 'rb') as f:
+            while True:
+                data = await loop.run_in_executor(None, f.read, read_size)
+                if not data:
+                    break
+                yield data
+
+    async def _decoded_chunks(self, response, decoder: StreamDecoder, access_token: Optional[str] = None,
+                              monitor: Optional[TransferMonitor] = None) -> AsyncGenerator[bytes, None]:
+        """Body of response, paced and decoded incrementally off the event loop"""
+        loop = asyncio.get_running_loop()
+        receipt_id = self.bandwidth.receipt_for_token(access_token)
+        async for chunk in self._paced(adaptive_chunks(response.content), receipt_id, monitor):
+            pieces = decoder.decode(chunk)
+            if decoder.is_identity:
+                for data in pieces:
+                    yield data
+                continue
+            # One bounded step per executor hop, so a compression bomb never expands at once
+            while True:
+                data = await loop.run_in_executor(None, next, pieces, None)
+                if data is None:
+                    break
+                yield data
+        tail = decoder.flush()
+        if tail:
+            yield tail
+
+    async def get_content_merkle_tree(self, uhrp_hash: str, consumer_identity: str) -> ChunkMerkleTree:
+        """
+        Get the chunk Merkle tree of an object, authenticated against the
+        Merkle root in its metadata when one is published
+        """
+        try:
+            metadata = self._metadata_cache.get(uhrp_hash) \
+                or await self.get_content_metadata(uhrp_hash, consumer_identity)
+            if metadata.get('merkle_tree'):
+                return ChunkMerkleTree.from_dict(metadata['merkle_tree'], metadata.get('merkle_root'))
+
             if not self.session:
                 self.session = aiohttp.ClientSession()
 
             async with self.session.post(
-                f"{self.content_endpoint}/stream",
-                json=stream_request,
-                timeout=None
+                f"{self.content_endpoint}/merkle",
+                json={'uhrp_hash': uhrp_hash, 'consumer_identity': consumer_identity},
+                timeout=10
             ) as response:
-                if response.status != 200:
+                if response.status == 404:
+                    raise Exception(f"No Merkle tree published for: {uhrp_hash}")
+                elif response.status != 200:
                     error_text = await response.text()
-                    raise Exception(f"Content streaming failed: {error_text}")
-
-                logger.info(f"Started streaming content: {uhrp_hash}")
+                    raise Exception(f"Merkle tree retrieval failed: {error_text}")
 
-                async for chunk in response.content.iter_chunked(8192):
-                    if chunk:
-                        yield chunk
+                return ChunkMerkleTree.from_dict(await response.json(), metadata.get('merkle_root'))
 
         except Exception as e:
-            logger.error(f"Content streaming failed: {e}")
+            logger.error(f"Merkle tree retrieval failed: {e}")
             raise
 
+    async def _verified_chunk(self, tree: ChunkMerkleTree, index: int, data: bytes, uhrp_hash: str,
+                              consumer_identity: str, access_token: Optional[str],
+                              retries: int = CHUNK_REFETCH_RETRIES) -> bytes:
+        """Return data if it matches its Merkle leaf, otherwise refetch that chunk by range"""
+        for attempt in range(retries + 1):
+            if tree.verify_chunk(index, data):
+                return data
+            if attempt == retries:
+                break
+            logger.warning(f"Chunk {index} of {uhrp_hash} failed Merkle verification, refetching")
+            start, end = tree.chunk_range(index)
+            data = b''.join([
+                part async for part in self._fetch_range(uhrp_hash, consumer_identity, access_token, start, end)
+            ])
+        raise Exception(f"Chunk {index} of {uhrp_hash} failed verification after {retries} refetches")
+
+    async def _fetch_range(self, uhrp_hash: str, consumer_identity: str, access_token: Optional[str],
+                           start: int, end: int,
+                           monitor: Optional[TransferMonitor] = None) -> AsyncGenerator[bytes, None]:
+        """
+        Stream the half-open byte range [start, end) of an object
+        """
+        range_request = {
+            'uhrp_hash': uhrp_hash,
+            'consumer_identity': consumer_identity,
+            'access_token': access_token,
+            'stream_download': True,
+            'timestamp': datetime.now().isoformat()
+        }
+
+        started = monitor.request_started(self._host) if monitor else None
+        async with self._get_transfer_session().post(
+            f"{self.content_endpoint}/download",
+            json=range_request,
+            headers={'Range': f"bytes={start}-{end - 1}", 'Accept-Encoding': 'identity'},
+            timeout=None
+        ) as response:
+            if monitor:
+                monitor.response_started(started, self._host)
+            if response.status == 200:
+                raise RangeNotSupportedError(f"Server ignored Range request for {uhrp_hash}")
+            elif response.status != 206:
+                error_text = await response.text()
+                raise Exception(f"Range download failed ({response.status}): {error_text}")
+
+            async for chunk in self._paced(adaptive_chunks(response.content),
+                                           self.bandwidth.receipt_for_token(access_token), monitor):
+                yield chunk
+
+    async def _paced(self, chunks: AsyncGenerator[bytes, None], receipt_id: Optional[str],
+                     monitor: Optional[TransferMonitor] = None) -> AsyncGenerator[bytes, None]:
+        """
+        Charge each received chunk (as sent on the wire) to the bandwidth
+        governor and the transfer's monitor
+        """
+        async for chunk in chunks:
+            if monitor:
+                monitor.record(len(chunk), self._host)
+            yield chunk
+            await self.bandwidth.pace(len(chunk), self._host, receipt_id)
+
+    def _monitor(self, uhrp_hash: str, kind: str, total_size: int = 0, resumed_bytes: int = 0,
+                 on_progress: Optional[ProgressCallback] = None) -> TransferMonitor:
+        return TransferMonitor(uhrp_hash, kind, total_size=total_size, resumed_bytes=resumed_bytes,
+                               on_progress=on_progress or self.progress_callback, registry=self.transfers)
+
     async def get_content_metadata(self, uhrp_hash: str, consumer_identity: str) -> Dict[str, Any]:
         """
         Get metadata about content without retrieving the content itself
@@ -215,6 +871,7 @@ class BRC26ContentClient:
                     raise Exception(f"Metadata retrieval failed: {error_text}")
 
                 metadata_result = await response.json()
+                self._metadata_cache[uhrp_hash] = metadata_result
                 logger.debug(f"Retrieved metadata for: {uhrp_hash}")
                 return metadata_result
 
@@ -289,86 +946,290 @@ class BRC26ContentClient:
             return []
 
     async def cache_content_locally(self, uhrp_hash: str, consumer_identity: str,
-                                  cache_dir: str = './cache', access_token: str = None) -> Dict[str, Any]:
+                                  cache_dir: str = './cache', access_token: str = None,
+                                  max_cache_bytes: int = None, eviction: str = 'lru') -> Dict[str, Any]:
         """
-        Cache content locally for offline access
+        Cache content locally for offline access.
+        Hits are answered from the store's verified-hash record without rehashing.
+        Concurrent callers, in this or other processes, are single-flighted:
+        one downloads while the rest wait for its lock and read the result.
         """
         try:
-            # Create cache directory
-            os.makedirs(cache_dir, exist_ok=True)
-
-            # Generate cache filename
-            cache_filename = f"{uhrp_hash}.cache"
-            cache_path = os.path.join(cache_dir, cache_filename)
+            loop = asyncio.get_running_loop()
+            store = self._get_store(cache_dir, max_cache_bytes, eviction)
 
             # Check if already cached
-            if os.path.exists(cache_path):
-                # Verify cache integrity
-                with open(cache_path, 'rb') as f:
-                    cached_hash = hashlib.sha256(f.read()).hexdigest()
-
-                if cached_hash == uhrp_hash or await self._verify_cached_content(cache_path, uhrp_hash):
-                    logger.info(f"Content already cached: {cache_path}")
+            record = await loop.run_in_executor(None, store.lookup, uhrp_hash)
+            if record:
+                logger.info(f"Content already cached: {record['path']}")
+                return {
+                    'cached': True,
+                    'cache_path': record['path'],
+                    'cache_hit': True,
+                    'metadata': record
+                }
+
+            lock = store.object_lock(uhrp_hash)
+            if not lock.acquire(blocking=False):
+                logger.info(f"Waiting for another download of {uhrp_hash}")
+                await lock.acquire_async()
+            try:
+                # A peer may have committed it since the lookup; if a peer
+                # failed instead, we take over and resume from its staged blocks
+                record = await loop.run_in_executor(None, store.lookup, uhrp_hash)
+                if record:
+                    logger.info(f"Content cached by another download: {record['path']}")
                     return {
                         'cached': True,
-                        'cache_path': cache_path,
-                        'cache_hit': True
+                        'cache_path': record['path'],
+                        'cache_hit': True,
+                        'waited_for_peer': True,
+                        'metadata': record
                     }
+                return await self._cache_download(store, lock, uhrp_hash, consumer_identity, access_token)
+            finally:
+                lock.release()
+
+        except Exception as e:
+            logger.error(f"Content caching failed: {e}")
+            raise
 
-            # Download and cache content
+    async def _cache_download(self, store: ContentStore, lock: PathLock, uhrp_hash: str,
+                              consumer_identity: str, access_token: Optional[str]) -> Dict[str, Any]:
+        """Download into the store's staging area and commit, holding the object's lock"""
+        loop = asyncio.get_running_loop()
+        refresher = asyncio.create_task(self._refresh_lock(lock))
+        try:
             download_result = await self.download_content_to_file(
                 uhrp_hash=uhrp_hash,
                 consumer_identity=consumer_identity,
-                output_path=cache_path,
+                output_path=store.staging_path(uhrp_hash),
                 access_token=access_token,
                 verify_integrity=True
             )
+        finally:
+            refresher.cancel()
+
+        if not download_result.get('integrity_verified', False):
+            os.remove(download_result['file_path'])
+            raise Exception(f"Refusing to cache {uhrp_hash}: integrity verification failed")
+
+        record = await loop.run_in_executor(
+            None, lambda: store.commit(
+                uhrp_hash, download_result['file_path'],
+                sha256=download_result['content_hash'],
+                content_type=download_result.get('content_type'),
+                source_version=download_result.get('metadata', {}).get('version_id')
+            )
+        )
+
+        return {
+            'cached': True,
+            'cache_path': record['path'],
+            'cache_hit': False,
+            'metadata': record,
+            'transfer_record': download_result['transfer_record']
+        }
+
+    async def cache_content_delta(self, uhrp_hash: str, consumer_identity: str, base_hash: str,
+                                  cache_dir: str = './cache', access_token: str = None,
+                                  block_size: int = None, on_progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """
+        Cache a new version of content by transferring only what changed since
+        base_hash, a version already in the cache. Block signatures of the
+        base go to the overlay, which answers with base block copies and the
+        literal bytes that differ; the rebuilt object must hash to uhrp_hash.
+        Without a cached base or a delta endpoint the object is cached in full.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+            store = self._get_store(cache_dir)
+            base = await loop.run_in_executor(None, store.lookup, base_hash)
+            if base is None:
+                logger.info(f"Base version {base_hash} is not cached, caching {uhrp_hash} in full")
+                return dict(await self.cache_content_locally(uhrp_hash, consumer_identity, cache_dir, access_token),
+                            delta=False)
+
+            lock = store.object_lock(uhrp_hash)
+            if not lock.acquire(blocking=False):
+                logger.info(f"Waiting for another download of {uhrp_hash}")
+                await lock.acquire_async()
+            try:
+                record = await loop.run_in_executor(None, store.lookup, uhrp_hash)
+                if record:
+                    return {
+                        'cached': True,
+                        'cache_path': record['path'],
+                        'cache_hit': True,
+                        'delta': False,
+                        'metadata': record
+                    }
+                return await self._delta_download(store, lock, uhrp_hash, consumer_identity, base,
+                                                  access_token, block_size, on_progress)
+            finally:
+                lock.release()
 
-            # Create cache metadata
-            cache_metadata = {
-                'uhrp_hash': uhrp_hash,
-                'cached_at': datetime.now().isoformat(),
-                'file_size': download_result['file_size'],
-                'content_type': download_result.get('content_type'),
-                'integrity_verified': download_result.get('integrity_verified', False)
-            }
-
-            metadata_path = cache_path + '.meta'
-            with open(metadata_path, 'w') as f:
-                json.dump(cache_metadata, f, indent=2)
+        except Exception as e:
+            logger.error(f"Delta download failed: {e}")
+            raise
 
-            return {
-                'cached': True,
-                'cache_path': cache_path,
-                'cache_hit': False,
-                'metadata': cache_metadata
+    async def _delta_download(self, store: ContentStore, lock: PathLock, uhrp_hash: str, consumer_identity: str,
+                              base: Dict[str, Any], access_token: Optional[str], block_size: Optional[int],
+                              on_progress: Optional[ProgressCallback]) -> Dict[str, Any]:
+        """Rebuild uhrp_hash from the cached base and a delta into the store, holding the object's lock"""
+        loop = asyncio.get_running_loop()
+        block_size = block_size or choose_block_size(base['size'])
+        signatures = await loop.run_in_executor(None, block_signatures, base['path'], block_size)
+        staging_path = store.staging_path(uhrp_hash)
+        # Holds the base open, so an eviction meanwhile cannot take it away
+        applier = DeltaApplier(base['path'], staging_path, block_size)
+
+        refresher = asyncio.create_task(self._refresh_lock(lock))
+        try:
+            delta_request = {
+                'uhrp_hash': uhrp_hash,
+                'base_hash': base['uhrp_hash'],
+                'consumer_identity': consumer_identity,
+                'access_token': access_token,
+                'block_size': block_size,
+                'base_size': applier.base_size,
+                'signatures': encode_signatures(signatures)
             }
-
-        except Exception as e:
-            logger.error(f"Content caching failed: {e}")
+            monitor = self._monitor(uhrp_hash, 'delta', on_progress=on_progress)
+            async with monitor.running():
+                started = monitor.request_started(self._host)
+                async with self._get_transfer_session().post(
+                    f"{self.content_endpoint}/delta",
+                    json=delta_request,
+                    headers={'Accept-Encoding': accept_encoding()},
+                    timeout=None
+                ) as response:
+                    monitor.response_started(started, self._host)
+                    unsupported = response.status in (404, 405, 501)
+                    if not unsupported:
+                        if response.status != 200:
+                            error_text = await response.text()
+                            raise Exception(f"Delta request failed: {error_text}")
+
+                        decoder = StreamDecoder(response.headers.get('Content-Encoding'))
+                        async for data in self._decoded_chunks(response, decoder, access_token, monitor):
+                            await loop.run_in_executor(None, applier.feed, data)
+
+            if not unsupported:
+                calculated_hash = await loop.run_in_executor(None, applier.finish)
+                if calculated_hash != uhrp_hash.lower():
+                    raise Exception(f"Content integrity verification failed for {uhrp_hash}: "
+                                    f"delta rebuilt {calculated_hash}")
+        except BaseException:
+            applier.close()
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
             raise
+        finally:
+            refresher.cancel()
+
+        if unsupported:
+            applier.close()
+            os.remove(staging_path)
+            logger.info(f"No delta available for {uhrp_hash}, downloading in full")
+            return dict(await self._cache_download(store, lock, uhrp_hash, consumer_identity, access_token),
+                        delta=False)
+
+        record = await loop.run_in_executor(
+            None, lambda: store.commit(
+                uhrp_hash, staging_path, sha256=calculated_hash,
+                content_type=(self._metadata_cache.get(uhrp_hash) or {}).get('content_type') or base['content_type']
+            )
+        )
+        stats = applier.stats()
+        logger.info(f"Rebuilt {uhrp_hash} from {base['uhrp_hash']}: fetched {decoder.encoded_bytes} bytes, "
+                    f"reused {stats['bytes_copied']} of {record['size']}")
+        return {
+            'cached': True,
+            'cache_path': record['path'],
+            'cache_hit': False,
+            'delta': True,
+            'base_hash': base['uhrp_hash'],
+            'metadata': record,
+            'file_size': record['size'],
+            'content_hash': calculated_hash,
+            'integrity_verified': True,
+            'block_size': block_size,
+            'bytes_fetched': decoder.encoded_bytes,
+            'bytes_reused': stats['bytes_copied'],
+            'bytes_literal': stats['bytes_literal'],
+            'transfer_record': monitor.end_record
+        }
+
+    @staticmethod
+    async def _refresh_lock(lock: PathLock):
+        """Keep a held lock from looking stale while a long transfer runs"""
+        while True:
+            await asyncio.sleep(LOCK_REFRESH_SECONDS)
+            lock.refresh()
+
+    async def open_cached_content(self, uhrp_hash: str, cache_dir: str = './cache',
+                                  access: str = 'normal') -> Optional[MappedObject]:
+        """
+        Memory-map cached content for zero-copy reads; None if it is not cached.
+        Use as a context manager and slice with view(start, end).
+        """
+        store = self._get_store(cache_dir)
+        return await asyncio.get_running_loop().run_in_executor(
+            None, store.open_mapped, uhrp_hash, access
+        )
 
-    async def verify_content_integrity(self, uhrp_hash: str, file_path: str) -> bool:
+    async def read_cached_content(self, uhrp_hash: str, cache_dir: str = './cache') -> Optional[bytes]:
         """
-        Verify integrity of locally stored content
+        Contents of cached content, or None if it is not cached. Small objects
+        are answered from the store's memory tier without leaving the event loop.
+        """
+        store = self._get_store(cache_dir)
+        data = store.read_memory(uhrp_hash)
+        if data is not None:
+            return data
+        return await asyncio.get_running_loop().run_in_executor(None, store.read_disk, uhrp_hash)
+
+    def _get_store(self, cache_dir: str, max_cache_bytes: int = None, eviction: str = 'lru') -> ContentStore:
+        """Return the content store rooted at cache_dir, opening it on first use"""
+        key = os.path.abspath(cache_dir)
+        store = self._stores.get(key)
+        if store is None:
+            store = ContentStore(cache_dir, max_bytes=max_cache_bytes or DEFAULT_MAX_BYTES, eviction=eviction,
+                                 memory_bytes=self.memory_cache_bytes, memory_object_max=self.memory_object_max)
+            self._stores[key] = store
+        elif max_cache_bytes:
+            store.max_bytes = max_cache_bytes
+        return store
+
+    async def verify_content_integrity(self, uhrp_hash: str, file_path: str,
+                                       expected_hash: str = None, fetch_metadata: bool = True) -> bool:
+        """
+        Verify integrity of locally stored content.
+        Hashing runs in a thread pool with large reads; the expected hash is
+        taken from locally known metadata before asking the overlay.
         """
         try:
             if not os.path.exists(file_path):
                 return False
 
             # Calculate file hash
-            file_hash = hashlib.sha256()
-            async with aiofiles.open(file_path, 'rb') as f:
-                while chunk := await f.read(8192):
-                    file_hash.update(chunk)
-
-            calculated_hash = file_hash.hexdigest()
+            loop = asyncio.get_running_loop()
+            calculated_hash = (await loop.run_in_executor(
+                self._get_verify_pool(), hash_file_range, file_path
+            )).hexdigest()
 
             # Compare with expected hash
             if calculated_hash == uhrp_hash:
                 return True
 
-            # If direct hash doesn't match, check with content metadata
+            expected_hash = expected_hash or self._known_content_hash(uhrp_hash)
+            if expected_hash:
+                return calculated_hash == expected_hash
+            if not fetch_metadata:
+                return False
+
+            # Nothing known locally, check with content metadata
             try:
                 metadata = await self.get_content_metadata(uhrp_hash, "integrity_check")
                 expected_hash = metadata.get('content_hash', uhrp_hash)
@@ -380,6 +1241,35 @@ class BRC26ContentClient:
             logger.error(f"Integrity verification failed: {e}")
             return False
 
+    async def verify_many(self, files: Dict[str, str], fetch_metadata: bool = True) -> Dict[str, bool]:
+        """
+        Verify many local files in parallel.
+        files maps file path -> UHRP hash; returns file path -> verified.
+        """
+        paths = list(files)
+        results = await asyncio.gather(*[
+            self.verify_content_integrity(files[path], path, fetch_metadata=fetch_metadata)
+            for path in paths
+        ])
+        return dict(zip(paths, results))
+
+    def _known_content_hash(self, uhrp_hash: str) -> Optional[str]:
+        """Expected content hash from cached metadata or a local store record"""
+        metadata = self._metadata_cache.get(uhrp_hash)
+        if metadata and metadata.get('content_hash'):
+            return metadata['content_hash']
+        for store in self._stores.values():
+            record = store.record(uhrp_hash)
+            if record and record.get('sha256'):
+                return record['sha256']
+        return None
+
+    def _get_verify_pool(self) -> ThreadPoolExecutor:
+        if self._verify_pool is None:
+            self._verify_pool = ThreadPoolExecutor(max_workers=VERIFY_WORKERS,
+                                                   thread_name_prefix='brc26-verify')
+        return self._verify_pool
+
     async def health_check(self) -> bool:
         """
         Check if BRC-26 content service is healthy
@@ -446,4 +1336,13 @@ class BRC26ContentClient:
         """Close the HTTP session"""
         if self.session:
             await self.session.close()
-            self.session = None
\ No newline at end of file
+            self.session = None
+        if self._transfer_session:
+            await self._transfer_session.close()
+            self._transfer_session = None
+        if self._verify_pool:
+            self._verify_pool.shutdown(wait=False)
+            self._verify_pool = None
+        for store in self._stores.values():
+            store.close()
+        self._stores.clear()
\ No newline at end of file
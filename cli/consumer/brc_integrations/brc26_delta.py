@@ -0,0 +1,247 @@
+"""
+BRC-26 Delta Sync for Consumer
+rsync-style block signatures, delta encoding and reconstruction between object versions
+"""
+
+import base64
+import hashlib
+import math
+import os
+import struct
+import zlib
+from typing import Dict, Iterator, Any
+
+from .brc26_transfer import HASH_READ_SIZE, write_all
+
+MIN_BLOCK_SIZE = 2 * 1024
+MAX_BLOCK_SIZE = 1024 * 1024
+MAX_LITERAL_SIZE = 4 * 1024 * 1024
+DELTA_CONTENT_TYPE = 'application/vnd.brc26.delta'
+
+_ADLER_MOD = 65521
+# Per base block: Adler-32 (rolling) and a 16-byte BLAKE2b digest
+_SIGNATURE = struct.Struct('>I16s')
+# Delta records: copy a run of base blocks, literal bytes, end of delta
+_COPY = struct.Struct('>cII')
+_LITERAL = struct.Struct('>cI')
+_END = b'E'
+
+
+def choose_block_size(size: int) -> int:
+    """About sqrt(size) bytes, in KiB steps, as rsync does"""
+    block_size = int(math.sqrt(size)) // 1024 * 1024
+    return max(MIN_BLOCK_SIZE, min(MAX_BLOCK_SIZE, block_size))
+
+
+def strong_digest(data) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def block_signatures(path: str, block_size: int) -> bytes:
+    """Packed signatures of every block of path; the last block may be short"""
+    read_size = max(1, HASH_READ_SIZE // block_size) * block_size
+    signatures = bytearray()
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            data = f.read(read_size)
+            if not data:
+                break
+            view = memoryview(data)
+            for offset in range(0, len(data), block_size):
+                block = view[offset:offset + block_size]
+                signatures += _SIGNATURE.pack(zlib.adler32(block), strong_digest(block))
+    return bytes(signatures)
+
+
+def encode_signatures(signatures: bytes) -> str:
+    return base64.b64encode(signatures).decode('ascii')
+
+
+def decode_signatures(encoded: str) -> bytes:
+    signatures = base64.b64decode(encoded)
+    if len(signatures) % _SIGNATURE.size:
+        raise Exception("Truncated block signatures")
+    return signatures
+
+
+class _DeltaEncoder:
+    """Coalesces consecutive block copies into runs and splits long literals"""
+
+    def __init__(self):
+        self._run_start = None
+        self._run_length = 0
+
+    def copy(self, index: int) -> Iterator[bytes]:
+        if self._run_start is not None and index == self._run_start + self._run_length:
+            self._run_length += 1
+            return
+        yield from self.flush()
+        self._run_start, self._run_length = index, 1
+
+    def literal(self, data) -> Iterator[bytes]:
+        if not len(data):
+            return
+        yield from self.flush()
+        for offset in range(0, len(data), MAX_LITERAL_SIZE):
+            piece = data[offset:offset + MAX_LITERAL_SIZE]
+            yield _LITERAL.pack(b'L', len(piece)) + bytes(piece)
+
+    def flush(self) -> Iterator[bytes]:
+        if self._run_start is not None:
+            yield _COPY.pack(b'C', self._run_start, self._run_length)
+            self._run_start, self._run_length = None, 0
+
+
+def compute_delta(data: bytes, signatures: bytes, block_size: int, base_size: int) -> Iterator[bytes]:
+    """
+    Sender side: encode data (the new version) as copies of base blocks and
+    literal bytes. The window checksum rolls one byte at a time only through
+    bytes that match no base block; after a match it jumps a whole block.
+    """
+    count = len(signatures) // _SIGNATURE.size
+    index: Dict[int, list] = {}
+    for block in range(count):
+        weak, strong = _SIGNATURE.unpack_from(signatures, block * _SIGNATURE.size)
+        index.setdefault(weak, []).append((block, strong))
+    tail_size = base_size - (count - 1) * block_size if count else 0
+
+    encoder = _DeltaEncoder()
+    view = memoryview(data)
+    size = len(data)
+    length = block_size
+    pos = literal_start = 0
+    weak = None
+    while index and pos + length <= size:
+        if weak is None:
+            weak = zlib.adler32(view[pos:pos + length])
+        candidates = index.get(weak)
+        if candidates:
+            strong = strong_digest(view[pos:pos + length])
+            match = next((block for block, digest in candidates
+                          if digest == strong and (block < count - 1 or tail_size == length)), None)
+            if match is not None:
+                yield from encoder.literal(view[literal_start:pos])
+                yield from encoder.copy(match)
+                pos += length
+                literal_start = pos
+                weak = None
+                continue
+        if pos + length == size:
+            break
+        # Roll the Adler-32 window one byte forward
+        outgoing, incoming = data[pos], data[pos + length]
+        a = ((weak & 0xffff) - outgoing + incoming) % _ADLER_MOD
+        b = ((weak >> 16) - length * outgoing + a - 1) % _ADLER_MOD
+        weak = (b << 16) | a
+        pos += 1
+
+    # The base's last block may be short; it can only match the very end
+    if count and 0 < tail_size < block_size and size - tail_size >= literal_start:
+        last_weak, last_strong = _SIGNATURE.unpack_from(signatures, (count - 1) * _SIGNATURE.size)
+        tail = view[size - tail_size:]
+        if zlib.adler32(tail) == last_weak and strong_digest(tail) == last_strong:
+            yield from encoder.literal(view[literal_start:size - tail_size])
+            yield from encoder.copy(count - 1)
+            literal_start = size
+
+    yield from encoder.literal(view[literal_start:])
+    yield from encoder.flush()
+    yield _END
+
+
+class DeltaApplier:
+    """
+    Receiver side: rebuild the new version from a delta stream
+
+    feed() takes the delta as it arrives; block copies are read from the
+    base file with pread and literals are written through as they stream in,
+    so memory does not depend on object size. The output is hashed on the
+    way for verification against the new UHRP hash.
+    """
+
+    def __init__(self, base_path: str, output_path: str, block_size: int):
+        self.block_size = block_size
+        self._base_fd = os.open(base_path, os.O_RDONLY)
+        self.base_size = os.fstat(self._base_fd).st_size
+        self.block_count = -(-self.base_size // block_size)
+        self.output_path = output_path
+        self._out = open(output_path, 'wb', buffering=0)
+        self.hasher = hashlib.sha256()
+
+        self._buffer = b''
+        self._literal_remaining = 0
+        self.done = False
+        self.delta_bytes = 0
+        self.bytes_copied = 0
+        self.bytes_literal = 0
+
+    def feed(self, data: bytes):
+        self.delta_bytes += len(data)
+        buffer = self._buffer + data if self._buffer else data
+        pos = 0
+        while pos < len(buffer):
+            if self._literal_remaining:
+                piece = buffer[pos:pos + self._literal_remaining]
+                self._write(piece)
+                self.bytes_literal += len(piece)
+                self._literal_remaining -= len(piece)
+                pos += len(piece)
+                continue
+            if self.done:
+                raise Exception("Data after the end of the delta")
+            op = buffer[pos:pos + 1]
+            if op == b'C':
+                if len(buffer) - pos < _COPY.size:
+                    break
+                _, first, count = _COPY.unpack_from(buffer, pos)
+                self._copy(first, count)
+                pos += _COPY.size
+            elif op == b'L':
+                if len(buffer) - pos < _LITERAL.size:
+                    break
+                _, self._literal_remaining = _LITERAL.unpack_from(buffer, pos)
+                pos += _LITERAL.size
+            elif op == _END:
+                self.done = True
+                pos += 1
+            else:
+                raise Exception(f"Invalid delta record {op!r}")
+        self._buffer = buffer[pos:]
+
+    def _copy(self, first: int, count: int):
+        if count <= 0 or first + count > self.block_count:
+            raise Exception(f"Delta copies blocks {first}-{first + count} of a {self.block_count}-block base")
+        offset = first * self.block_size
+        end = min((first + count) * self.block_size, self.base_size)
+        while offset < end:
+            data = os.pread(self._base_fd, min(HASH_READ_SIZE, end - offset), offset)
+            if not data:
+                raise Exception("Base file shrank while applying the delta")
+            self._write(data)
+            offset += len(data)
+            self.bytes_copied += len(data)
+
+    def _write(self, data):
+        write_all(self._out.fileno(), data)
+        self.hasher.update(data)
+
+    def finish(self) -> str:
+        """Close the output and return its SHA-256; the delta must have ended"""
+        self.close()
+        if not self.done or self._literal_remaining or self._buffer:
+            raise Exception("Delta stream ended early")
+        return self.hasher.hexdigest()
+
+    def close(self):
+        if self._base_fd is not None:
+            os.close(self._base_fd)
+            self._base_fd = None
+        self._out.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'block_size': self.block_size,
+            'delta_bytes': self.delta_bytes,
+            'bytes_copied': self.bytes_copied,
+            'bytes_literal': self.bytes_literal
+        }
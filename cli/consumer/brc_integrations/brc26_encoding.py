@@ -0,0 +1,123 @@
+"""
+BRC-26 Transfer Encoding for Consumer
+Content-Encoding negotiation and incremental decoding of compressed transfers
+"""
+
+import time
+import zlib
+from typing import Dict, Any, Iterator, Optional
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; gzip is always available
+    zstandard = None
+
+SUPPORTED_ENCODINGS = ('zstd', 'gzip', 'deflate', 'identity') if zstandard else ('gzip', 'deflate', 'identity')
+
+# Most bytes one gzip/deflate decoding step may produce, so a compression
+# bomb cannot expand into memory in one call
+DECODE_PIECE_SIZE = 1024 * 1024
+# zstd decompressobj takes no output limit, so input is fed in slices
+# instead: a 4-byte RLE block decodes to at most 128 KiB, which bounds a
+# step to 256 * 32768 bytes = 8 MiB
+ZSTD_INPUT_SLICE = 256
+
+
+def accept_encoding() -> str:
+    """Accept-Encoding header value for full-object requests"""
+    return 'zstd, gzip;q=0.9' if zstandard else 'gzip'
+
+
+class StreamDecoder:
+    """
+    Incremental decoder for one response body
+
+    Decodes each received piece as it arrives, in steps of bounded output
+    (see DECODE_PIECE_SIZE and ZSTD_INPUT_SLICE), so memory use depends
+    neither on object size nor on how far the body expands. Keeps the counters needed to report
+    the compression ratio and the CPU time spent decoding.
+    """
+
+    def __init__(self, content_encoding: Optional[str] = None):
+        self.encoding = (content_encoding or 'identity').strip().lower()
+        if self.encoding in ('gzip', 'x-gzip'):
+            self._decoder = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+        elif self.encoding == 'deflate':
+            self._decoder = zlib.decompressobj()
+        elif self.encoding == 'zstd' and zstandard:
+            self._decoder = zstandard.ZstdDecompressor().decompressobj()
+        elif self.encoding == 'identity':
+            self._decoder = None
+        else:
+            raise Exception(f"Unsupported content encoding: {content_encoding}")
+
+        self.encoded_bytes = 0
+        self.decoded_bytes = 0
+        self.decode_cpu_seconds = 0.0
+
+    def decode(self, data: bytes) -> Iterator[bytes]:
+        """Decoded pieces of data, one per bounded step (identity bodies pass through)"""
+        self.encoded_bytes += len(data)
+        if self._decoder is None:
+            self.decoded_bytes += len(data)
+            if data:
+                yield data
+            return
+        if self.encoding == 'zstd':
+            view = memoryview(data)
+            steps = (self._decoder.decompress(view[i:i + ZSTD_INPUT_SLICE])
+                     for i in range(0, len(view), ZSTD_INPUT_SLICE))
+        else:
+            steps = self._zlib_steps(data)
+        while True:
+            started = time.thread_time()
+            decoded = next(steps, None)
+            self.decode_cpu_seconds += time.thread_time() - started
+            if decoded is None:
+                return
+            if decoded:
+                self.decoded_bytes += len(decoded)
+                yield decoded
+
+    def _zlib_steps(self, data: bytes) -> Iterator[bytes]:
+        while data:
+            yield self._decoder.decompress(data, DECODE_PIECE_SIZE)
+            data = self._decoder.unconsumed_tail
+
+    def flush(self) -> bytes:
+        """End of body: the remaining output; raises if the compressed stream was cut short"""
+        if self._decoder is None:
+            return b''
+        decoded = self._decoder.flush() if self.encoding != 'zstd' else b''
+        if not self._decoder.eof:
+            raise Exception(f"Truncated {self.encoding} body: stream ended after {self.encoded_bytes} bytes")
+        self.decoded_bytes += len(decoded)
+        return decoded
+
+    @property
+    def is_identity(self) -> bool:
+        return self._decoder is None
+
+    @property
+    def compression_ratio(self) -> float:
+        return round(self.decoded_bytes / self.encoded_bytes, 3) if self.encoded_bytes else 1.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'content_encoding': self.encoding,
+            'bytes_transferred': self.encoded_bytes,
+            'compression_ratio': self.compression_ratio,
+            'decode_cpu_seconds': round(self.decode_cpu_seconds, 4)
+        }
+
+
+def combined_stats(decoders) -> Dict[str, Any]:
+    """Transfer statistics across the responses (attempts) of one download"""
+    encoded = sum(decoder.encoded_bytes for decoder in decoders)
+    decoded = sum(decoder.decoded_bytes for decoder in decoders)
+    return {
+        'content_encoding': decoders[0].encoding if decoders else 'identity',
+        'bytes_transferred': encoded,
+        'compression_ratio': round(decoded / encoded, 3) if encoded else 1.0,
+        'decode_cpu_seconds': round(sum(decoder.decode_cpu_seconds for decoder in decoders), 4)
+    }
@@ -0,0 +1,100 @@
+"""
+BRC-26 Chunk Merkle Trees for Consumer
+Per-chunk integrity proofs for verifying UHRP objects while they stream
+"""
+
+import hashlib
+from typing import Dict, List, Any, Optional, Tuple
+
+MERKLE_CHUNK_SIZE = 1024 * 1024
+
+# Domain separation keeps a leaf from ever being confused with an inner node
+_LEAF_PREFIX = b'\x00'
+_NODE_PREFIX = b'\x01'
+
+
+def leaf_hash(data: bytes) -> bytes:
+    return hashlib.sha256(_LEAF_PREFIX + data).digest()
+
+
+def merkle_root(leaves: List[bytes]) -> bytes:
+    """Fold leaf hashes pairwise up to the root; an odd node is promoted unchanged"""
+    if not leaves:
+        return leaf_hash(b'')
+    level = list(leaves)
+    while len(level) > 1:
+        next_level = [
+            hashlib.sha256(_NODE_PREFIX + level[i] + level[i + 1]).digest()
+            for i in range(0, len(level) - 1, 2)
+        ]
+        if len(level) % 2:
+            next_level.append(level[-1])
+        level = next_level
+    return level[0]
+
+
+class ChunkMerkleTree:
+    """
+    Merkle tree over fixed-size chunks of one object
+
+    Only the leaves are kept; a chunk is verified by comparing its leaf hash,
+    and the leaves themselves are authenticated against the root when the
+    tree is loaded.
+    """
+
+    def __init__(self, leaves: List[bytes], chunk_size: int, total_size: int):
+        expected_count = max(1, -(-total_size // chunk_size))
+        if len(leaves) != expected_count:
+            raise ValueError(f"Merkle tree has {len(leaves)} leaves, expected {expected_count}")
+        self.leaves = leaves
+        self.chunk_size = chunk_size
+        self.total_size = total_size
+        self.root = merkle_root(leaves).hex()
+
+    @property
+    def chunk_count(self) -> int:
+        return len(self.leaves)
+
+    def chunk_range(self, index: int) -> Tuple[int, int]:
+        """Half-open byte range [start, end) of a chunk"""
+        start = index * self.chunk_size
+        return start, min(start + self.chunk_size, self.total_size)
+
+    def verify_chunk(self, index: int, data: bytes) -> bool:
+        start, end = self.chunk_range(index)
+        return len(data) == end - start and leaf_hash(data) == self.leaves[index]
+
+    @classmethod
+    def from_dict(cls, tree: Dict[str, Any], expected_root: Optional[str] = None) -> 'ChunkMerkleTree':
+        """Load a tree published by the overlay, rejecting leaves that do not match the root"""
+        loaded = cls(
+            [bytes.fromhex(leaf) for leaf in tree['leaves']],
+            int(tree['chunk_size']),
+            int(tree['total_size'])
+        )
+        for root in (tree.get('root'), expected_root):
+            if root and root != loaded.root:
+                raise ValueError(f"Merkle leaves do not match root {root}")
+        return loaded
+
+    @classmethod
+    def from_file(cls, path: str, chunk_size: int = MERKLE_CHUNK_SIZE) -> 'ChunkMerkleTree':
+        """Derive the tree of a local file"""
+        leaves = []
+        total_size = 0
+        with open(path, 'rb', buffering=0) as f:
+            while True:
+                data = f.read(chunk_size)
+                if not data:
+                    break
+                leaves.append(leaf_hash(data))
+                total_size += len(data)
+        return cls(leaves or [leaf_hash(b'')], chunk_size, total_size)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'chunk_size': self.chunk_size,
+            'total_size': self.total_size,
+            'root': self.root,
+            'leaves': [leaf.hex() for leaf in self.leaves]
+        }
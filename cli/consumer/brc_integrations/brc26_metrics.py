@@ -0,0 +1,285 @@
+"""
+BRC-26 Transfer Instrumentation for Consumer
+Throughput, time-to-first-byte, stall and per-source measurement of content transfers
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+EWMA_HALF_LIFE_SECONDS = 2.0
+RATE_SAMPLE_SECONDS = 0.25
+STALL_SECONDS = 10.0
+PROGRESS_CALLBACK_SECONDS = 0.5
+PROGRESS_LOG_SECONDS = 5.0
+MAX_RECORDS = 100
+
+# on_progress(snapshot) receives TransferMonitor.snapshot() dicts
+ProgressCallback = Callable[[Dict[str, Any]], None]
+
+
+class SourceStats:
+    """Bytes, time to first byte and stalls of one host or storage node"""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.requests = 0
+        self.bytes = 0
+        self.first_seen: Optional[float] = None
+        self.last_seen: Optional[float] = None
+        self.busy_seconds = 0.0
+        self.ttfb_samples: List[float] = []
+        self.stalls = 0
+        self.failures = 0
+
+    @property
+    def active_seconds(self) -> float:
+        current = self.last_seen - self.first_seen if self.first_seen is not None else 0.0
+        return self.busy_seconds + current
+
+    def merge(self, other: 'SourceStats'):
+        self.requests += other.requests
+        self.bytes += other.bytes
+        self.busy_seconds += other.active_seconds
+        self.ttfb_samples = (self.ttfb_samples + other.ttfb_samples)[-MAX_RECORDS:]
+        self.stalls += other.stalls
+        self.failures += other.failures
+
+    def to_dict(self) -> Dict[str, Any]:
+        active = self.active_seconds
+        return {
+            'requests': self.requests,
+            'bytes': self.bytes,
+            'bytes_per_second': round(self.bytes / active, 1) if active > 0 else 0.0,
+            'ttfb_seconds': round(sum(self.ttfb_samples) / len(self.ttfb_samples), 4) if self.ttfb_samples else None,
+            'stalls': self.stalls,
+            'failures': self.failures
+        }
+
+
+class TransferMonitor:
+    """
+    Instrumentation for one transfer
+
+    Every received chunk is passed to record(); the monitor keeps a
+    time-based exponentially weighted moving average of throughput, the time
+    to first byte of each request, per-source counters, and detects stalls
+    (no data for stall_seconds). Snapshots go to on_progress at most every
+    progress_interval seconds and to the log every PROGRESS_LOG_SECONDS, and
+    finish() produces the end-of-transfer record.
+    """
+
+    def __init__(self, uhrp_hash: str, kind: str = 'download', total_size: int = 0,
+                 resumed_bytes: int = 0, on_progress: Optional[ProgressCallback] = None,
+                 registry: Optional['TransferRegistry'] = None,
+                 stall_seconds: float = STALL_SECONDS,
+                 progress_interval: float = PROGRESS_CALLBACK_SECONDS):
+        self.transfer_id = uuid.uuid4().hex[:16]
+        self.uhrp_hash = uhrp_hash
+        self.kind = kind
+        self.total_size = total_size
+        self.resumed_bytes = resumed_bytes
+        self.on_progress = on_progress
+        self.registry = registry
+        self.stall_seconds = stall_seconds
+        self.progress_interval = progress_interval
+
+        now = time.monotonic()
+        self.started_at = datetime.now().isoformat()
+        self._started = now
+        self._first_byte: Optional[float] = None
+        self._last_data = now
+        self._last_callback = self._last_log = now
+        self.bytes = 0
+        self.rate_ewma: Optional[float] = None
+        self._sample_start = now
+        self._sample_bytes = 0
+        self.stalls = 0
+        self.stalled_seconds = 0.0
+        self.stalled = False
+        self.sources: Dict[str, SourceStats] = {}
+        self.end_record: Optional[Dict[str, Any]] = None
+
+    def _source(self, source: Optional[str]) -> SourceStats:
+        source = source or 'unknown'
+        stats = self.sources.get(source)
+        if stats is None:
+            stats = self.sources[source] = SourceStats(source)
+        return stats
+
+    def request_started(self, source: Optional[str] = None) -> float:
+        """Count a request to source; returns its start time for response_started()"""
+        self._source(source).requests += 1
+        return time.monotonic()
+
+    def response_started(self, started: float, source: Optional[str] = None):
+        """Response headers of a request arrived: record its time to first byte"""
+        self._source(source).ttfb_samples.append(time.monotonic() - started)
+
+    def request_failed(self, source: Optional[str] = None):
+        self._source(source).failures += 1
+
+    def record(self, nbytes: int, source: Optional[str] = None):
+        now = time.monotonic()
+        if self._first_byte is None:
+            self._first_byte = now
+
+        gap = now - self._last_data
+        if self.stalled:
+            # The watchdog already counted this stall; close it
+            self.stalled = False
+            self.stalled_seconds += gap
+        elif gap > self.stall_seconds:
+            self.stalls += 1
+            self.stalled_seconds += gap
+            self._source(source).stalls += 1
+        self._last_data = now
+
+        stats = self._source(source)
+        if stats.first_seen is None:
+            stats.first_seen = now
+        stats.last_seen = now
+        stats.bytes += nbytes
+        self.bytes += nbytes
+
+        self._sample_bytes += nbytes
+        elapsed = now - self._sample_start
+        if elapsed >= RATE_SAMPLE_SECONDS:
+            rate = self._sample_bytes / elapsed
+            alpha = 1 - 0.5 ** (elapsed / EWMA_HALF_LIFE_SECONDS)
+            self.rate_ewma = rate if self.rate_ewma is None else self.rate_ewma + alpha * (rate - self.rate_ewma)
+            self._sample_start, self._sample_bytes = now, 0
+
+        self._report(now)
+
+    def _report(self, now: float, force: bool = False):
+        if self.on_progress and (force or now - self._last_callback >= self.progress_interval):
+            self._last_callback = now
+            try:
+                self.on_progress(self.snapshot())
+            except Exception as e:
+                logger.warning(f"Progress callback failed: {e}")
+        if force or now - self._last_log >= PROGRESS_LOG_SECONDS:
+            self._last_log = now
+            snapshot = self.snapshot()
+            percent = f"{snapshot['percent']:.1f}%" if snapshot['percent'] is not None else f"{snapshot['bytes']} bytes"
+            logger.info(f"{self.kind.capitalize()} progress for {self.uhrp_hash[:16]}: {percent} "
+                        f"({(snapshot['bytes_per_second'] or 0) / 1e6:.2f} MB/s)")
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        elapsed = now - self._started
+        done = self.resumed_bytes + self.bytes
+        rate = self.rate_ewma if self.rate_ewma is not None else (self.bytes / elapsed if elapsed > 0 else 0.0)
+        remaining = self.total_size - done if self.total_size else None
+        return {
+            'transfer_id': self.transfer_id,
+            'uhrp_hash': self.uhrp_hash,
+            'kind': self.kind,
+            'bytes': done,
+            'bytes_transferred': self.bytes,
+            'total_size': self.total_size or None,
+            'percent': round(100.0 * done / self.total_size, 2) if self.total_size else None,
+            'elapsed_seconds': round(elapsed, 3),
+            'ttfb_seconds': round(self._first_byte - self._started, 4) if self._first_byte else None,
+            'bytes_per_second': round(rate, 1),
+            'eta_seconds': round(remaining / rate, 1) if remaining is not None and rate > 0 else None,
+            'stalled': self.stalled,
+            'stalls': self.stalls
+        }
+
+    async def watchdog(self):
+        """Flag a stall while no data arrives; run alongside the transfer"""
+        while True:
+            await asyncio.sleep(min(self.stall_seconds / 2, 1.0))
+            if not self.stalled and time.monotonic() - self._last_data > self.stall_seconds:
+                self.stalled = True
+                self.stalls += 1
+                logger.warning(f"{self.kind.capitalize()} of {self.uhrp_hash[:16]} stalled: "
+                               f"no data for {self.stall_seconds:.0f}s")
+                self._report(time.monotonic(), force=True)
+
+    @asynccontextmanager
+    async def running(self):
+        """Run the stall watchdog for the duration and finish the monitor on exit"""
+        watchdog = asyncio.create_task(self.watchdog())
+        status, error = 'completed', None
+        try:
+            yield self
+        except (asyncio.CancelledError, GeneratorExit):
+            status = 'cancelled'
+            raise
+        except BaseException as e:
+            status, error = 'failed', str(e)
+            raise
+        finally:
+            watchdog.cancel()
+            self.finish(status, error)
+
+    def finish(self, status: str = 'completed', error: Optional[str] = None) -> Dict[str, Any]:
+        """Build (once) and publish the end-of-transfer record"""
+        if self.end_record is not None:
+            return self.end_record
+        if self.stalled:
+            self.stalled_seconds += time.monotonic() - self._last_data
+            self.stalled = False
+        elapsed = time.monotonic() - self._started
+        record = dict(
+            self.snapshot(),
+            status=status,
+            error=error,
+            started_at=self.started_at,
+            finished_at=datetime.now().isoformat(),
+            resumed_bytes=self.resumed_bytes,
+            average_bytes_per_second=round(self.bytes / elapsed, 1) if elapsed > 0 else 0.0,
+            stalled_seconds=round(self.stalled_seconds, 3),
+            sources={source: stats.to_dict() for source, stats in self.sources.items()}
+        )
+        self.end_record = record
+        if self.registry:
+            self.registry.add(self)
+        logger.info(f"Transfer record: {json.dumps(record)}")
+        return record
+
+
+class TransferRegistry:
+    """Recent end-of-transfer records and per-source totals across transfers"""
+
+    def __init__(self, max_records: int = MAX_RECORDS):
+        self.records = deque(maxlen=max_records)
+        self._sources: Dict[str, SourceStats] = {}
+        self._lock = threading.Lock()
+
+    def add(self, monitor: TransferMonitor):
+        with self._lock:
+            self.records.append(monitor.end_record)
+            for source, stats in monitor.sources.items():
+                total = self._sources.get(source)
+                if total is None:
+                    total = self._sources[source] = SourceStats(source)
+                total.merge(stats)
+
+    def source_stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {source: stats.to_dict() for source, stats in self._sources.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            records = list(self.records)
+        return {
+            'transfers': len(records),
+            'completed': sum(1 for record in records if record['status'] == 'completed'),
+            'failed': sum(1 for record in records if record['status'] == 'failed'),
+            'bytes': sum(record['bytes_transferred'] for record in records),
+            'stalls': sum(record['stalls'] for record in records),
+            'sources': self.source_stats()
+        }
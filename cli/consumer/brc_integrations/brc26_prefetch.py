@@ -0,0 +1,246 @@
+"""
+BRC-26 Background Prefetch for Consumer
+Warms the local content store from BRC-24 recommendations and BRC-64 access history
+"""
+
+import asyncio
+import logging
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREFETCH_BUDGET = 512 * 1024 * 1024  # 512 MiB per run
+DEFAULT_PREFETCH_CONCURRENCY = 2
+HISTORY_DAYS = 7
+
+# Candidate scoring: a recommendation outranks trending content, and repeat
+# access in the consumer's own history outranks both
+RECOMMENDATION_WEIGHT = 1.0
+TRENDING_WEIGHT = 0.5
+HISTORY_WEIGHT = 0.75
+
+
+def candidate_hash(item: Dict[str, Any]) -> Optional[str]:
+    """UHRP hash of a lookup result, whichever field the overlay used"""
+    for field in ('uhrp_hash', 'content_hash'):
+        if item.get(field):
+            return item[field]
+    uhrp_url = item.get('uhrp_url') or ''
+    if uhrp_url.startswith('uhrp://'):
+        return uhrp_url[len('uhrp://'):].strip('/') or None
+    return None
+
+
+class ContentPrefetcher:
+    """
+    Opt-in prefetcher for the local content store
+
+    Candidates are ranked from recommendations, trending content and repeat
+    access history, then cached in rank order while no foreground download is
+    running. Each run is capped at byte_budget bytes and max_concurrency
+    transfers; foreground demand cancels in-flight prefetches, whose partial
+    downloads are left to resume later. Metrics record how many foreground
+    requests were served by prefetched objects.
+    """
+
+    def __init__(self, content_client, lookup_client=None, history_tracker=None,
+                 cache_dir: str = './cache', access_token: str = None,
+                 byte_budget: int = DEFAULT_PREFETCH_BUDGET,
+                 max_concurrency: int = DEFAULT_PREFETCH_CONCURRENCY):
+        self.content_client = content_client
+        self.lookup_client = lookup_client
+        self.history_tracker = history_tracker
+        self.cache_dir = cache_dir
+        self.access_token = access_token
+        self.byte_budget = byte_budget
+        self.max_concurrency = max_concurrency
+
+        self._foreground = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._prefetched: Dict[str, int] = {}   # hash -> bytes, until first foreground use
+        self._metrics = Counter()
+
+    # ------------------------------------------------------------------
+    # Candidates
+    # ------------------------------------------------------------------
+
+    async def collect_candidates(self, consumer_identity: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """Rank what the consumer is likely to fetch next"""
+        scores: Dict[str, float] = {}
+        sizes: Dict[str, int] = {}
+
+        def add(items, weight):
+            for rank, item in enumerate(items):
+                uhrp_hash = candidate_hash(item)
+                if not uhrp_hash:
+                    continue
+                scores[uhrp_hash] = scores.get(uhrp_hash, 0.0) + weight / (rank + 1)
+                if item.get('size'):
+                    sizes[uhrp_hash] = int(item['size'])
+
+        if self.lookup_client:
+            add(await self.lookup_client.get_content_recommendations(consumer_identity), RECOMMENDATION_WEIGHT)
+            add(await self.lookup_client.get_trending_content(consumer_identity), TRENDING_WEIGHT)
+
+        if self.history_tracker:
+            history = await self.history_tracker.get_usage_history(
+                consumer_identity, datetime.now() - timedelta(days=HISTORY_DAYS),
+                event_types=['content_access']
+            )
+            counts = Counter(event.get('resource_id') for event in history if event.get('resource_id'))
+            add([{'uhrp_hash': uhrp_hash} for uhrp_hash, count in counts.most_common() if count > 1],
+                HISTORY_WEIGHT)
+
+        ranked = sorted(scores, key=scores.get, reverse=True)[:limit]
+        return [{'uhrp_hash': uhrp_hash, 'score': round(scores[uhrp_hash], 4), 'size': sizes.get(uhrp_hash)}
+                for uhrp_hash in ranked]
+
+    # ------------------------------------------------------------------
+    # Prefetch
+    # ------------------------------------------------------------------
+
+    async def prefetch(self, consumer_identity: str,
+                       candidates: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Cache candidates in rank order within the byte budget; returns a run summary"""
+        if candidates is None:
+            candidates = await self.collect_candidates(consumer_identity)
+
+        store = self.content_client._get_store(self.cache_dir)
+        remaining = self.byte_budget
+        slots = asyncio.Semaphore(self.max_concurrency)
+        summary = Counter()
+        pending = []
+
+        for candidate in candidates:
+            uhrp_hash = candidate['uhrp_hash']
+            if uhrp_hash in self._tasks or store.record(uhrp_hash):
+                summary['already_cached'] += 1
+                continue
+
+            size = candidate.get('size')
+            if not size:
+                try:
+                    metadata = await self.content_client.get_content_metadata(uhrp_hash, consumer_identity)
+                    size = int(metadata.get('size') or 0)
+                except Exception as e:
+                    logger.debug(f"Skipping prefetch of {uhrp_hash}: {e}")
+                    summary['skipped'] += 1
+                    continue
+            if not size or size > remaining:
+                summary['over_budget'] += 1
+                continue
+            remaining -= size
+
+            await slots.acquire()
+            await self._idle.wait()
+            task = asyncio.create_task(self._prefetch_one(uhrp_hash, consumer_identity, size))
+            self._tasks[uhrp_hash] = task
+            task.add_done_callback(lambda _, h=uhrp_hash: self._finished(h, slots))
+            pending.append((uhrp_hash, size, task))
+
+        for uhrp_hash, size, task in pending:
+            try:
+                fetched = await task
+                summary['prefetched'] += 1
+                summary['bytes_prefetched'] += fetched
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise
+                summary['cancelled'] += 1
+            except Exception as e:
+                logger.warning(f"Prefetch of {uhrp_hash} failed: {e}")
+                summary['failed'] += 1
+
+        result = dict(summary)
+        result['byte_budget'] = self.byte_budget
+        logger.info(f"Prefetch run: {result}")
+        return result
+
+    def _finished(self, uhrp_hash: str, slots: asyncio.Semaphore):
+        self._tasks.pop(uhrp_hash, None)
+        slots.release()
+
+    async def _prefetch_one(self, uhrp_hash: str, consumer_identity: str, size: int) -> int:
+        started = time.monotonic()
+        result = await self.content_client.cache_content_locally(
+            uhrp_hash, consumer_identity, cache_dir=self.cache_dir, access_token=self.access_token
+        )
+        fetched = 0 if result['cache_hit'] else result['metadata'].get('size', size)
+        if fetched:
+            self._prefetched[uhrp_hash] = fetched
+            self._metrics['prefetched'] += 1
+            self._metrics['bytes_prefetched'] += fetched
+        logger.debug(f"Prefetched {uhrp_hash} ({fetched} bytes, {time.monotonic() - started:.2f}s)")
+        return fetched
+
+    # ------------------------------------------------------------------
+    # Foreground demand
+    # ------------------------------------------------------------------
+
+    @asynccontextmanager
+    async def foreground(self, uhrp_hash: Optional[str] = None):
+        """
+        Mark a foreground transfer: prefetch pauses and in-flight prefetches
+        are cancelled, except one already fetching uhrp_hash
+        """
+        self._foreground += 1
+        self._idle.clear()
+        for prefetching_hash, task in list(self._tasks.items()):
+            if prefetching_hash != uhrp_hash:
+                task.cancel()
+        try:
+            yield
+        finally:
+            self._foreground -= 1
+            if not self._foreground:
+                self._idle.set()
+
+    async def fetch(self, uhrp_hash: str, consumer_identity: str,
+                    access_token: str = None) -> Dict[str, Any]:
+        """Foreground cache fetch that takes priority over prefetch and feeds the hit metrics"""
+        async with self.foreground(uhrp_hash):
+            in_flight = self._tasks.get(uhrp_hash)
+            if in_flight:
+                # Waits without raising: the prefetch may fail or be cancelled by
+                # another foreground fetch, and either way we fetch below. Only
+                # cancellation of this task propagates.
+                await asyncio.wait({in_flight})
+            result = await self.content_client.cache_content_locally(
+                uhrp_hash, consumer_identity, cache_dir=self.cache_dir,
+                access_token=access_token or self.access_token
+            )
+        self.record_access(uhrp_hash, cache_hit=result['cache_hit'])
+        return result
+
+    def record_access(self, uhrp_hash: str, cache_hit: bool):
+        """Count a foreground access against what prefetch brought in"""
+        self._metrics['requests'] += 1
+        prefetched_bytes = self._prefetched.pop(uhrp_hash, None)
+        if cache_hit and prefetched_bytes is not None:
+            self._metrics['prefetch_hits'] += 1
+            self._metrics['bytes_saved'] += prefetched_bytes
+        elif not cache_hit:
+            self._metrics['misses'] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Hit rate of foreground requests and how much prefetched data went unused"""
+        requests = self._metrics['requests']
+        prefetched = self._metrics['prefetched']
+        return {
+            'requests': requests,
+            'prefetch_hits': self._metrics['prefetch_hits'],
+            'misses': self._metrics['misses'],
+            'prefetch_hit_rate': round(self._metrics['prefetch_hits'] / requests, 4) if requests else 0.0,
+            'prefetched': prefetched,
+            'prefetch_precision': round(self._metrics['prefetch_hits'] / prefetched, 4) if prefetched else 0.0,
+            'bytes_prefetched': self._metrics['bytes_prefetched'],
+            'bytes_saved': self._metrics['bytes_saved'],
+            'bytes_unused': sum(self._prefetched.values()),
+            'in_flight': len(self._tasks)
+        }
@@ -0,0 +1,243 @@
+"""
+BRC-26 Sampled Preview for Consumer
+Profiling of a few byte ranges of a dataset to estimate D28 quality metrics before purchase
+"""
+
+import hashlib
+import math
+import random
+from typing import Dict, List, Optional, Any, Tuple
+
+from .brc26_records import RecordParser
+
+DEFAULT_SAMPLE_BYTES = 1024 * 1024
+MAX_SAMPLE_BYTES = 16 * 1024 * 1024
+DEFAULT_SAMPLE_RANGES = 16
+DEFAULT_CONFIDENCE = 0.95
+NULL_TOKENS = frozenset(('', 'null', 'NULL', 'Null', 'None', 'NA', 'N/A', 'NaN', 'nan'))
+
+_Z_SCORES = {0.8: 1.2816, 0.9: 1.6449, 0.95: 1.9600, 0.98: 2.3263, 0.99: 2.5758}
+
+
+def plan_sample_ranges(total_size: int, sample_bytes: int = DEFAULT_SAMPLE_BYTES,
+                       ranges: int = DEFAULT_SAMPLE_RANGES, seed: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    Byte ranges [start, end) to sample: the head of the object (for the
+    header) and one range at a random offset in each of ranges - 1 equal
+    strata of the rest, sample_bytes in total. A small object is one range.
+    """
+    sample_bytes = min(sample_bytes, MAX_SAMPLE_BYTES)
+    if total_size <= sample_bytes or ranges <= 1:
+        return [(0, min(total_size, sample_bytes))]
+
+    range_size = sample_bytes // ranges
+    plan = [(0, range_size)]
+    rng = random.Random(seed)
+    strata = ranges - 1
+    stratum_size = (total_size - range_size) / strata
+    for index in range(strata):
+        low = range_size + int(index * stratum_size)
+        high = range_size + int((index + 1) * stratum_size)
+        start = rng.randint(low, max(low, high - range_size))
+        plan.append((start, min(start + range_size, high)))
+    return plan
+
+
+def head_range_size(sample_bytes: int = DEFAULT_SAMPLE_BYTES, ranges: int = DEFAULT_SAMPLE_RANGES) -> int:
+    """Size of the first planned range, fetchable before the object's size is known"""
+    sample_bytes = min(sample_bytes, MAX_SAMPLE_BYTES)
+    return sample_bytes if ranges <= 1 else sample_bytes // ranges
+
+
+def _wilson(successes: int, n: int, z: float) -> Tuple[float, float]:
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    denominator = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denominator
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+def _ratio_se(numerators: List[float], denominators: List[float]) -> Optional[float]:
+    """Standard error of sum(numerators) / sum(denominators) with ranges as clusters"""
+    m = len(numerators)
+    total = sum(denominators)
+    if m < 2 or total == 0:
+        return None
+    ratio = sum(numerators) / total
+    mean = total / m
+    residuals = sum((n - ratio * d) ** 2 for n, d in zip(numerators, denominators))
+    return math.sqrt(residuals / (m * (m - 1))) / mean
+
+
+class SampleProfiler:
+    """
+    Streaming profile of sampled ranges of one CSV or JSONL dataset
+
+    add_range() trims each range to whole records (a range that does not
+    start at offset 0 begins after its first newline, one that does not reach
+    the end stops at its last), parses them, and keeps per-range counts of
+    bytes, rows, cells and null cells plus a digest of every row. Each range
+    is a cluster for the confidence intervals, which therefore widen when
+    the ranges disagree. A random offset inside a quoted CSV field can
+    misalign a range; rows with the wrong field count are set aside.
+    """
+
+    def __init__(self, record_format: str, total_size: int, header: bool = True,
+                 delimiter: str = ',', confidence: float = DEFAULT_CONFIDENCE):
+        if confidence not in _Z_SCORES:
+            raise ValueError(f"Unsupported confidence level: {confidence}")
+        self.record_format = record_format
+        self.total_size = total_size
+        self.header = header and record_format == 'csv'
+        self.delimiter = delimiter
+        self.confidence = confidence
+
+        self.fieldnames: Optional[List[str]] = None
+        self.header_bytes = 0
+        self.sampled_bytes = 0
+        self.malformed_rows = 0
+        self._ranges: List[Dict[str, int]] = []
+        self._digests = set()
+        self._rows = 0
+
+    def add_range(self, start: int, data: bytes):
+        end = start + len(data)
+        if start > 0:
+            newline = data.find(b'\n')
+            data = data[newline + 1:] if newline >= 0 else b''
+        if end < self.total_size:
+            data = data[:data.rfind(b'\n') + 1]
+        self.sampled_bytes += end - start
+
+        parser = RecordParser(self.record_format, header=False, delimiter=self.delimiter)
+        records = [record for batch in parser.feed(data) + parser.flush() for record in batch]
+        counts = {'bytes': len(data), 'rows': 0, 'cells': 0, 'nulls': 0}
+        if start == 0 and self.header and records:
+            self.fieldnames = records.pop(0)
+            self.header_bytes = data.find(b'\n') + 1 if b'\n' in data else len(data)
+            counts['bytes'] -= self.header_bytes
+
+        for record in records:
+            counts['rows'] += 1
+            if self.record_format == 'csv':
+                if self.fieldnames is not None and len(record) != len(self.fieldnames):
+                    self.malformed_rows += 1
+                    continue
+                counts['nulls'] += sum(1 for value in record if value in NULL_TOKENS)
+                counts['cells'] += len(record)
+                digest_source = '\x1f'.join(record).encode()
+            else:
+                values = list(record.values()) if isinstance(record, dict) else [record]
+                counts['nulls'] += sum(1 for value in values if value is None or value == '')
+                counts['cells'] += len(values)
+                digest_source = repr(sorted(record.items()) if isinstance(record, dict) else record).encode()
+            self._digests.add(hashlib.blake2b(digest_source, digest_size=16).digest())
+            self._rows += 1
+        self._ranges.append(counts)
+
+    @property
+    def coverage(self) -> float:
+        return min(1.0, self.sampled_bytes / self.total_size) if self.total_size else 1.0
+
+    def profile(self) -> Dict[str, Any]:
+        """Estimates of row count, null percentage and uniqueness ratio with confidence intervals"""
+        z = _Z_SCORES[self.confidence]
+        exact = self.coverage >= 1.0
+        rows = [r['rows'] for r in self._ranges]
+        bytes_ = [r['bytes'] for r in self._ranges]
+        cells = sum(r['cells'] for r in self._ranges)
+        nulls = sum(r['nulls'] for r in self._ranges)
+
+        def interval(estimate: float, low: float, high: float, digits: int = 4) -> Dict[str, Any]:
+            if exact:
+                low = high = estimate
+            return {'estimate': round(estimate, digits), 'ci_low': round(low, digits),
+                    'ci_high': round(high, digits), 'confidence': self.confidence, 'exact': exact}
+
+        row_count = None
+        if sum(bytes_):
+            payload = max(0, self.total_size - self.header_bytes)
+            estimate = payload * sum(rows) / sum(bytes_)
+            se = _ratio_se(rows, bytes_)
+            half = z * se * payload if se is not None else estimate
+            row_count = interval(estimate, max(float(self._rows), estimate - half), estimate + half, 0)
+
+        null_percentage = None
+        if cells:
+            p = nulls / cells
+            low, high = _wilson(nulls, cells, z)
+            se = _ratio_se([r['nulls'] for r in self._ranges], [r['cells'] for r in self._ranges])
+            if se is not None:
+                # Cells of one range are correlated: keep the wider of the two intervals
+                low, high = min(low, max(0.0, p - z * se)), max(high, min(1.0, p + z * se))
+            null_percentage = interval(100 * p, 100 * low, 100 * high, 3)
+
+        uniqueness_ratio = None
+        if self._rows:
+            distinct = len(self._digests)
+            low, high = _wilson(distinct, self._rows, z)
+            uniqueness_ratio = dict(
+                interval(distinct / self._rows, low, high),
+                note='upper bound: duplicates outside the sampled ranges are not seen'
+            )
+
+        return {
+            'record_format': self.record_format,
+            'total_size': self.total_size,
+            'sample': {
+                'ranges': len(self._ranges),
+                'bytes': self.sampled_bytes,
+                'coverage': round(self.coverage, 6),
+                'rows': self._rows,
+                'malformed_rows': self.malformed_rows,
+                'columns': len(self.fieldnames) if self.fieldnames else None
+            },
+            'row_count': row_count,
+            'null_percentage': null_percentage,
+            'uniqueness_ratio': uniqueness_ratio
+        }
+
+
+def evaluate_preview(profile: Dict[str, Any], constraints: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Check the D28 quality constraints min_row_count, max_row_count,
+    max_null_value_percentage and min_uniqueness_ratio against a profile.
+    A check passes or fails only when its whole confidence interval is on
+    one side of the limit; otherwise it is inconclusive and only warns.
+    """
+    checks = {}
+    reasons = []
+    warnings = []
+
+    def check(name: str, metric: Optional[Dict[str, Any]], limit, minimum: bool, reason: str):
+        if limit is None:
+            return
+        if metric is None:
+            status = 'inconclusive'
+        elif minimum:
+            status = 'pass' if metric['ci_low'] >= limit else 'fail' if metric['ci_high'] < limit else 'inconclusive'
+        else:
+            status = 'pass' if metric['ci_high'] <= limit else 'fail' if metric['ci_low'] > limit else 'inconclusive'
+        checks[name] = {'status': status, 'limit': limit,
+                        'estimate': metric['estimate'] if metric else None,
+                        'interval': [metric['ci_low'], metric['ci_high']] if metric else None}
+        if status == 'fail':
+            reasons.append(reason)
+        elif status == 'inconclusive':
+            warnings.append(f"PREVIEW.INCONCLUSIVE.{name.upper()}")
+
+    check('min_row_count', profile['row_count'], constraints.get('min_row_count'), True, 'POLICY.QA.ROWS_TOO_FEW')
+    check('max_row_count', profile['row_count'], constraints.get('max_row_count'), False, 'POLICY.QA.ROWS_TOO_MANY')
+    check('max_null_value_percentage', profile['null_percentage'],
+          constraints.get('max_null_value_percentage'), False, 'POLICY.QA.NULL_PERCENT_EXCEEDED')
+    check('min_uniqueness_ratio', profile['uniqueness_ratio'],
+          constraints.get('min_uniqueness_ratio'), True, 'POLICY.QA.UNIQUENESS_TOO_LOW')
+
+    return {
+        'decision': 'block' if reasons else 'warn' if warnings else 'allow',
+        'reasons': reasons,
+        'warnings': warnings,
+        'checks': checks
+    }
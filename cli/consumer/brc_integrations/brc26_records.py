@@ -0,0 +1,203 @@
+"""
+BRC-26 Record Streaming for Consumer
+Incremental parsing of streamed CSV and JSONL content into record batches
+"""
+
+import csv
+import io
+import json
+import time
+from typing import Dict, List, Optional, Any, AsyncGenerator, AsyncIterator
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard decoder gives the same records
+    orjson = None
+
+RECORD_FORMATS = ('csv', 'jsonl')
+DEFAULT_BATCH_ROWS = 1024
+DEFAULT_MAX_RECORD_BYTES = 16 * 1024 * 1024
+
+_CONTENT_TYPE_FORMATS = {
+    'text/csv': 'csv',
+    'application/csv': 'csv',
+    'application/x-ndjson': 'jsonl',
+    'application/ndjson': 'jsonl',
+    'application/jsonl': 'jsonl',
+    'application/x-jsonlines': 'jsonl',
+    'application/json-lines': 'jsonl'
+}
+
+_loads = orjson.loads if orjson else json.loads
+
+
+def record_format_for(content_type: Optional[str]) -> Optional[str]:
+    """Record format of a content type, or None if it is not a record format"""
+    media_type = (content_type or '').split(';')[0].strip().lower()
+    return _CONTENT_TYPE_FORMATS.get(media_type)
+
+
+class RecordParser:
+    """
+    Incremental parser for one record stream
+
+    feed() takes byte chunks as they arrive and returns batches of the
+    records completed so far; the bytes of a record split across chunks are
+    held back until its end arrives. Only complete records are decoded, so
+    memory stays within one chunk plus max_record_bytes of pending data.
+    CSV records end at a newline outside quotes, which is found by quote
+    parity ("" escapes keep the count even), so quoted fields may contain
+    newlines. CSV rows become dicts keyed by the header row unless
+    header=False; JSONL lines go through orjson when it is installed.
+    """
+
+    def __init__(self, record_format: str, batch_rows: int = DEFAULT_BATCH_ROWS,
+                 max_record_bytes: int = DEFAULT_MAX_RECORD_BYTES, header: bool = True,
+                 delimiter: str = ',', encoding: str = 'utf-8'):
+        if record_format not in RECORD_FORMATS:
+            raise Exception(f"Unsupported record format: {record_format}")
+        if batch_rows <= 0:
+            raise ValueError("batch_rows must be positive")
+        self.record_format = record_format
+        self.batch_rows = batch_rows
+        self.max_record_bytes = max_record_bytes
+        self.header = header
+        self.delimiter = delimiter
+        self.encoding = encoding
+
+        self.fieldnames: Optional[List[str]] = None
+        self._pending = b''
+        self._pending_quotes = 0
+        self._started = False
+        self.bytes = 0
+        self.records = 0
+        self.batches = 0
+        self.parse_cpu_seconds = 0.0
+
+    def feed(self, data: bytes) -> List[List[Any]]:
+        """Add a chunk; returns the batches of records it completed"""
+        complete = self.split(data)
+        return self._parse(complete) if complete else []
+
+    def flush(self) -> List[List[Any]]:
+        """End of stream: parse a final record without a trailing newline"""
+        complete = self.split_end()
+        return self._parse(complete) if complete.strip() else []
+
+    def split(self, data: bytes) -> bytes:
+        """Add a chunk; returns the raw bytes of the records it completed, for other decoders"""
+        self.bytes += len(data)
+        if not self._started:
+            if len(self._pending) + len(data) < 3:
+                self._pending += data
+                return b''
+            data, self._pending = self._pending + data, b''
+            if data.startswith(b'\xef\xbb\xbf'):
+                data = data[3:]  # UTF-8 byte order mark
+            self._started = True
+
+        cut = self._record_end(data)
+        if cut < 0:
+            self._pending += data
+            if self.record_format == 'csv':
+                self._pending_quotes += data.count(b'"')
+            if len(self._pending) > self.max_record_bytes:
+                raise Exception(f"Record exceeds {self.max_record_bytes} bytes without an end")
+            return b''
+        complete, self._pending = self._pending + data[:cut], data[cut:]
+        if self.record_format == 'csv':
+            self._pending_quotes = self._pending.count(b'"')
+        return complete
+
+    def split_end(self) -> bytes:
+        """End of stream: the raw bytes of a final record without a trailing newline"""
+        complete, self._pending = self._pending, b''
+        if not self._started and complete.startswith(b'\xef\xbb\xbf'):
+            complete = complete[3:]
+        self._started = True
+        if self.record_format == 'csv' and complete.count(b'"') % 2:
+            raise Exception("Stream ended inside a quoted CSV field")
+        return complete
+
+    def _record_end(self, data: bytes) -> int:
+        """Offset just past the last complete record in pending + data, relative to data; -1 if none"""
+        newline = data.rfind(b'\n')
+        if newline < 0 or self.record_format == 'jsonl':
+            return newline + 1 if newline >= 0 else -1
+
+        # Quotes before each candidate newline, walking back from the last one
+        quotes = self._pending_quotes + data.count(b'"', 0, newline)
+        while quotes % 2:
+            previous = data.rfind(b'\n', 0, newline)
+            if previous < 0:
+                return -1
+            quotes -= data.count(b'"', previous, newline)
+            newline = previous
+        return newline + 1
+
+    def _parse(self, complete: bytes) -> List[List[Any]]:
+        started = time.thread_time()
+        if self.record_format == 'jsonl':
+            records = self._parse_jsonl(complete)
+        else:
+            records = self._parse_csv(complete)
+        self.parse_cpu_seconds += time.thread_time() - started
+
+        self.records += len(records)
+        batches = [records[i:i + self.batch_rows] for i in range(0, len(records), self.batch_rows)]
+        self.batches += len(batches)
+        return batches
+
+    def _parse_jsonl(self, complete: bytes) -> List[Any]:
+        lines = [line for line in complete.split(b'\n') if line.strip()]
+        try:
+            return [_loads(line) for line in lines]
+        except ValueError:
+            pass
+        records = []
+        for number, line in enumerate(lines, 1):
+            try:
+                records.append(_loads(line))
+            except ValueError as e:
+                raise Exception(f"Invalid JSONL record {self.records + number}: {e}")
+        return records
+
+    def _parse_csv(self, complete: bytes) -> List[Any]:
+        # A newline byte never falls inside a multi-byte UTF-8 character
+        rows = csv.reader(io.StringIO(complete.decode(self.encoding), newline=''), delimiter=self.delimiter)
+        if not self.header:
+            return [row for row in rows if row]
+        if self.fieldnames is None:
+            for row in rows:
+                if row:
+                    self.fieldnames = row
+                    break
+        fieldnames = self.fieldnames
+        records = [row for row in rows if row]
+        if any(len(row) != len(fieldnames) for row in records):
+            # Zipping a ragged row to the header would silently drop or misplace fields
+            for number, row in enumerate(records, 1):
+                if len(row) != len(fieldnames):
+                    raise Exception(f"CSV record {self.records + number} has {len(row)} fields, "
+                                    f"expected {len(fieldnames)}")
+        return [dict(zip(fieldnames, row)) for row in records]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'record_format': self.record_format,
+            'json_decoder': 'orjson' if orjson else 'json',
+            'bytes': self.bytes,
+            'records': self.records,
+            'batches': self.batches,
+            'pending_bytes': len(self._pending),
+            'parse_cpu_seconds': round(self.parse_cpu_seconds, 4)
+        }
+
+
+async def iter_record_batches(chunks: AsyncIterator[bytes], parser: RecordParser) -> AsyncGenerator[List[Any], None]:
+    """Batches of parsed records from an async iterator of byte chunks"""
+    async for chunk in chunks:
+        for batch in parser.feed(chunk):
+            yield batch
+    for batch in parser.flush():
+        yield batch
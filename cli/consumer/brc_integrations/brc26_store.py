@@ -0,0 +1,720 @@
+"""
+BRC-26 Local Content Store for Consumer
+Size-bounded, content-addressed cache of UHRP objects with LRU/LFU eviction
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Any, Tuple
+
+from .brc26_transfer import hash_file_range, PathLock
+from .brc26_chunks import ChunkStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024 * 1024  # 10 GiB
+DEFAULT_MEMORY_BYTES = 32 * 1024 * 1024  # 32 MiB
+DEFAULT_MEMORY_OBJECT_MAX = 64 * 1024  # manifests, schemas and metadata blobs
+EVICTION_POLICIES = ('lru', 'lfu')
+INDEX_FILENAME = 'index.sqlite3'
+EVICTION_BATCH = 256
+DERIVED_KINDS = ('arrow',)
+
+_SAFE_HASH = re.compile(r'^[A-Za-z0-9_-]{4,128}$')
+
+_RECORD_FIELDS = ('uhrp_hash', 'size', 'mtime_ns', 'sha256', 'verified', 'content_type',
+                  'cached_at', 'last_access', 'access_count', 'pinned', 'source_version')
+
+# Running totals are kept by triggers, in the same transaction as the row
+# change, so size accounting never needs a table scan
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    uhrp_hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT,
+    verified INTEGER NOT NULL DEFAULT 0,
+    content_type TEXT,
+    cached_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    access_count INTEGER NOT NULL DEFAULT 0,
+    pinned INTEGER NOT NULL DEFAULT 0,
+    source_version TEXT
+);
+CREATE INDEX IF NOT EXISTS objects_lru ON objects (pinned, last_access);
+CREATE INDEX IF NOT EXISTS objects_lfu ON objects (pinned, access_count, last_access);
+CREATE INDEX IF NOT EXISTS objects_last_access ON objects (last_access);
+CREATE INDEX IF NOT EXISTS objects_access_count ON objects (access_count);
+CREATE INDEX IF NOT EXISTS objects_cached_at ON objects (cached_at);
+CREATE INDEX IF NOT EXISTS objects_source_version ON objects (source_version);
+CREATE TABLE IF NOT EXISTS store_state (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO store_state (key, value) VALUES ('total_bytes', 0), ('object_count', 0);
+CREATE TRIGGER IF NOT EXISTS objects_insert AFTER INSERT ON objects BEGIN
+    UPDATE store_state SET value = value + NEW.size WHERE key = 'total_bytes';
+    UPDATE store_state SET value = value + 1 WHERE key = 'object_count';
+END;
+CREATE TRIGGER IF NOT EXISTS objects_delete AFTER DELETE ON objects BEGIN
+    UPDATE store_state SET value = value - OLD.size WHERE key = 'total_bytes';
+    UPDATE store_state SET value = value - 1 WHERE key = 'object_count';
+END;
+CREATE TRIGGER IF NOT EXISTS objects_resize AFTER UPDATE OF size ON objects BEGIN
+    UPDATE store_state SET value = value - OLD.size + NEW.size WHERE key = 'total_bytes';
+END;
+"""
+
+_LIST_ORDERS = {
+    'last_access': 'last_access DESC',
+    'access_count': 'access_count DESC',
+    'cached_at': 'cached_at DESC',
+    'uhrp_hash': 'uhrp_hash'
+}
+
+_ACCESS_HINTS = {
+    'normal': 'MADV_NORMAL',
+    'sequential': 'MADV_SEQUENTIAL',
+    'random': 'MADV_RANDOM',
+    'willneed': 'MADV_WILLNEED',
+    'dontneed': 'MADV_DONTNEED'
+}
+
+
+class MappedObject:
+    """
+    Read-only memory map of a cached object
+
+    Slices are memoryviews over the mapping, so reading a byte range copies
+    nothing; the pages come from the shared page cache, so several processes
+    mapping the same object hold one copy between them. Views handed out are
+    released when the object is closed and must not be used afterwards;
+    slices the caller took of them keep the mapping alive until dropped.
+    """
+
+    def __init__(self, path: str, record: Optional[Dict[str, Any]] = None, access: str = 'normal'):
+        self.path = path
+        self.record = record
+        self._views: List[memoryview] = []
+        with open(path, 'rb') as f:
+            self.size = os.fstat(f.fileno()).st_size
+            # mmap cannot map an empty file
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        self._buffer = memoryview(self._map) if self._map else memoryview(b'')
+        if access != 'normal':
+            self.advise(access)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def view(self, start: int = 0, end: Optional[int] = None) -> memoryview:
+        """Zero-copy view of bytes [start, end)"""
+        end = self.size if end is None else min(end, self.size)
+        if start < 0 or start > end:
+            raise ValueError(f"Invalid byte range {start}-{end} for object of {self.size} bytes")
+        view = self._buffer[start:end]
+        self._views.append(view)
+        return view
+
+    def advise(self, access: str, start: int = 0, end: Optional[int] = None):
+        """
+        Pass an access pattern hint (normal, sequential, random, willneed,
+        dontneed) for a byte range to the kernel; a no-op where unsupported
+        """
+        if access not in _ACCESS_HINTS:
+            raise ValueError(f"Unsupported access hint: {access}")
+        if not self._map or not hasattr(self._map, 'madvise'):
+            return
+        flag = getattr(mmap, _ACCESS_HINTS[access], None)
+        if flag is None:
+            return
+        # madvise needs a page-aligned start
+        aligned = start - start % mmap.PAGESIZE
+        end = self.size if end is None else min(end, self.size)
+        if end > aligned:
+            self._map.madvise(flag, aligned, end - aligned)
+
+    def readahead(self, start: int = 0, end: Optional[int] = None):
+        """Start reading a byte range into the page cache ahead of a scan"""
+        self.advise('willneed', start, end)
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        self._views.clear()
+        self._buffer.release()
+        if self._map:
+            try:
+                self._map.close()
+            except BufferError:
+                # A slice of a view still exports the mapping; it is unmapped once that goes
+                pass
+            self._map = None
+
+
+class MemoryTier:
+    """
+    Byte-bounded LRU of small verified objects held in process memory
+
+    Only objects of at most max_object_bytes are admitted, so a few large
+    reads cannot flush the many small ones. Hits are counted per object and
+    handed back to the disk index by drain_touches(), keeping its access
+    statistics right without a write per read.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MEMORY_BYTES,
+                 max_object_bytes: int = DEFAULT_MEMORY_OBJECT_MAX):
+        self.max_bytes = max_bytes
+        self.max_object_bytes = min(max_object_bytes, max_bytes)
+        self.bytes = 0
+        self._entries: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._touches: Dict[str, Tuple[int, float]] = {}
+        self._counters = Counter()
+        self._lock = threading.Lock()
+
+    def admits(self, size: int) -> bool:
+        return size <= self.max_object_bytes
+
+    def get(self, uhrp_hash: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(uhrp_hash)
+            if data is None:
+                self._counters['misses'] += 1
+                return None
+            self._entries.move_to_end(uhrp_hash)
+            self._counters['hits'] += 1
+            count, _ = self._touches.get(uhrp_hash, (0, 0.0))
+            self._touches[uhrp_hash] = (count + 1, time.time())
+            return data
+
+    def put(self, uhrp_hash: str, data: bytes) -> bool:
+        if not self.admits(len(data)):
+            return False
+        with self._lock:
+            previous = self._entries.pop(uhrp_hash, None)
+            if previous is not None:
+                self.bytes -= len(previous)
+            self._entries[uhrp_hash] = data
+            self.bytes += len(data)
+            self._counters['admitted'] += 1
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= len(evicted)
+                self._counters['evicted'] += 1
+            return True
+
+    def discard(self, uhrp_hash: str):
+        with self._lock:
+            data = self._entries.pop(uhrp_hash, None)
+            if data is not None:
+                self.bytes -= len(data)
+            self._touches.pop(uhrp_hash, None)
+
+    def drain_touches(self) -> Dict[str, Tuple[int, float]]:
+        """Access counts and times of hits since the last drain"""
+        with self._lock:
+            touches, self._touches = self._touches, {}
+            return touches
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'hits': self._counters['hits'],
+                'misses': self._counters['misses'],
+                'admitted': self._counters['admitted'],
+                'evicted': self._counters['evicted'],
+                'objects': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'max_object_bytes': self.max_object_bytes
+            }
+
+
+class ContentStore:
+    """
+    Content-addressed store for UHRP objects
+
+    Objects live at <root>/objects/ab/cd/<hash> and are indexed in a single
+    SQLite database (WAL mode) holding the verified SHA-256 together with the
+    size and mtime the file had when it was verified. A hit whose file still
+    matches that stat is served without rehashing. The total size is kept
+    under max_bytes by evicting the least recently (lru) or least frequently
+    (lfu) used unpinned objects, walking the index rather than every record.
+    read() serves small objects from an in-memory tier of memory_bytes above
+    the disk; memory_bytes=0 disables it. Files derived from an object (such
+    as columnar conversions) live under <root>/derived and go whenever the
+    object is replaced, removed or evicted; they are not counted in max_bytes.
+    The deduplicating chunk store at <root>/chunks is: chunk recipes are
+    evicted by last use alongside the objects.
+    """
+
+    def __init__(self, root: str = './cache', max_bytes: int = DEFAULT_MAX_BYTES,
+                 eviction: str = 'lru', memory_bytes: int = DEFAULT_MEMORY_BYTES,
+                 memory_object_max: int = DEFAULT_MEMORY_OBJECT_MAX):
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError(f"Unsupported eviction policy: {eviction}")
+
+        self.root = root
+        self.max_bytes = max_bytes
+        self.eviction = eviction
+        self.objects_dir = os.path.join(root, 'objects')
+        self.tmp_dir = os.path.join(root, 'tmp')
+        self.locks_dir = os.path.join(root, 'locks')
+        self.derived_dir = os.path.join(root, 'derived')
+        self.index_path = os.path.join(root, INDEX_FILENAME)
+        self.chunks = ChunkStore(os.path.join(root, 'chunks'))
+        self._lock = threading.RLock()
+        self.memory = MemoryTier(memory_bytes, memory_object_max) if memory_bytes > 0 else None
+        self._disk_counters = Counter()
+
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        os.makedirs(self.derived_dir, exist_ok=True)
+        self._db = self._open_index()
+        self._migrate_sidecars()
+        self._adopt_legacy_files()
+
+    def close(self):
+        with self._lock:
+            self._flush_touches()
+            self._db.close()
+        self.chunks.close()
+
+    # ------------------------------------------------------------------
+    # Paths
+    # ------------------------------------------------------------------
+
+    def object_path(self, uhrp_hash: str) -> str:
+        if not _SAFE_HASH.match(uhrp_hash):
+            raise ValueError(f"Invalid UHRP hash for local store: {uhrp_hash!r}")
+        return os.path.join(self.objects_dir, uhrp_hash[:2], uhrp_hash[2:4], uhrp_hash)
+
+    def staging_path(self, uhrp_hash: str) -> str:
+        """Download location for an object that is not yet committed"""
+        self.object_path(uhrp_hash)  # validate
+        return os.path.join(self.tmp_dir, f"{uhrp_hash}.download")
+
+    def derived_path(self, uhrp_hash: str, kind: str) -> str:
+        """Location of the file of the given kind derived from an object"""
+        self.object_path(uhrp_hash)  # validate
+        if kind not in DERIVED_KINDS:
+            raise ValueError(f"Unsupported derived file kind: {kind}")
+        return os.path.join(self.derived_dir, f"{uhrp_hash}.{kind}")
+
+    def object_lock(self, uhrp_hash: str) -> PathLock:
+        """
+        Cross-process lock on downloading an object; whoever holds it owns
+        the object's staging files
+        """
+        self.object_path(uhrp_hash)  # validate
+        return PathLock(os.path.join(self.locks_dir, f"{uhrp_hash}.lock"))
+
+    # ------------------------------------------------------------------
+    # Lookup and insertion
+    # ------------------------------------------------------------------
+
+    def lookup(self, uhrp_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the record of a verified cached object, or None on a miss.
+        Objects adopted without a verified hash are hashed once here.
+        """
+        with self._lock:
+            record = self._get(uhrp_hash)
+            if not record:
+                self._disk_counters['misses'] += 1
+                return None
+
+            path = self.object_path(uhrp_hash)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                self._forget(uhrp_hash)
+                self._disk_counters['misses'] += 1
+                return None
+
+            if not record['verified'] or stat.st_size != record['size'] \
+                    or stat.st_mtime_ns != record['mtime_ns']:
+                # Unverified, or modified since verification: hash it once
+                calculated_hash = hash_file_range(path).hexdigest()
+                expected_hash = record['sha256'] or uhrp_hash
+                if calculated_hash != expected_hash:
+                    logger.warning(f"Cached object {uhrp_hash} failed verification, evicting")
+                    self.remove(uhrp_hash)
+                    self._disk_counters['misses'] += 1
+                    return None
+                record.update(sha256=calculated_hash, verified=True,
+                              size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+
+            record['last_access'] = time.time()
+            record['access_count'] += 1
+            with self._db:
+                self._db.execute(
+                    'UPDATE objects SET size = ?, mtime_ns = ?, sha256 = ?, verified = ?, '
+                    'last_access = ?, access_count = ? WHERE uhrp_hash = ?',
+                    (record['size'], record['mtime_ns'], record['sha256'], record['verified'],
+                     record['last_access'], record['access_count'], uhrp_hash)
+                )
+            self._disk_counters['hits'] += 1
+            return dict(record, path=path)
+
+    def read(self, uhrp_hash: str) -> Optional[bytes]:
+        """
+        Contents of a verified cached object, or None on a miss. Small
+        objects are answered from memory after their first read, without
+        touching the disk or the index.
+        """
+        data = self.read_memory(uhrp_hash)
+        return data if data is not None else self.read_disk(uhrp_hash)
+
+    def read_memory(self, uhrp_hash: str) -> Optional[bytes]:
+        """Memory-tier half of read(); never blocks on I/O"""
+        return self.memory.get(uhrp_hash) if self.memory else None
+
+    def read_disk(self, uhrp_hash: str) -> Optional[bytes]:
+        """Disk half of read(), admitting small objects to the memory tier"""
+        record = self.lookup(uhrp_hash)
+        if not record:
+            return None
+        with open(record['path'], 'rb') as f:
+            data = f.read()
+        if self.memory and self.memory.admits(len(data)):
+            # Verified by stat in lookup; hash what was read before keeping it
+            if hashlib.sha256(data).hexdigest() != (record['sha256'] or uhrp_hash):
+                logger.warning(f"Cached object {uhrp_hash} changed while being read, evicting")
+                self.remove(uhrp_hash)
+                return None
+            self.memory.put(uhrp_hash, data)
+        return data
+
+    def record(self, uhrp_hash: str) -> Optional[Dict[str, Any]]:
+        """Return the stored record without touching access statistics"""
+        with self._lock:
+            return self._get(uhrp_hash)
+
+    def commit(self, uhrp_hash: str, staged_path: str, sha256: str,
+               content_type: Optional[str] = None, verified: bool = True,
+               source_version: Optional[str] = None, pinned: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Move a fully downloaded file into the store and return its record.
+        pinned=None keeps the pin of a previous copy of the object.
+        """
+        with self._lock:
+            path = self.object_path(uhrp_hash)
+            size = os.path.getsize(staged_path)
+            self.evict(required_bytes=size, protect=uhrp_hash)
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(staged_path, path)
+            stat = os.stat(path)
+            if self.memory:
+                self.memory.discard(uhrp_hash)
+            self._discard_derived(uhrp_hash)
+
+            now = time.time()
+            previous = self._get(uhrp_hash)
+            record = {
+                'uhrp_hash': uhrp_hash,
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+                'sha256': sha256,
+                'verified': verified,
+                'content_type': content_type,
+                'cached_at': now,
+                'last_access': now,
+                'access_count': 0,
+                'pinned': pinned if pinned is not None else bool(previous and previous['pinned']),
+                'source_version': source_version
+            }
+            with self._db:
+                self._put(record)
+            return dict(record, path=path)
+
+    def commit_derived(self, uhrp_hash: str, kind: str, staged_path: str) -> Optional[str]:
+        """
+        Move a file derived from a cached object next to it and return its
+        path; None (and the staged file is dropped) if the object is gone
+        """
+        with self._lock:
+            if not self._get(uhrp_hash):
+                os.remove(staged_path)
+                return None
+            path = self.derived_path(uhrp_hash, kind)
+            os.replace(staged_path, path)
+            return path
+
+    def lookup_derived(self, uhrp_hash: str, kind: str) -> Optional[str]:
+        """Path of a derived file whose object is still cached and verified, or None"""
+        path = self.derived_path(uhrp_hash, kind)
+        if not os.path.exists(path):
+            return None
+        if not self.lookup(uhrp_hash):
+            self._discard_derived(uhrp_hash)
+            return None
+        return path
+
+    def open_mapped(self, uhrp_hash: str, access: str = 'normal') -> Optional[MappedObject]:
+        """
+        Memory-map a verified cached object for zero-copy reads, or None on
+        a miss. access is the initial kernel hint, e.g. 'sequential' for scans.
+        """
+        record = self.lookup(uhrp_hash)
+        if not record:
+            return None
+        return MappedObject(record['path'], record, access=access)
+
+    def remove(self, uhrp_hash: str) -> bool:
+        with self._lock:
+            path = self.object_path(uhrp_hash)
+            existed = os.path.exists(path)
+            if existed:
+                os.remove(path)
+            if self.memory:
+                self.memory.discard(uhrp_hash)
+            self._discard_derived(uhrp_hash)
+            self._forget(uhrp_hash)
+            return existed
+
+    def set_pinned(self, uhrp_hash: str, pinned: bool = True) -> bool:
+        """Exempt an object from eviction (or release it); False if not cached"""
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                'UPDATE objects SET pinned = ? WHERE uhrp_hash = ?', (int(pinned), uhrp_hash)
+            )
+            return cursor.rowcount > 0
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def list_objects(self, order_by: str = 'last_access', limit: int = 100, offset: int = 0,
+                     pinned: Optional[bool] = None,
+                     source_version: Optional[str] = None) -> List[Dict[str, Any]]:
+        """One page of cached objects, most recent first, served from the index"""
+        if order_by not in _LIST_ORDERS:
+            raise ValueError(f"Unsupported order: {order_by}")
+
+        clauses, params = [], []
+        if pinned is not None:
+            clauses.append('pinned = ?')
+            params.append(int(pinned))
+        if source_version is not None:
+            clauses.append('source_version = ?')
+            params.append(source_version)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+
+        with self._lock:
+            self._flush_touches()
+            rows = self._db.execute(
+                f"SELECT {', '.join(_RECORD_FIELDS)} FROM objects {where} "
+                f"ORDER BY {_LIST_ORDERS[order_by]} LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+        return [self._to_record(row) for row in rows]
+
+    # ------------------------------------------------------------------
+    # Eviction
+    # ------------------------------------------------------------------
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._state('total_bytes')
+
+    def evict(self, required_bytes: int = 0, protect: Optional[str] = None) -> List[str]:
+        """Evict unpinned objects until required_bytes more fit within max_bytes"""
+        if self.eviction == 'lfu':
+            order = 'access_count, last_access'
+        else:
+            order = 'last_access'
+
+        with self._lock:
+            budget = self.max_bytes - required_bytes
+            total = self.total_bytes()
+            chunk_bytes = self.chunks.stored_bytes()
+            if total + chunk_bytes <= budget:
+                return []
+            # Reads served from memory count towards recency and frequency
+            self._flush_touches()
+
+            if chunk_bytes:
+                # Chunk recipes idle for longer than every evictable object go first
+                oldest = self._db.execute(
+                    'SELECT MIN(last_access) FROM objects WHERE pinned = 0 AND uhrp_hash != ?', (protect or '',)
+                ).fetchone()[0]
+                self.chunks.evict(max(0, budget - total), protect, used_before=oldest)
+                chunk_bytes = self.chunks.stored_bytes()
+
+            evicted = []
+            # One transaction: files are unlinked before their rows go, so a
+            # crash part way leaves rows whose files are missing, which
+            # lookup already treats as a miss
+            with self._db:
+                while total + chunk_bytes > budget:
+                    rows = self._db.execute(
+                        f"SELECT uhrp_hash, size FROM objects WHERE pinned = 0 AND uhrp_hash != ? "
+                        f"ORDER BY {order} LIMIT ?",
+                        (protect or '', EVICTION_BATCH)
+                    ).fetchall()
+                    if not rows:
+                        break
+                    for uhrp_hash, size in rows:
+                        if total + chunk_bytes <= budget:
+                            break
+                        path = self.object_path(uhrp_hash)
+                        if os.path.exists(path):
+                            os.remove(path)
+                        if self.memory:
+                            self.memory.discard(uhrp_hash)
+                        self._discard_derived(uhrp_hash)
+                        self._db.execute('DELETE FROM objects WHERE uhrp_hash = ?', (uhrp_hash,))
+                        total -= size
+                        evicted.append(uhrp_hash)
+
+            if evicted:
+                logger.info(f"Evicted {len(evicted)} cached objects ({self.eviction})")
+            if total + chunk_bytes > budget and chunk_bytes:
+                self.chunks.evict(max(0, budget - total), protect)
+                chunk_bytes = self.chunks.stored_bytes()
+            if total + chunk_bytes > budget:
+                logger.warning(f"Cache over budget by {total + chunk_bytes - budget} bytes after eviction "
+                               f"(pinned objects)")
+            return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pinned_bytes = self._db.execute(
+                'SELECT COALESCE(SUM(size), 0) FROM objects WHERE pinned = 1'
+            ).fetchone()[0]
+            return {
+                'root': self.root,
+                'objects': self._state('object_count'),
+                'total_bytes': self.total_bytes(),
+                'chunk_bytes': self.chunks.stored_bytes(),
+                'pinned_bytes': pinned_bytes,
+                'max_bytes': self.max_bytes,
+                'eviction': self.eviction,
+                'tiers': {
+                    'memory': self.memory.stats() if self.memory else None,
+                    'disk': {'hits': self._disk_counters['hits'], 'misses': self._disk_counters['misses']}
+                }
+            }
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+
+    def _open_index(self) -> sqlite3.Connection:
+        # Shared across executor threads; self._lock serialises access
+        db = sqlite3.connect(self.index_path, check_same_thread=False)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA synchronous=NORMAL')
+        # INSERT OR REPLACE must fire the delete trigger to keep totals right
+        db.execute('PRAGMA recursive_triggers=ON')
+        db.executescript(_SCHEMA)
+        return db
+
+    def _state(self, key: str) -> int:
+        row = self._db.execute('SELECT value FROM store_state WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else 0
+
+    @staticmethod
+    def _to_record(row) -> Dict[str, Any]:
+        record = dict(zip(_RECORD_FIELDS, row))
+        record['verified'] = bool(record['verified'])
+        record['pinned'] = bool(record['pinned'])
+        return record
+
+    def _get(self, uhrp_hash: str) -> Optional[Dict[str, Any]]:
+        row = self._db.execute(
+            f"SELECT {', '.join(_RECORD_FIELDS)} FROM objects WHERE uhrp_hash = ?", (uhrp_hash,)
+        ).fetchone()
+        return self._to_record(row) if row else None
+
+    def _put(self, record: Dict[str, Any]):
+        values = [record.get(field) for field in _RECORD_FIELDS]
+        values[_RECORD_FIELDS.index('verified')] = int(bool(record.get('verified')))
+        values[_RECORD_FIELDS.index('pinned')] = int(bool(record.get('pinned')))
+        values[_RECORD_FIELDS.index('access_count')] = record.get('access_count') or 0
+        self._db.execute(
+            f"INSERT OR REPLACE INTO objects ({', '.join(_RECORD_FIELDS)}) "
+            f"VALUES ({', '.join('?' * len(_RECORD_FIELDS))})",
+            values
+        )
+
+    def _flush_touches(self):
+        """Write the access statistics of memory-tier hits to the index"""
+        touches = self.memory.drain_touches() if self.memory else {}
+        if touches:
+            with self._db:
+                self._db.executemany(
+                    'UPDATE objects SET access_count = access_count + ?, '
+                    'last_access = MAX(last_access, ?) WHERE uhrp_hash = ?',
+                    [(count, last_access, uhrp_hash) for uhrp_hash, (count, last_access) in touches.items()]
+                )
+
+    def _discard_derived(self, uhrp_hash: str):
+        for kind in DERIVED_KINDS:
+            try:
+                os.remove(self.derived_path(uhrp_hash, kind))
+            except FileNotFoundError:
+                pass
+
+    def _forget(self, uhrp_hash: str):
+        with self._db:
+            self._db.execute('DELETE FROM objects WHERE uhrp_hash = ?', (uhrp_hash,))
+
+    def _migrate_sidecars(self):
+        """Import per-object .meta records from the previous store layout, once"""
+        if self._state('sidecars_migrated'):
+            return
+        migrated = 0
+        with self._db:
+            for dirpath, _, filenames in os.walk(self.objects_dir):
+                for filename in filenames:
+                    if not filename.endswith('.meta'):
+                        continue
+                    meta_path = os.path.join(dirpath, filename)
+                    try:
+                        with open(meta_path, 'r') as f:
+                            record = json.load(f)
+                        record.setdefault('access_count', 0)
+                        self._put(record)
+                        migrated += 1
+                    except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+                        logger.debug(f"Skipping unreadable cache record {filename}: {e}")
+                        continue
+                    os.remove(meta_path)
+            self._db.execute("INSERT OR REPLACE INTO store_state (key, value) VALUES ('sidecars_migrated', 1)")
+        if migrated:
+            logger.info(f"Migrated {migrated} cache records into {self.index_path}")
+
+    def _adopt_legacy_files(self):
+        """Move flat <hash>.cache files from the old cache layout into the store"""
+        for filename in os.listdir(self.root):
+            if not filename.endswith('.cache'):
+                continue
+            uhrp_hash = filename[:-len('.cache')]
+            legacy_path = os.path.join(self.root, filename)
+            try:
+                content_type = None
+                if os.path.exists(legacy_path + '.meta'):
+                    with open(legacy_path + '.meta', 'r') as f:
+                        content_type = json.load(f).get('content_type')
+                    os.remove(legacy_path + '.meta')
+                # Adopted unverified: the first hit hashes it once
+                self.commit(uhrp_hash, legacy_path, sha256=None, content_type=content_type, verified=False)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not adopt legacy cache file {filename}: {e}")
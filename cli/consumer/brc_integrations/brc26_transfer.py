@@ -0,0 +1,811 @@
+"""
+BRC-26 Transfer Engine for Consumer
+Segmented HTTP-range downloads with positional writes, worker auto-tuning,
+on-disk checkpoints for resuming interrupted transfers and cross-process locks
+"""
+
+import asyncio
+import errno
+import hashlib
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Any, AsyncIterator, Callable
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to O_EXCL lock files
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SEGMENT_SIZE = 8 * 1024 * 1024
+DEFAULT_WORKERS = 4
+MAX_WORKERS = 16
+HASH_READ_SIZE = 4 * 1024 * 1024
+WRITE_BUFFER_SIZE = 1024 * 1024
+MIN_READ_SIZE = 64 * 1024
+MAX_READ_SIZE = 4 * 1024 * 1024
+COALESCE_SIZE = 4 * 1024 * 1024
+CHECKPOINT_BLOCK_SIZE = 16 * 1024 * 1024
+SENDFILE_CHUNK_SIZE = 8 * 1024 * 1024
+SEGMENT_RETRIES = 3
+LOCK_POLL_SECONDS = 0.05
+LOCK_MAX_POLL_SECONDS = 1.0
+LOCK_REFRESH_SECONDS = 10.0
+LOCK_STALE_SECONDS = 60.0
+
+# fetch_range(start, end) yields the bytes of the half-open range [start, end)
+RangeFetcher = Callable[[int, int], AsyncIterator[bytes]]
+
+
+class RangeNotSupportedError(Exception):
+    """Raised when a server answers a byte-range request with the full body"""
+
+
+@dataclass
+class Segment:
+    """A contiguous byte range of the target object"""
+    index: int
+    start: int
+    end: int  # exclusive
+    sha256: Optional[str] = None
+    done: bool = False
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start
+
+
+def plan_segments(total_size: int, segment_size: int = DEFAULT_SEGMENT_SIZE) -> List[Segment]:
+    """Split an object of total_size bytes into consecutive segments"""
+    if segment_size <= 0:
+        raise ValueError("segment_size must be positive")
+
+    segments = []
+    for index, start in enumerate(range(0, total_size, segment_size)):
+        segments.append(Segment(index=index, start=start, end=min(start + segment_size, total_size)))
+    return segments
+
+
+def preallocate_file(fd: int, size: int):
+    """Reserve size bytes for fd so positional writes never extend the file"""
+    if hasattr(os, 'posix_fallocate') and size > 0:
+        try:
+            os.posix_fallocate(fd, 0, size)
+            return
+        except OSError:
+            pass  # Filesystem without fallocate support
+    os.ftruncate(fd, size)
+
+
+def hash_file_range(path: str, start: int = 0, end: Optional[int] = None,
+                    hasher=None, read_size: int = HASH_READ_SIZE):
+    """Feed bytes [start, end) of path into hasher using large reads; returns the hasher"""
+    hasher = hasher if hasher is not None else hashlib.sha256()
+    buffer = bytearray(read_size)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        f.seek(start)
+        remaining = None if end is None else end - start
+        while remaining is None or remaining > 0:
+            size = read_size if remaining is None else min(read_size, remaining)
+            # readinto a reused buffer; hashlib drops the GIL for large updates,
+            # so several files can be hashed in parallel threads
+            count = f.readinto(view[:size])
+            if not count:
+                break
+            hasher.update(view[:count])
+            if remaining is not None:
+                remaining -= count
+    return hasher
+
+
+def write_all(fd: int, data) -> int:
+    """os.write all of data to fd; pipes and sockets may accept less per call"""
+    view = memoryview(data)
+    total = len(view)
+    while view:
+        view = view[os.write(fd, view):]
+    return total
+
+
+def send_file(path: str, out_fd: int, start: int = 0, end: Optional[int] = None,
+              read_size: int = HASH_READ_SIZE) -> int:
+    """
+    Copy bytes [start, end) of path to out_fd and return the count. os.sendfile
+    moves the data inside the kernel; where out_fd is not a valid target
+    (older kernels, terminals, non-Linux platforms) large reads and writes
+    take over from the current offset.
+    """
+    with open(path, 'rb', buffering=0) as f:
+        if end is None:
+            end = os.fstat(f.fileno()).st_size
+        offset = start
+        if hasattr(os, 'sendfile'):
+            while offset < end:
+                try:
+                    sent = os.sendfile(out_fd, f.fileno(), offset, min(SENDFILE_CHUNK_SIZE, end - offset))
+                except OSError as e:
+                    if e.errno not in (errno.EINVAL, errno.ENOSYS, errno.ENOTSUP, errno.EOPNOTSUPP):
+                        raise
+                    break
+                if not sent:
+                    return offset - start  # file shrank
+                offset += sent
+
+        buffer = bytearray(read_size)
+        view = memoryview(buffer)
+        f.seek(offset)
+        while offset < end:
+            count = f.readinto(view[:min(read_size, end - offset)])
+            if not count:
+                break
+            write_all(out_fd, view[:count])
+            offset += count
+    return offset - start
+
+
+class TransferCheckpoint:
+    """
+    Sidecar record of the verified byte ranges of a partial download
+
+    hashlib objects cannot be serialised, so instead of a raw hash state the
+    checkpoint stores a SHA-256 per completed block. On resume the contiguous
+    prefix is replayed from disk into a fresh hasher, and every block is
+    checked against its recorded digest on the way.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str, uhrp_hash: str, content_hash: Optional[str],
+                 total_size: int, block_size: int, etag: Optional[str] = None):
+        self.path = path
+        self.uhrp_hash = uhrp_hash
+        self.content_hash = content_hash
+        self.total_size = total_size
+        self.block_size = block_size
+        self.etag = etag
+        self.completed: Dict[int, Dict[str, Any]] = {}
+
+    @staticmethod
+    def path_for(partial_path: str) -> str:
+        return partial_path + '.ckpt'
+
+    @classmethod
+    def load(cls, path: str) -> Optional['TransferCheckpoint']:
+        """Load a checkpoint, returning None when missing or unreadable"""
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            if data.get('version') != cls.VERSION:
+                return None
+            checkpoint = cls(
+                path=path,
+                uhrp_hash=data['uhrp_hash'],
+                content_hash=data.get('content_hash'),
+                total_size=data['total_size'],
+                block_size=data['block_size'],
+                etag=data.get('etag')
+            )
+            for block in data.get('completed', []):
+                checkpoint.completed[block['start']] = block
+            return checkpoint
+        except (OSError, ValueError, KeyError) as e:
+            logger.debug(f"Ignoring checkpoint {path}: {e}")
+            return None
+
+    def matches(self, uhrp_hash: str, content_hash: Optional[str], total_size: int,
+                block_size: int) -> bool:
+        """True if this checkpoint describes the same remote object and block layout"""
+        return (self.uhrp_hash == uhrp_hash
+                and self.content_hash == content_hash
+                and self.total_size == total_size
+                and self.block_size == block_size)
+
+    def mark_complete(self, start: int, end: int, sha256: str):
+        self.completed[start] = {'start': start, 'end': end, 'sha256': sha256}
+
+    def save(self):
+        """Atomically persist the checkpoint next to the partial file"""
+        data = {
+            'version': self.VERSION,
+            'uhrp_hash': self.uhrp_hash,
+            'content_hash': self.content_hash,
+            'total_size': self.total_size,
+            'block_size': self.block_size,
+            'etag': self.etag,
+            'updated_at': time.time(),
+            'completed': sorted(self.completed.values(), key=lambda block: block['start'])
+        }
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(temp_path, self.path)
+
+    def discard(self):
+        for path in (self.path, self.path + '.tmp'):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def replay(self, partial_path: str):
+        """
+        Re-verify every completed block of partial_path against its digest.
+
+        Blocks forming the contiguous prefix are also folded into a fresh
+        object hasher in the same read. Blocks that fail verification are
+        forgotten so they get fetched again. Returns (prefix_length, hasher).
+        """
+        hasher = hashlib.sha256()
+        prefix = 0
+        for start in sorted(self.completed):
+            block = self.completed[start]
+            extends_prefix = start == prefix
+            candidate = hasher.copy() if extends_prefix else None
+            block_hash = hashlib.sha256()
+            try:
+                with open(partial_path, 'rb', buffering=0) as f:
+                    f.seek(block['start'])
+                    remaining = block['end'] - block['start']
+                    while remaining > 0:
+                        chunk = f.read(min(HASH_READ_SIZE, remaining))
+                        if not chunk:
+                            break
+                        block_hash.update(chunk)
+                        if candidate is not None:
+                            candidate.update(chunk)
+                        remaining -= len(chunk)
+            except OSError:
+                remaining = -1
+
+            if remaining or block_hash.hexdigest() != block['sha256']:
+                logger.warning(f"Checkpointed block at {start} failed verification, refetching")
+                del self.completed[start]
+                continue
+            if extends_prefix:
+                hasher = candidate
+                prefix = block['end']
+        return prefix, hasher
+
+
+class ResumableFile:
+    """
+    Sequential writer for a .part file that checkpoints every completed block
+
+    open() resumes from the verified prefix of a previous attempt when its
+    checkpoint describes the same object; commit() renames the finished file
+    into place. Interrupted transfers leave the .part and .ckpt files behind
+    for the next attempt.
+    """
+
+    def __init__(self, output_path: str, uhrp_hash: str, content_hash: Optional[str] = None,
+                 total_size: int = 0, etag: Optional[str] = None,
+                 block_size: int = CHECKPOINT_BLOCK_SIZE):
+        self.output_path = output_path
+        self.partial_path = output_path + '.part'
+        self.uhrp_hash = uhrp_hash
+        self.content_hash = content_hash
+        self.total_size = total_size
+        self.block_size = block_size
+        self.etag = etag
+
+        self.offset = 0
+        self.hasher = hashlib.sha256()
+        self.checkpoint: Optional[TransferCheckpoint] = None
+        self._block_hash = hashlib.sha256()
+        self._block_start = 0
+        self._file = None
+
+    def open(self) -> int:
+        """Open the partial file, returning the offset to resume from"""
+        os.makedirs(os.path.dirname(self.output_path) or '.', exist_ok=True)
+        checkpoint_path = TransferCheckpoint.path_for(self.partial_path)
+        checkpoint = TransferCheckpoint.load(checkpoint_path)
+
+        if checkpoint and os.path.exists(self.partial_path) and checkpoint.matches(
+                self.uhrp_hash, self.content_hash, self.total_size, self.block_size):
+            self.offset, self.hasher = checkpoint.replay(self.partial_path)
+            for start in [start for start in checkpoint.completed if start >= self.offset]:
+                del checkpoint.completed[start]
+            self.etag = self.etag or checkpoint.etag
+            self.checkpoint = checkpoint
+            if self.offset:
+                logger.info(f"Resuming {self.uhrp_hash} at byte {self.offset}")
+        else:
+            if checkpoint:
+                logger.info(f"Discarding stale partial download of {self.uhrp_hash}")
+            self.checkpoint = TransferCheckpoint(
+                checkpoint_path, self.uhrp_hash, self.content_hash,
+                self.total_size, self.block_size, self.etag
+            )
+            self.offset = 0
+
+        self._file = open(self.partial_path, 'r+b' if os.path.exists(self.partial_path) else 'wb')
+        self._file.truncate(self.offset)
+        self._file.seek(self.offset)
+        self._block_start = self.offset
+        self._block_hash = hashlib.sha256()
+        return self.offset
+
+    def restart(self):
+        """Drop everything written so far (the server sent the full body instead of a range)"""
+        self._file.seek(0)
+        self._file.truncate(0)
+        self.offset = 0
+        self.hasher = hashlib.sha256()
+        self._block_start = 0
+        self._block_hash = hashlib.sha256()
+        self.checkpoint.completed.clear()
+        self.checkpoint.save()
+
+    def write(self, data: bytes):
+        """Append data, checkpointing each time a block boundary is crossed"""
+        view = memoryview(data)
+        while view:
+            room = self.block_size - (self.offset - self._block_start)
+            piece = view[:room]
+            self._file.write(piece)
+            self.hasher.update(piece)
+            self._block_hash.update(piece)
+            self.offset += len(piece)
+            view = view[len(piece):]
+            if self.offset - self._block_start == self.block_size:
+                self._checkpoint_block()
+
+    def _checkpoint_block(self):
+        # Data must be durable before the checkpoint claims it
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.checkpoint.etag = self.etag
+        self.checkpoint.mark_complete(self._block_start, self.offset, self._block_hash.hexdigest())
+        self.checkpoint.save()
+        self._block_start = self.offset
+        self._block_hash = hashlib.sha256()
+
+    def commit(self) -> str:
+        """Close the partial file, move it into place and return its SHA-256"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        os.replace(self.partial_path, self.output_path)
+        self.checkpoint.discard()
+        return self.hasher.hexdigest()
+
+    def suspend(self):
+        """Close the partial file, keeping completed blocks for a later resume"""
+        if self._file and self.offset == 0:
+            # Nothing received; leave no empty partial behind
+            self.discard()
+        elif self._file:
+            if self.offset > self._block_start:
+                self._checkpoint_block()
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        """Remove the partial file and its checkpoint"""
+        if self._file:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self.partial_path):
+            os.remove(self.partial_path)
+        if self.checkpoint:
+            self.checkpoint.discard()
+
+
+class PathLock:
+    """
+    Exclusive lock on a lock file, shared between processes
+
+    Uses flock(), which the kernel drops when the holder exits, so a crashed
+    downloader never blocks the others. Where fcntl is unavailable the lock
+    file is created with O_EXCL instead; holders refresh() its mtime while
+    they work and a lock left unrefreshed for stale_seconds is broken.
+    Each PathLock opens its own descriptor, so it also excludes other
+    threads and tasks of the same process.
+    """
+
+    def __init__(self, path: str, stale_seconds: float = LOCK_STALE_SECONDS):
+        self.path = path
+        self.stale_seconds = stale_seconds
+        self._fd: Optional[int] = None
+        self._refreshed = 0.0
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def acquire(self, blocking: bool = True, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = LOCK_POLL_SECONDS
+        while not self._try_acquire():
+            if not blocking or (deadline is not None and time.monotonic() >= deadline):
+                return False
+            time.sleep(delay)
+            delay = min(delay * 2, LOCK_MAX_POLL_SECONDS)
+        return True
+
+    async def acquire_async(self, timeout: Optional[float] = None) -> bool:
+        """acquire() that polls without blocking the event loop"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = LOCK_POLL_SECONDS
+        while not self._try_acquire():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, LOCK_MAX_POLL_SECONDS)
+        return True
+
+    def _try_acquire(self) -> bool:
+        if self._fd is not None:
+            raise RuntimeError(f"Lock {self.path} is already held")
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        if fcntl:
+            # The lock file is never removed, so every process locks the same inode
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                return False
+            os.ftruncate(fd, 0)
+        else:
+            try:
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o644)
+            except FileExistsError:
+                self._break_if_stale()
+                return False
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        self._refreshed = time.monotonic()
+        return True
+
+    def _break_if_stale(self):
+        try:
+            age = time.time() - os.stat(self.path).st_mtime
+            if age > self.stale_seconds:
+                logger.warning(f"Breaking stale lock {self.path} ({age:.0f}s without refresh)")
+                # Fails while a live holder still has the file open on Windows
+                os.remove(self.path)
+        except OSError:
+            pass
+
+    def refresh(self):
+        """Mark an O_EXCL lock as alive; cheap enough to call per chunk"""
+        if fcntl or self._fd is None:
+            return
+        now = time.monotonic()
+        if now - self._refreshed >= LOCK_REFRESH_SECONDS:
+            self._refreshed = now
+            os.utime(self.path)
+
+    def release(self):
+        if self._fd is None:
+            return
+        fd, self._fd = self._fd, None
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+        else:
+            os.close(fd)
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.release()
+
+
+async def adaptive_chunks(reader, min_size: int = MIN_READ_SIZE,
+                          max_size: int = MAX_READ_SIZE) -> AsyncIterator[bytes]:
+    """
+    Read a stream (anything with an aiohttp-style read(n)) with a read size
+    that doubles while reads come back full and halves when they come back
+    mostly empty, so fast links are drained in few large reads
+    """
+    size = min_size
+    while True:
+        data = await reader.read(size)
+        if not data:
+            return
+        yield data
+        if len(data) == size:
+            size = min(size * 2, max_size)
+        elif len(data) < size // 4:
+            size = max(size // 2, min_size)
+
+
+class CoalescingWriter:
+    """
+    Gathers small chunks into large buffers for a blocking sink
+
+    Whole multiples of flush_size are handed to sink in the default executor
+    while the next buffer fills, so the event loop pays one thread hop per
+    flush_size bytes instead of one per network read. Writes stay in order.
+    """
+
+    def __init__(self, sink: Callable[[bytes], Any], flush_size: int = COALESCE_SIZE):
+        self.sink = sink
+        self.flush_size = flush_size
+        self.flushes = 0
+        self._buffer = bytearray()
+        self._pending: Optional[asyncio.Future] = None
+
+    async def write(self, data: bytes):
+        self._buffer += data
+        if len(self._buffer) >= self.flush_size:
+            aligned = len(self._buffer) - len(self._buffer) % self.flush_size
+            await self._submit(aligned)
+
+    async def flush(self):
+        """Write everything buffered and wait until the sink has it"""
+        if self._buffer:
+            await self._submit(len(self._buffer))
+        await self._wait_pending()
+
+    async def _submit(self, length: int):
+        await self._wait_pending()
+        data = self._buffer
+        self._buffer = data[length:]
+        del data[length:]
+        self._pending = asyncio.get_running_loop().run_in_executor(None, self.sink, data)
+        self.flushes += 1
+
+    async def _wait_pending(self):
+        if self._pending is not None:
+            pending, self._pending = self._pending, None
+            await pending
+
+
+class HashFrontier:
+    """
+    Folds completed segments into the whole-object SHA-256 in offset order
+
+    Segments may finish in any order; whenever the segment at the frontier is
+    done it is read back (normally from the page cache, having just been
+    written) and hashed, so the object digest is ready as soon as the last
+    segment lands.
+    """
+
+    def __init__(self, path: str, segments: List[Segment]):
+        self.path = path
+        self.segments = segments
+        self.hasher = hashlib.sha256()
+        self.index = 0
+        self._lock = asyncio.Lock()
+
+    def resume(self, prefix: int, hasher):
+        """Start from a hasher that already covers bytes [0, prefix)"""
+        self.hasher = hasher
+        self.index = 0
+        while self.index < len(self.segments) and self.segments[self.index].end <= prefix:
+            self.index += 1
+
+    async def advance(self):
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            while self.index < len(self.segments) and self.segments[self.index].done:
+                segment = self.segments[self.index]
+                await loop.run_in_executor(
+                    None, hash_file_range, self.path, segment.start, segment.end, self.hasher
+                )
+                self.index += 1
+
+    def hexdigest(self) -> str:
+        return self.hasher.hexdigest()
+
+
+class SegmentedDownload:
+    """
+    Concurrent byte-range download into a preallocated file
+
+    Segments are pulled from a shared queue by a pool of workers. Each worker
+    streams its range, writes it with os.pwrite at the segment offset and
+    records a per-segment SHA-256. A hash frontier reads completed segments
+    back in offset order (normally from the page cache) and folds them into
+    the whole-object SHA-256 while later segments are still downloading, so
+    the digest is ready when the last segment lands instead of after a
+    separate pass at the end. When auto_tune is enabled the worker count is
+    grown while aggregate throughput keeps improving and shrunk when it drops.
+
+    With a checkpoint, every finished segment is recorded on disk; a later run
+    re-verifies those segments and only fetches what is still missing.
+    """
+
+    def __init__(self, fetch_range: RangeFetcher, output_path: str, total_size: int,
+                 segment_size: int = DEFAULT_SEGMENT_SIZE, workers: int = DEFAULT_WORKERS,
+                 max_workers: int = MAX_WORKERS, auto_tune: bool = True,
+                 tune_interval: float = 1.0, checkpoint: Optional[TransferCheckpoint] = None,
+                 retries: int = SEGMENT_RETRIES):
+        self.fetch_range = fetch_range
+        self.output_path = output_path
+        self.total_size = total_size
+        self.segments = plan_segments(total_size, segment_size)
+        self.max_workers = max(1, max_workers)
+        self.target_workers = max(1, min(workers, self.max_workers, len(self.segments) or 1))
+        self.auto_tune = auto_tune
+        self.tune_interval = tune_interval
+        self.checkpoint = checkpoint
+        self.retries = retries
+
+        self.bytes_downloaded = 0
+        self.bytes_resumed = 0
+        self.peak_workers = 0
+        self._fd = None
+        self._pending: List[Segment] = []
+        self._active_workers = 0
+        self._workers: List[asyncio.Task] = []
+        self._frontier = HashFrontier(output_path, self.segments)
+        self._checkpoint_lock = asyncio.Lock()
+        self._error: Optional[BaseException] = None
+
+    async def run(self) -> Dict[str, Any]:
+        """Download all segments and return the transfer summary"""
+        loop = asyncio.get_running_loop()
+        started_at = time.monotonic()
+
+        self._fd = os.open(self.output_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            await loop.run_in_executor(None, preallocate_file, self._fd, self.total_size)
+            if self.checkpoint:
+                await self._resume_from_checkpoint()
+
+            self._pending = [segment for segment in self.segments if not segment.done]
+            self._pending.reverse()  # pop() from the end hands out segments in offset order
+
+            for _ in range(self.target_workers):
+                self._spawn_worker()
+
+            tuner = asyncio.create_task(self._tune()) if self.auto_tune else None
+            try:
+                while self._workers:
+                    done, _ = await asyncio.wait(self._workers, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        self._workers.remove(task)
+                        if task.exception() and not self._error:
+                            self._error = task.exception()
+                    if self._error:
+                        raise self._error
+                    # A worker retired by the tuner may leave segments queued
+                    if self._pending and not self._workers:
+                        self._spawn_worker()
+            finally:
+                if tuner:
+                    tuner.cancel()
+                for task in self._workers:
+                    task.cancel()
+                if self._workers:
+                    await asyncio.gather(*self._workers, return_exceptions=True)
+
+            await self._frontier.advance()
+            await loop.run_in_executor(None, os.fsync, self._fd)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+        duration = max(time.monotonic() - started_at, 1e-9)
+        return {
+            'file_size': self.total_size,
+            'content_hash': self._frontier.hexdigest(),
+            'segment_count': len(self.segments),
+            'segment_hashes': [segment.sha256 for segment in self.segments],
+            'bytes_resumed': self.bytes_resumed,
+            'workers': self.target_workers,
+            'peak_workers': self.peak_workers,
+            'duration_seconds': round(duration, 3),
+            'bytes_per_second': round(self.bytes_downloaded / duration, 1)
+        }
+
+    def _spawn_worker(self):
+        self._workers.append(asyncio.create_task(self._worker()))
+        self.peak_workers = max(self.peak_workers, len(self._workers))
+
+    async def _resume_from_checkpoint(self):
+        loop = asyncio.get_running_loop()
+        prefix, hasher = await loop.run_in_executor(None, self.checkpoint.replay, self.output_path)
+        self._frontier.resume(prefix, hasher)
+
+        for segment in self.segments:
+            block = self.checkpoint.completed.get(segment.start)
+            if block and block['end'] == segment.end:
+                segment.sha256 = block['sha256']
+                segment.done = True
+                self.bytes_resumed += segment.length
+
+        if self.bytes_resumed:
+            logger.info(f"Resuming segmented download with {self.bytes_resumed} bytes already verified")
+
+    async def _worker(self):
+        self._active_workers += 1
+        try:
+            while self._pending and self._active_workers <= self.target_workers:
+                segment = self._pending.pop()
+                try:
+                    await self._download_with_retries(segment)
+                except BaseException:
+                    self._pending.append(segment)
+                    raise
+                await self._frontier.advance()
+        finally:
+            self._active_workers -= 1
+
+    async def _download_with_retries(self, segment: Segment):
+        for attempt in range(self.retries + 1):
+            try:
+                await self._download_segment(segment)
+                break
+            except RangeNotSupportedError:
+                raise
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                delay = 0.5 * (2 ** attempt)
+                logger.warning(f"Segment {segment.index} failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+        if self.checkpoint:
+            loop = asyncio.get_running_loop()
+            async with self._checkpoint_lock:
+                self.checkpoint.mark_complete(segment.start, segment.end, segment.sha256)
+                await loop.run_in_executor(None, self._persist_checkpoint)
+
+    def _persist_checkpoint(self):
+        # Data must be durable before the checkpoint claims it
+        os.fsync(self._fd)
+        self.checkpoint.save()
+
+    async def _download_segment(self, segment: Segment):
+        loop = asyncio.get_running_loop()
+        segment_hash = hashlib.sha256()
+        offset = segment.start
+        buffer = bytearray()
+
+        async for chunk in self.fetch_range(segment.start, segment.end):
+            if offset + len(buffer) + len(chunk) > segment.end:
+                raise Exception(f"Segment {segment.index} overran its range")
+            buffer += chunk
+            segment_hash.update(chunk)
+            self.bytes_downloaded += len(chunk)
+            if len(buffer) >= WRITE_BUFFER_SIZE:
+                await loop.run_in_executor(None, os.pwrite, self._fd, bytes(buffer), offset)
+                offset += len(buffer)
+                buffer.clear()
+
+        if buffer:
+            await loop.run_in_executor(None, os.pwrite, self._fd, bytes(buffer), offset)
+            offset += len(buffer)
+
+        if offset != segment.end:
+            raise Exception(
+                f"Segment {segment.index} truncated: got {offset - segment.start} of {segment.length} bytes"
+            )
+
+        segment.sha256 = segment_hash.hexdigest()
+        segment.done = True
+
+    async def _tune(self):
+        """Grow the worker pool while throughput improves, back off when it regresses"""
+        last_bytes = self.bytes_downloaded
+        last_rate = 0.0
+        while True:
+            await asyncio.sleep(self.tune_interval)
+            rate = (self.bytes_downloaded - last_bytes) / self.tune_interval
+            last_bytes = self.bytes_downloaded
+
+            if rate >= last_rate * 1.1 and self.target_workers < self.max_workers \
+                    and len(self._pending) > 0:
+                self.target_workers += 1
+                self._spawn_worker()
+                logger.debug(f"Segmented download: {rate / 1e6:.2f} MB/s, growing to {self.target_workers} workers")
+            elif rate < last_rate * 0.9 and self.target_workers > 1:
+                self.target_workers -= 1
+                logger.debug(f"Segmented download: {rate / 1e6:.2f} MB/s, shrinking to {self.target_workers} workers")
+            last_rate = rate
@@ -6,10 +6,16 @@ Comprehensive BRC stack integration for consumer operations
 import asyncio
 import json
 import logging
-from typing import Dict, List, Optional, Any
+import os
+from typing import Dict, List, Optional, Any, AsyncGenerator
 import aiohttp
 from datetime import datetime
 
+from .d22_swarm import D22SwarmDownload, DEFAULT_CHUNK_SIZE
+from .brc26_transfer import adaptive_chunks
+from .brc26_merkle import ChunkMerkleTree
+from .brc26_metrics import TransferMonitor, TransferRegistry, ProgressCallback
+
 logger = logging.getLogger(__name__)
 
 class ConsumerBRCStack:
@@ -22,6 +28,7 @@ class ConsumerBRCStack:
         self.overlay_url = overlay_url.rstrip('/')
         self.database = database
         self.session = None
+        self.transfers = TransferRegistry()
 
         # BRC endpoints
         self.endpoints = {
@@ -381,31 +388,184 @@ class ConsumerBRCStack:
         """Handle content access from D22 storage backend"""
         try:
             # Check content availability across storage nodes
-            availability_data = {
+            storage_nodes = await self._get_available_storage_nodes(
+                content_result['content_id'], consumer_identity
+            )
+            # Select best storage node based on performance
+            best_node = self._select_best_storage_node(storage_nodes)
+            if best_node:
+                content_result['storage_node'] = best_node
+                content_result['storage_nodes'] = storage_nodes
+                content_result['retrieval_optimized'] = True
+
+            return content_result
+
+        except Exception as e:
+            logger.warning(f"D22 storage optimization failed: {e}")
+            return content_result
+
+    async def _get_available_storage_nodes(self, content_id: str,
+                                           consumer_identity: str) -> List[Dict[str, Any]]:
+        """Query D22 for every storage node currently holding content_id"""
+        availability_data = {
+            'consumer_identity': consumer_identity,
+            'content_ids': [content_id],
+            'include_performance_metrics': True
+        }
+
+        async with self.session.post(
+            f"{self.endpoints['d22_storage']}/availability",
+            json=availability_data
+        ) as response:
+            if response.status != 200:
+                logger.warning(f"Storage availability check failed: {await response.text()}")
+                return []
+
+            availability = await response.json()
+            return [
+                node for node in availability.get('availability', [])
+                if node.get('available', False)
+            ]
+
+    async def swarm_download_content(self, uhrp_hash: str, consumer_identity: str,
+                                     output_path: str, payment_proof: str = None,
+                                     chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                     on_progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """
+        D22: Download content from all replicas at once instead of the single best node
+        """
+        temp_path = output_path + '.swarm'
+        try:
+            metadata_request = {
+                'uhrp_hash': uhrp_hash,
                 'consumer_identity': consumer_identity,
-                'content_ids': [content_result['content_id']],
-                'include_performance_metrics': True
+                'access_token': payment_proof,
+                'metadata_only': True
             }
 
             async with self.session.post(
-                f"{self.endpoints['d22_storage']}/availability",
-                json=availability_data
+                f"{self.endpoints['brc26_content']}/metadata",
+                json=metadata_request
             ) as response:
-                if response.status == 200:
-                    availability = await response.json()
-                    # Select best storage node based on performance
-                    best_node = self._select_best_storage_node(
-                        availability.get('availability', [])
-                    )
-                    if best_node:
-                        content_result['storage_node'] = best_node
-                        content_result['retrieval_optimized'] = True
+                if response.status != 200:
+                    raise Exception(f"Metadata retrieval failed: {await response.text()}")
+                metadata = await response.json()
 
-            return content_result
+            storage_nodes = await self._get_available_storage_nodes(
+                metadata.get('content_id', uhrp_hash), consumer_identity
+            )
+            node_urls = [node for node in storage_nodes if node.get('url') or node.get('endpoint')]
+            if not node_urls:
+                raise Exception(f"No storage nodes available for {uhrp_hash}")
+
+            # Chunk digests are only usable when the node layout matches ours
+            chunk_hashes = None
+            merkle_tree = None
+            if metadata.get('chunk_size') == chunk_size and metadata.get('chunk_hashes'):
+                chunk_hashes = metadata['chunk_hashes']
+            else:
+                # Otherwise verify against Merkle leaves, so a corrupt replica is still caught per chunk
+                merkle_tree = await self._get_merkle_tree(uhrp_hash, consumer_identity, metadata)
+                if merkle_tree:
+                    chunk_size = max(1, chunk_size // merkle_tree.chunk_size) * merkle_tree.chunk_size
+                else:
+                    logger.warning(f"No chunk digests for {uhrp_hash}: a corrupt replica is only "
+                                   f"detected by the final hash")
+
+            os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+            monitor = TransferMonitor(uhrp_hash, 'swarm', total_size=int(metadata['size']),
+                                      on_progress=on_progress, registry=self.transfers)
+            swarm = D22SwarmDownload(
+                nodes=node_urls,
+                fetch_chunk=lambda node, start, end: self._fetch_node_range(
+                    node, uhrp_hash, consumer_identity, payment_proof, start, end, monitor
+                ),
+                output_path=temp_path,
+                total_size=int(metadata['size']),
+                chunk_size=chunk_size,
+                chunk_hashes=chunk_hashes,
+                merkle_tree=merkle_tree
+            )
+            async with monitor.running():
+                transfer = await swarm.run()
+                expected_hash = metadata.get('content_hash', uhrp_hash)
+                if transfer['content_hash'] != expected_hash.lower():
+                    raise Exception(f"Content integrity verification failed for {uhrp_hash}")
+
+            os.replace(temp_path, output_path)
+            logger.info(
+                f"Swarm download of {uhrp_hash} from {len(node_urls)} nodes: "
+                f"{transfer['bytes_per_second'] / 1e6:.2f} MB/s"
+            )
+
+            return {
+                'uhrp_hash': uhrp_hash,
+                'file_path': output_path,
+                'file_size': transfer['file_size'],
+                'integrity_verified': True,
+                'content_type': metadata.get('content_type', 'application/octet-stream'),
+                'transfer': transfer,
+                'transfer_record': monitor.end_record
+            }
 
         except Exception as e:
-            logger.warning(f"D22 storage optimization failed: {e}")
-            return content_result
+            logger.error(f"Swarm download failed: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    async def _get_merkle_tree(self, uhrp_hash: str, consumer_identity: str,
+                               metadata: Dict[str, Any]) -> Optional[ChunkMerkleTree]:
+        """The object's chunk Merkle tree, or None when none is published"""
+        try:
+            if metadata.get('merkle_tree'):
+                tree = ChunkMerkleTree.from_dict(metadata['merkle_tree'], metadata.get('merkle_root'))
+            else:
+                async with self.session.post(
+                    f"{self.endpoints['brc26_content']}/merkle",
+                    json={'uhrp_hash': uhrp_hash, 'consumer_identity': consumer_identity}
+                ) as response:
+                    if response.status != 200:
+                        return None
+                    tree = ChunkMerkleTree.from_dict(await response.json(), metadata.get('merkle_root'))
+        except Exception as e:
+            logger.warning(f"Merkle tree for {uhrp_hash} unusable: {e}")
+            return None
+        return tree if tree.total_size == int(metadata['size']) else None
+
+    async def _fetch_node_range(self, node: Dict[str, Any], uhrp_hash: str, consumer_identity: str,
+                                payment_proof: Optional[str], start: int, end: int,
+                                monitor: Optional[TransferMonitor] = None) -> AsyncGenerator[bytes, None]:
+        """Stream bytes [start, end) of content from one storage node"""
+        node_url = (node.get('url') or node.get('endpoint')).rstrip('/')
+        node_id = node.get('node_id') or node_url
+        headers = {
+            'Range': f"bytes={start}-{end - 1}",
+            'X-Consumer-Identity': consumer_identity
+        }
+        if payment_proof:
+            headers['Authorization'] = f"Bearer {payment_proof}"
+
+        started = monitor.request_started(node_id) if monitor else None
+        try:
+            async with self.session.get(
+                f"{node_url}/content/{uhrp_hash}",
+                headers=headers,
+                timeout=aiohttp.ClientTimeout(total=None, sock_read=30)
+            ) as response:
+                if monitor:
+                    monitor.response_started(started, node_id)
+                if response.status != 206:
+                    raise Exception(f"Storage node returned {response.status} for range request")
+
+                async for chunk in adaptive_chunks(response.content):
+                    if monitor:
+                        monitor.record(len(chunk), node_id)
+                    yield chunk
+        except Exception:
+            if monitor:
+                monitor.request_failed(node_id)
+            raise
 
     def _select_best_storage_node(self, availability_data: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
         """Select the best storage node based on availability and performance"""
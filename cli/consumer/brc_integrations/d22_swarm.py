@@ -0,0 +1,322 @@
+"""
+D22 Multi-source Swarm Download for Consumer
+Fetches chunks of one object from every available storage node at once
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from collections import deque
+from typing import Dict, List, Optional, Any, AsyncIterator, Callable
+
+from .brc26_transfer import Segment, HashFrontier, plan_segments, preallocate_file
+from .brc26_merkle import ChunkMerkleTree
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+PER_NODE_CONCURRENCY = 2
+MAX_NODE_FAILURES = 2
+SLOW_NODE_FACTOR = 0.2
+STEAL_FACTOR = 2.0
+
+# fetch_chunk(node, start, end) yields the bytes of [start, end) from one node
+ChunkFetcher = Callable[[Dict[str, Any], int, int], AsyncIterator[bytes]]
+
+
+class StorageNodeState:
+    """Per-node bookkeeping used for scheduling and eviction decisions"""
+
+    def __init__(self, node: Dict[str, Any]):
+        self.node = node
+        self.node_id = node.get('node_id') or node.get('url') or node.get('endpoint')
+        self.bytes = 0
+        self.busy_seconds = 0.0
+        self.chunks_ok = 0
+        self.failures = 0
+        self.corrupt_chunks = 0
+        self.chunks_stolen = 0
+        self.dropped_reason: Optional[str] = None
+
+    @property
+    def dropped(self) -> bool:
+        return self.dropped_reason is not None
+
+    @property
+    def throughput(self) -> float:
+        """Observed bytes/sec, falling back to the advertised response time"""
+        if self.busy_seconds > 0:
+            return self.bytes / self.busy_seconds
+        response_time = self.node.get('response_time')
+        return 1.0 / response_time if response_time else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'node_id': self.node_id,
+            'bytes': self.bytes,
+            'chunks': self.chunks_ok,
+            'chunks_stolen': self.chunks_stolen,
+            'failures': self.failures,
+            'corrupt_chunks': self.corrupt_chunks,
+            'bytes_per_second': round(self.bytes / self.busy_seconds, 1) if self.busy_seconds else 0.0,
+            'dropped': self.dropped_reason
+        }
+
+
+class D22SwarmDownload:
+    """
+    Download one object from several D22 storage nodes concurrently
+
+    Chunks are handed out from a shared queue, so faster nodes naturally take
+    more of them. Once the queue is empty an idle node steals an outstanding
+    chunk from a slower node by fetching it in parallel; whichever copy
+    arrives first is written and the other attempt is cancelled. Nodes are
+    dropped after serving corrupt chunks, after repeated errors, or when
+    their throughput falls far behind the fastest node.
+
+    Corrupt chunks are recognised by chunk_hashes (SHA-256 per swarm chunk)
+    or, without them, by the leaves of a merkle_tree whose chunk size divides
+    chunk_size. With neither, a bad replica only shows up in the final hash.
+    """
+
+    def __init__(self, nodes: List[Dict[str, Any]], fetch_chunk: ChunkFetcher,
+                 output_path: str, total_size: int, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 chunk_hashes: Optional[List[str]] = None,
+                 merkle_tree: Optional[ChunkMerkleTree] = None,
+                 per_node_concurrency: int = PER_NODE_CONCURRENCY,
+                 max_node_failures: int = MAX_NODE_FAILURES,
+                 slow_node_factor: float = SLOW_NODE_FACTOR,
+                 steal_factor: float = STEAL_FACTOR):
+        if not nodes:
+            raise ValueError("Swarm download needs at least one storage node")
+
+        self.nodes = [StorageNodeState(node) for node in nodes]
+        self.fetch_chunk = fetch_chunk
+        self.output_path = output_path
+        self.total_size = total_size
+        self.chunks = plan_segments(total_size, chunk_size)
+        self.chunk_hashes = chunk_hashes
+        self.per_node_concurrency = max(1, per_node_concurrency)
+        self.max_node_failures = max_node_failures
+        self.slow_node_factor = slow_node_factor
+        self.steal_factor = steal_factor
+
+        if chunk_hashes is not None and len(chunk_hashes) != len(self.chunks):
+            raise ValueError("chunk_hashes must have one entry per chunk")
+        if merkle_tree is not None and (merkle_tree.total_size != total_size
+                                        or chunk_size % merkle_tree.chunk_size):
+            raise ValueError("merkle_tree must cover the object in chunks that divide chunk_size")
+        self.merkle_tree = merkle_tree
+
+        self._pending = deque(self.chunks)
+        self._attempts: Dict[int, Dict[int, Any]] = {}  # chunk index -> {id(node state): (task, started)}
+        self._remaining = len(self.chunks)
+        self._writing = set()
+        self._changed = asyncio.Condition()
+        self._frontier = HashFrontier(output_path, self.chunks)
+        self._fd = None
+
+    async def run(self) -> Dict[str, Any]:
+        """Download every chunk and return the transfer summary"""
+        loop = asyncio.get_running_loop()
+        started_at = time.monotonic()
+
+        self._fd = os.open(self.output_path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            await loop.run_in_executor(None, preallocate_file, self._fd, self.total_size)
+
+            workers = [
+                asyncio.create_task(self._node_worker(state))
+                for state in self.nodes
+                for _ in range(self.per_node_concurrency)
+            ]
+            try:
+                await asyncio.gather(*workers)
+            finally:
+                for task in workers:
+                    task.cancel()
+                for attempts in self._attempts.values():
+                    for task, _ in attempts.values():
+                        task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+            if self._remaining:
+                raise Exception(
+                    f"Swarm download failed: {self._remaining} chunks left and no usable storage nodes"
+                )
+
+            await self._frontier.advance()
+            await loop.run_in_executor(None, os.fsync, self._fd)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+        duration = max(time.monotonic() - started_at, 1e-9)
+        return {
+            'file_size': self.total_size,
+            'content_hash': self._frontier.hexdigest(),
+            'chunk_count': len(self.chunks),
+            'nodes': [state.to_dict() for state in self.nodes],
+            'duration_seconds': round(duration, 3),
+            'bytes_per_second': round(self.total_size / duration, 1)
+        }
+
+    async def _node_worker(self, state: StorageNodeState):
+        while self._remaining and not state.dropped:
+            chunk = self._next_chunk(state)
+            if chunk is None:
+                if not self._active_nodes():
+                    return
+                # Nothing to take or steal right now; wait for progress elsewhere
+                async with self._changed:
+                    try:
+                        await asyncio.wait_for(self._changed.wait(), timeout=0.25)
+                    except asyncio.TimeoutError:
+                        pass
+                continue
+
+            started = time.monotonic()
+            task = asyncio.create_task(self._fetch(state, chunk))
+            self._attempts.setdefault(chunk.index, {})[id(state)] = (task, started)
+            try:
+                await asyncio.wait({task})
+            finally:
+                self._attempts.get(chunk.index, {}).pop(id(state), None)
+
+            if task.cancelled():
+                # Another node delivered this chunk first, or this node was dropped
+                self._requeue(chunk)
+                continue
+
+            error = task.exception()
+            if error is not None:
+                state.failures += 1
+                logger.warning(f"Storage node {state.node_id} failed chunk {chunk.index}: {error}")
+                if state.failures >= self.max_node_failures:
+                    self._drop(state, f"{state.failures} failed requests")
+                self._requeue(chunk)
+                await self._notify()
+                continue
+
+            data = task.result()
+            elapsed = time.monotonic() - started
+            if not self._verify_chunk(chunk, data):
+                state.corrupt_chunks += 1
+                self._drop(state, f"served corrupt chunk {chunk.index}")
+                self._requeue(chunk)
+                await self._notify()
+                continue
+
+            if chunk.done or chunk.index in self._writing:
+                continue
+            await self._write_chunk(chunk, data)
+            state.bytes += len(data)
+            state.busy_seconds += elapsed
+            state.chunks_ok += 1
+
+            # Cancel slower duplicate attempts of the same chunk
+            for other_task, _ in list(self._attempts.get(chunk.index, {}).values()):
+                other_task.cancel()
+
+            self._check_slow_nodes()
+            await self._frontier.advance()
+            await self._notify()
+
+    def _verify_chunk(self, chunk: Segment, data: bytes) -> bool:
+        if self.chunk_hashes:
+            return hashlib.sha256(data).hexdigest() == self.chunk_hashes[chunk.index]
+        if self.merkle_tree is not None:
+            leaf_size = self.merkle_tree.chunk_size
+            first = chunk.start // leaf_size
+            return all(
+                self.merkle_tree.verify_chunk(first + i, data[offset:offset + leaf_size])
+                for i, offset in enumerate(range(0, len(data), leaf_size))
+            )
+        return True
+
+    async def _fetch(self, state: StorageNodeState, chunk: Segment) -> bytes:
+        buffer = bytearray()
+        async for data in self.fetch_chunk(state.node, chunk.start, chunk.end):
+            buffer += data
+            if len(buffer) > chunk.length:
+                raise Exception(f"Chunk {chunk.index} overran its range")
+        if len(buffer) != chunk.length:
+            raise Exception(f"Chunk {chunk.index} truncated: {len(buffer)} of {chunk.length} bytes")
+        return bytes(buffer)
+
+    async def _write_chunk(self, chunk: Segment, data: bytes):
+        self._writing.add(chunk.index)
+        try:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, os.pwrite, self._fd, data, chunk.start)
+        finally:
+            self._writing.discard(chunk.index)
+        # Only mark done once written, so the hash frontier never reads stale bytes
+        chunk.sha256 = hashlib.sha256(data).hexdigest() if self.chunk_hashes is None \
+            else self.chunk_hashes[chunk.index]
+        chunk.done = True
+        self._remaining -= 1
+
+    def _next_chunk(self, state: StorageNodeState) -> Optional[Segment]:
+        while self._pending:
+            chunk = self._pending.popleft()
+            if not chunk.done:
+                return chunk
+        return self._steal(state)
+
+    def _steal(self, state: StorageNodeState) -> Optional[Segment]:
+        """Pick the outstanding chunk this node is expected to finish soonest relative to its owner"""
+        my_rate = state.throughput
+        if my_rate <= 0:
+            return None
+
+        now = time.monotonic()
+        best_chunk, best_gain = None, 0.0
+        for index, attempts in self._attempts.items():
+            chunk = self.chunks[index]
+            if chunk.done or id(state) in attempts or len(attempts) > 1:
+                continue
+            for owner_id, (_, started) in attempts.items():
+                owner = next(s for s in self.nodes if id(s) == owner_id)
+                owner_rate = owner.throughput
+                owner_eta = chunk.length / owner_rate - (now - started) if owner_rate > 0 else float('inf')
+                my_eta = chunk.length / my_rate
+                if owner_eta > my_eta * self.steal_factor and owner_eta - my_eta > best_gain:
+                    best_chunk, best_gain = chunk, owner_eta - my_eta
+
+        if best_chunk is not None:
+            state.chunks_stolen += 1
+            logger.debug(f"Storage node {state.node_id} stealing chunk {best_chunk.index}")
+        return best_chunk
+
+    def _requeue(self, chunk: Segment):
+        if not chunk.done and chunk.index not in self._writing and not self._attempts.get(chunk.index) \
+                and chunk not in self._pending:
+            self._pending.appendleft(chunk)
+
+    def _active_nodes(self) -> List[StorageNodeState]:
+        return [state for state in self.nodes if not state.dropped]
+
+    def _drop(self, state: StorageNodeState, reason: str):
+        if not state.dropped:
+            state.dropped_reason = reason
+            logger.warning(f"Dropping storage node {state.node_id}: {reason}")
+            # Hand the node's outstanding chunks back to the queue
+            for attempts in self._attempts.values():
+                if id(state) in attempts:
+                    attempts[id(state)][0].cancel()
+
+    def _check_slow_nodes(self):
+        active = [state for state in self._active_nodes() if state.chunks_ok >= 2]
+        if len(active) < 2:
+            return
+        fastest = max(state.throughput for state in active)
+        for state in active:
+            if state.throughput < fastest * self.slow_node_factor and len(self._active_nodes()) > 1:
+                self._drop(state, f"too slow ({state.throughput / 1e6:.2f} MB/s)")
+
+    async def _notify(self):
+        async with self._changed:
+            self._changed.notify_all()
@@ -38,8 +38,17 @@ log_level = logging.ERROR if os.getenv('NODE_ENV') == 'test' else logging.INFO
 logging.basicConfig(level=log_level, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Bounded read size for streamed downloads (memory use is independent of content size)
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Pipes take large writes without an intermediate file
+STREAM_CHUNK_SIZE = 4 * 1024 * 1024
+DOWNLOAD_RETRIES = 3
+BATCH_CONCURRENCY = 8
+BATCH_PER_HOST = 4
+
 # Import HTTP client for API calls
 import requests
+from requests.adapters import HTTPAdapter
 # Removed direct database and BRC stack imports - now using HTTP API calls
 # from brc_integrations.consumer_stack import ConsumerBRCStack
 # from brc_integrations.brc31_identity import BRC31Identity
@@ -63,6 +72,13 @@ class OverlayConsumerCLI:
         self.identity = None
         self.session = requests.Session()
         self.session.timeout = 30
+        # Mounted once: keep-alive pools large enough for a default download_batch
+        adapter = HTTPAdapter(pool_maxsize=BATCH_CONCURRENCY)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._bandwidth = None
+        self._transfers = None
+        self._stores = {}
         # Remove database connection - using HTTP API instead
 
     def _load_config(self, config_path: Optional[str]) -> Dict[str, Any]:
@@ -73,6 +89,10 @@ class OverlayConsumerCLI:
             'payment_method': os.getenv('PAYMENT_METHOD', 'http'),
             'max_budget_per_hour': int(os.getenv('MAX_BUDGET_PER_HOUR', '10000')),  # satoshis
             'default_region': os.getenv('DEFAULT_REGION', 'global'),
+            'bandwidth_limit': int(os.getenv('BANDWIDTH_LIMIT', '0')),  # bytes/second, 0 = unlimited
+            'per_host_bandwidth_limit': int(os.getenv('PER_HOST_BANDWIDTH_LIMIT', '0')),
+            'cache_dir': os.getenv('CACHE_DIR', './cache'),
+            'max_cache_bytes': int(os.getenv('MAX_CACHE_BYTES', '0')),  # 0 = store default (10 GiB)
             'debug': os.getenv('DEBUG', 'false').lower() == 'true'
         }
 
@@ -329,8 +349,14 @@ class OverlayConsumerCLI:
             response.raise_for_status()
             result = response.json()
 
+            # Pace later downloads under the caps the receipt grants
+            bandwidth = self._get_bandwidth()
+            receipt_id = bandwidth.register_grant(result)
+
             return {
                 'payment_id': result.get('payment_id'),
+                'receipt_id': receipt_id,
+                'bandwidth': bandwidth.status()['receipts'].get(receipt_id) if receipt_id else None,
                 'dataset_id': dataset_id,
                 'amount_paid': amount,
                 'payment_method': payment_method,
@@ -345,38 +371,559 @@ class OverlayConsumerCLI:
 
     async def download_content(self, uhrp_hash: str, access_token: str = None,
                              output_path: str = None, verify_integrity: bool = True) -> Dict[str, Any]:
-        """Download content via BRC-26 UHRP API"""
-        try:
-            if not output_path:
-                output_path = f"./downloads/{uhrp_hash[:16]}.data"
+        """Download content via BRC-26 UHRP API, streaming to disk with constant memory.
+
+        The body is written to <output>.part with a checkpoint sidecar; a rerun
+        after a crash or network drop continues from the last verified block.
+        """
+        return self._download_file(uhrp_hash, access_token, output_path, verify_integrity)
+
+    def _download_file(self, uhrp_hash: str, access_token: str = None, output_path: str = None,
+                       verify_integrity: bool = True, overlay_url: str = None) -> Dict[str, Any]:
+        """Blocking body of download_content, shared with download_batch worker threads.
 
+        Downloads to the same output take turns on a lock file, across
+        processes too: one transfers while the others wait, then find the
+        finished file and return without downloading it again.
+        """
+        import tempfile
+        from brc_integrations.brc26_transfer import PathLock
+
+        if not output_path:
+            output_path = f"./downloads/{uhrp_hash[:16]}.data"
+        # Kept out of the output directory, which should only hold the downloads
+        lock_name = hashlib.sha256(os.path.abspath(output_path).encode()).hexdigest()[:32]
+        lock = PathLock(os.path.join(tempfile.gettempdir(), 'overlay-consumer-locks', f"{lock_name}.lock"))
+
+        waited = not lock.acquire(blocking=False)
+        if waited:
+            logger.info(f"Waiting for another download of {uhrp_hash} to {output_path}")
+            lock.acquire()
+        try:
+            if waited and self._is_verified_file(output_path, uhrp_hash):
+                file_size = os.path.getsize(output_path)
+                return {
+                    'uhrp_hash': uhrp_hash,
+                    'file_path': output_path,
+                    'file_size': file_size,
+                    'resumed_from': file_size,
+                    'content_hash': uhrp_hash.lower(),
+                    'integrity_verified': True,
+                    'waited_for_peer': True
+                }
+            return self._transfer_file(uhrp_hash, access_token, output_path, verify_integrity, overlay_url, lock)
+        finally:
+            lock.release()
+
+    def _transfer_file(self, uhrp_hash: str, access_token: Optional[str], output_path: str,
+                       verify_integrity: bool, overlay_url: Optional[str], lock) -> Dict[str, Any]:
+        """Stream uhrp_hash into output_path, resuming its .part file; lock must be held"""
+        from urllib.parse import urlparse
+        from brc_integrations.brc26_transfer import ResumableFile
+        from brc_integrations.brc26_metrics import TransferMonitor
+
+        part = None
+        monitor = None
+        bandwidth = None
+        receipt_id = None
+        try:
             # Make real API call to download endpoint
-            url = f"{self.config['overlay_url']}/v1/content/{uhrp_hash}/download"
+            overlay_url = overlay_url or self.config['overlay_url']
+            url = f"{overlay_url}/v1/content/{uhrp_hash}/download"
             headers = {}
             if access_token:
                 headers['Authorization'] = f"Bearer {access_token}"
 
-            response = self.session.get(url, headers=headers)
-            response.raise_for_status()
+            started_at = time.monotonic()
+            part = ResumableFile(output_path=output_path, uhrp_hash=uhrp_hash, content_hash=uhrp_hash)
+            resumed_from = part.open()
+            content_type = 'application/octet-stream'
+
+            bandwidth = self._get_bandwidth()
+            receipt_id = bandwidth.receipt_for_token(access_token)
+            host = urlparse(overlay_url).netloc
+            # Runs in worker threads, so stalls are detected from gaps between chunks
+            monitor = TransferMonitor(uhrp_hash, 'download', resumed_bytes=resumed_from,
+                                      registry=self._get_transfers())
+
+            attempt = 0
+            while True:
+                request_headers = dict(headers)
+                if part.offset:
+                    request_headers['Range'] = f"bytes={part.offset}-"
+                    if part.etag:
+                        # Server answers 200 with the full body if the object changed
+                        request_headers['If-Range'] = part.etag
+
+                started = monitor.request_started(host)
+                try:
+                    with self.session.get(url, headers=request_headers, stream=True) as response:
+                        monitor.response_started(started, host)
+                        response.raise_for_status()
+                        content_type = response.headers.get('content-type', content_type)
+                        part.etag = response.headers.get('etag', part.etag)
+                        if response.status_code == 200 and part.offset:
+                            logger.info("Server sent the full object, restarting download")
+                            part.restart()
+                            resumed_from = monitor.resumed_bytes = 0
+                        content_length = int(response.headers.get('content-length') or 0)
+                        bandwidth.admit(receipt_id, content_length)
+                        if content_length:
+                            monitor.total_size = part.offset + content_length
+
+                        for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                            if chunk:
+                                part.write(chunk)
+                                lock.refresh()
+                                monitor.record(len(chunk), host)
+                                bandwidth.pace_blocking(len(chunk), host, receipt_id)
+                    break
+                except (requests.ConnectionError, requests.Timeout,
+                        requests.exceptions.ChunkedEncodingError) as e:
+                    monitor.request_failed(host)
+                    attempt += 1
+                    if attempt > DOWNLOAD_RETRIES:
+                        raise
+                    delay = 0.5 * (2 ** (attempt - 1))
+                    logger.warning(f"Download interrupted at byte {part.offset} ({e}), resuming in {delay:.1f}s")
+                    time.sleep(delay)
+
+            file_size = part.offset
+            calculated_hash = part.hasher.hexdigest()
+            integrity_verified = calculated_hash == uhrp_hash.lower()
+            if verify_integrity and not integrity_verified:
+                part.discard()
+                part = None
+                raise Exception(
+                    f"Integrity verification failed for {uhrp_hash}: calculated {calculated_hash}"
+                )
 
-            # Save content to file
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            with open(output_path, 'wb') as f:
-                f.write(response.content)
+            part.commit()
+            part = None
+            monitor.finish()
 
-            logger.info(f"Content downloaded: {output_path}")
+            duration = max(time.monotonic() - started_at, 1e-9)
+            bytes_per_second = (file_size - resumed_from) / duration
+            logger.info(f"Content downloaded: {output_path} ({file_size} bytes, {bytes_per_second / 1e6:.2f} MB/s)")
 
             return {
                 'uhrp_hash': uhrp_hash,
                 'file_path': output_path,
-                'file_size': len(response.content),
-                'integrity_verified': verify_integrity,
-                'content_type': response.headers.get('content-type', 'application/octet-stream')
+                'file_size': file_size,
+                'resumed_from': resumed_from,
+                'content_hash': calculated_hash,
+                'integrity_verified': integrity_verified,
+                'content_type': content_type,
+                'duration_seconds': round(duration, 3),
+                'bytes_per_second': round(bytes_per_second, 1),
+                'transfer_record': monitor.end_record
             }
 
         except Exception as e:
             logger.error(f"Content download failed: {e}")
+            if monitor:
+                monitor.finish('failed', str(e))
             raise
+        finally:
+            if part:
+                # Keep verified blocks on disk so the next attempt resumes
+                part.suspend()
+            if receipt_id:
+                bandwidth.save()
+
+    async def download_to_fd(self, uhrp_hash: str, out_fd: int, access_token: str = None,
+                             verify_integrity: bool = True) -> Dict[str, Any]:
+        """Write content to an open descriptor such as stdout, without a file on disk.
+
+        A verified copy in the local cache is spliced to out_fd with sendfile;
+        otherwise the network body is written through in large chunks, hashed
+        on the way. Integrity can only be checked after the bytes have left,
+        so a mismatch fails the command rather than withholding the data.
+        """
+        return self._stream_file(uhrp_hash, out_fd, access_token, verify_integrity)
+
+    def _stream_file(self, uhrp_hash: str, out_fd: int, access_token: Optional[str] = None,
+                     verify_integrity: bool = True, overlay_url: str = None) -> Dict[str, Any]:
+        """Blocking body of download_to_fd"""
+        from urllib.parse import urlparse
+        from brc_integrations.brc26_transfer import send_file, write_all
+        from brc_integrations.brc26_metrics import TransferMonitor
+
+        started_at = time.monotonic()
+        cache_dir = self.config.get('cache_dir') or './cache'
+        # Only read from an existing cache; piping should not create one
+        record = self._get_store(cache_dir).lookup(uhrp_hash) if os.path.isdir(cache_dir) else None
+        if record:
+            file_size = send_file(record['path'], out_fd)
+            if file_size != record['size']:
+                raise Exception(f"Cached object {uhrp_hash} changed while being sent")
+            duration = max(time.monotonic() - started_at, 1e-9)
+            logger.info(f"Content streamed from cache: {uhrp_hash} ({file_size} bytes)")
+            return {
+                'uhrp_hash': uhrp_hash,
+                'source': 'cache',
+                'file_size': file_size,
+                'content_hash': record['sha256'] or uhrp_hash.lower(),
+                'integrity_verified': True,
+                'content_type': record.get('content_type') or 'application/octet-stream',
+                'duration_seconds': round(duration, 3),
+                'bytes_per_second': round(file_size / duration, 1)
+            }
+
+        monitor = None
+        bandwidth = None
+        receipt_id = None
+        try:
+            overlay_url = overlay_url or self.config['overlay_url']
+            url = f"{overlay_url}/v1/content/{uhrp_hash}/download"
+            headers = {}
+            if access_token:
+                headers['Authorization'] = f"Bearer {access_token}"
+
+            bandwidth = self._get_bandwidth()
+            receipt_id = bandwidth.receipt_for_token(access_token)
+            host = urlparse(overlay_url).netloc
+            monitor = TransferMonitor(uhrp_hash, 'stream', registry=self._get_transfers())
+            hasher = hashlib.sha256()
+            content_type = 'application/octet-stream'
+            etag = None
+            sent = 0
+
+            attempt = 0
+            while True:
+                request_headers = dict(headers)
+                if sent:
+                    # Bytes already written cannot be taken back: continue after them
+                    request_headers['Range'] = f"bytes={sent}-"
+                    if etag:
+                        request_headers['If-Range'] = etag
+
+                started = monitor.request_started(host)
+                try:
+                    with self.session.get(url, headers=request_headers, stream=True) as response:
+                        monitor.response_started(started, host)
+                        response.raise_for_status()
+                        content_type = response.headers.get('content-type', content_type)
+                        new_etag = response.headers.get('etag')
+                        if sent and etag and new_etag and new_etag != etag:
+                            raise Exception(f"Content of {uhrp_hash} changed after {sent} bytes were streamed")
+                        etag = new_etag or etag
+                        # Without range support the body starts over; drop what was sent
+                        skip = sent if response.status_code == 200 else 0
+                        content_length = int(response.headers.get('content-length') or 0)
+                        bandwidth.admit(receipt_id, content_length)
+                        if content_length:
+                            monitor.total_size = sent + content_length - skip
+
+                        for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                            if skip:
+                                dropped = min(skip, len(chunk))
+                                chunk, skip = chunk[dropped:], skip - dropped
+                            if chunk:
+                                write_all(out_fd, chunk)
+                                hasher.update(chunk)
+                                sent += len(chunk)
+                                monitor.record(len(chunk), host)
+                                bandwidth.pace_blocking(len(chunk), host, receipt_id)
+                    break
+                except (requests.ConnectionError, requests.Timeout,
+                        requests.exceptions.ChunkedEncodingError) as e:
+                    monitor.request_failed(host)
+                    attempt += 1
+                    if attempt > DOWNLOAD_RETRIES:
+                        raise
+                    delay = 0.5 * (2 ** (attempt - 1))
+                    logger.warning(f"Stream interrupted at byte {sent} ({e}), resuming in {delay:.1f}s")
+                    time.sleep(delay)
+
+            calculated_hash = hasher.hexdigest()
+            integrity_verified = calculated_hash == uhrp_hash.lower()
+            if verify_integrity and not integrity_verified:
+                raise Exception(
+                    f"Integrity verification failed for {uhrp_hash}: calculated {calculated_hash}"
+                )
+            monitor.finish()
+
+            duration = max(time.monotonic() - started_at, 1e-9)
+            logger.info(f"Content streamed: {uhrp_hash} ({sent} bytes, {sent / duration / 1e6:.2f} MB/s)")
+            return {
+                'uhrp_hash': uhrp_hash,
+                'source': 'network',
+                'file_size': sent,
+                'content_hash': calculated_hash,
+                'integrity_verified': integrity_verified,
+                'content_type': content_type,
+                'duration_seconds': round(duration, 3),
+                'bytes_per_second': round(sent / duration, 1),
+                'transfer_record': monitor.end_record
+            }
+
+        except BrokenPipeError:
+            # The reader went away (e.g. `| head`); not a failed download
+            if monitor:
+                monitor.finish('cancelled')
+            raise
+        except Exception as e:
+            logger.error(f"Content stream failed: {e}")
+            if monitor:
+                monitor.finish('failed', str(e))
+            raise
+        finally:
+            if receipt_id:
+                bandwidth.save()
+
+    async def download_batch(self, manifest_path: str, concurrency: int = BATCH_CONCURRENCY,
+                             per_host: int = BATCH_PER_HOST, verify_integrity: bool = True,
+                             output_dir: str = None, on_result=None) -> Dict[str, Any]:
+        """Download every entry of a manifest over one pooled session.
+
+        Downloads run on a thread pool bounded globally by concurrency and per
+        overlay host by per_host. Outputs that already match their UHRP hash are
+        skipped. on_result is called with each per-file result as it finishes.
+        """
+        from urllib.parse import urlparse
+        from concurrent.futures import ThreadPoolExecutor
+
+        entries = self._load_manifest(manifest_path)
+        hosts = {urlparse(entry.get('overlay_url') or self.config['overlay_url']).netloc for entry in entries}
+
+        global_slots = asyncio.Semaphore(concurrency)
+        host_slots = {host: asyncio.Semaphore(per_host) for host in hosts}
+        loop = asyncio.get_running_loop()
+        summary = {'files': len(entries), 'downloaded': 0, 'skipped': 0, 'failed': 0, 'bytes_downloaded': 0}
+        started_at = time.monotonic()
+
+        async def run_entry(entry: Dict[str, Any], executor) -> Dict[str, Any]:
+            uhrp_hash = entry['uhrp_hash']
+            output_path = entry.get('output_path') or os.path.join(output_dir or './downloads', f"{uhrp_hash[:16]}.data")
+            host = urlparse(entry.get('overlay_url') or self.config['overlay_url']).netloc
+            # Take the host slot first so a busy host never holds global slots
+            async with host_slots[host], global_slots:
+                try:
+                    if await loop.run_in_executor(executor, self._is_verified_file, output_path, uhrp_hash):
+                        result = {'uhrp_hash': uhrp_hash, 'file_path': output_path, 'status': 'skipped'}
+                    else:
+                        result = await loop.run_in_executor(
+                            executor, self._download_file, uhrp_hash, entry.get('access_token'),
+                            output_path, verify_integrity, entry.get('overlay_url')
+                        )
+                        result['status'] = 'skipped' if result.get('waited_for_peer') else 'downloaded'
+                except Exception as e:
+                    result = {'uhrp_hash': uhrp_hash, 'file_path': output_path, 'status': 'failed', 'error': str(e)}
+
+            summary[result['status']] += 1
+            if result['status'] == 'downloaded':
+                summary['bytes_downloaded'] += result['file_size'] - result['resumed_from']
+            if on_result:
+                on_result(result)
+            return result
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='download-batch') as executor:
+            await asyncio.gather(*[run_entry(entry, executor) for entry in entries])
+
+        duration = max(time.monotonic() - started_at, 1e-9)
+        summary['duration_seconds'] = round(duration, 3)
+        summary['bytes_per_second'] = round(summary['bytes_downloaded'] / duration, 1)
+        summary['bandwidth'] = self._get_bandwidth().status()
+        summary['transfers'] = self._get_transfers().stats()
+        return summary
+
+    async def cache_pin(self, manifest_path: str, pinned: bool = True, cache_dir: str = None) -> Dict[str, Any]:
+        """Pin (or unpin) the cached objects of a manifest, exempting them from eviction.
+
+        Entries not cached yet are reported with the bytes they still need;
+        cache_warm fetches and pins them.
+        """
+        store = self._get_store(cache_dir)
+        entries = self._load_manifest(manifest_path)
+        missing = [entry for entry in entries if not store.set_pinned(entry['uhrp_hash'], pinned)]
+
+        result = {
+            'objects': len(entries),
+            'pinned' if pinned else 'unpinned': len(entries) - len(missing),
+            'missing': len(missing)
+        }
+        if pinned and missing:
+            result.update(await self._bytes_needed(missing))
+        result['cache'] = store.stats()
+        return result
+
+    async def cache_warm(self, manifest_path: str, concurrency: int = BATCH_CONCURRENCY, pin: bool = True,
+                         cache_dir: str = None, dry_run: bool = False, on_result=None) -> Dict[str, Any]:
+        """Fetch the objects of a manifest that the local content store is missing.
+
+        Objects already stored are reused on their verified record without
+        rehashing. The bytes still needed are worked out first, and with pin a
+        run that cannot fit beside the pinned objects is refused before any
+        download starts. on_result is called with each per-object result.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        store = self._get_store(cache_dir)
+        entries = list({entry['uhrp_hash']: entry for entry in self._load_manifest(manifest_path)}.values())
+        loop = asyncio.get_running_loop()
+
+        missing = []
+        for entry in entries:
+            if store.lookup(entry['uhrp_hash']):
+                if pin:
+                    store.set_pinned(entry['uhrp_hash'])
+            else:
+                missing.append(entry)
+
+        stats = store.stats()
+        summary = {
+            'objects': len(entries),
+            'cached': len(entries) - len(missing),
+            'missing': len(missing),
+            **await self._bytes_needed(missing),
+            'bytes_available': stats['max_bytes'] - stats['pinned_bytes'] if pin
+                               else stats['max_bytes'] - stats['total_bytes']
+        }
+        if dry_run or not missing:
+            summary['cache'] = stats
+            return summary
+        if pin and summary['bytes_needed'] > summary['bytes_available']:
+            raise Exception(
+                f"Manifest needs {summary['bytes_needed']} more bytes but only "
+                f"{summary['bytes_available']} fit beside pinned objects; raise the cache budget"
+            )
+
+        summary.update(fetched=0, reused=0, failed=0, bytes_fetched=0)
+        slots = asyncio.Semaphore(concurrency)
+        started_at = time.monotonic()
+
+        async def warm(entry: Dict[str, Any], executor) -> Dict[str, Any]:
+            async with slots:
+                try:
+                    result = await loop.run_in_executor(executor, self._warm_object, store, entry, pin)
+                except Exception as e:
+                    result = {'uhrp_hash': entry['uhrp_hash'], 'status': 'failed', 'error': str(e)}
+            summary[result['status']] += 1
+            if result['status'] == 'fetched':
+                summary['bytes_fetched'] += result['bytes']
+            if on_result:
+                on_result(result)
+            return result
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='cache-warm') as executor:
+            await asyncio.gather(*[warm(entry, executor) for entry in missing])
+
+        summary['duration_seconds'] = round(time.monotonic() - started_at, 3)
+        summary['cache'] = store.stats()
+        return summary
+
+    def _warm_object(self, store, entry: Dict[str, Any], pin: bool) -> Dict[str, Any]:
+        """Blocking fetch of one manifest object into the store, under its download lock"""
+        uhrp_hash = entry['uhrp_hash']
+        lock = store.object_lock(uhrp_hash)
+        lock.acquire()
+        try:
+            # Another warm-up or client may have stored it in the meantime
+            record = store.lookup(uhrp_hash)
+            if record:
+                if pin:
+                    store.set_pinned(uhrp_hash)
+                return {'uhrp_hash': uhrp_hash, 'status': 'reused', 'bytes': record['size']}
+
+            result = self._transfer_file(uhrp_hash, entry.get('access_token'), store.staging_path(uhrp_hash),
+                                         True, entry.get('overlay_url'), lock)
+            record = store.commit(uhrp_hash, result['file_path'], sha256=result['content_hash'],
+                                  content_type=result['content_type'], pinned=True if pin else None)
+            return {'uhrp_hash': uhrp_hash, 'status': 'fetched', 'bytes': record['size'], 'pinned': record['pinned']}
+        finally:
+            lock.release()
+
+    async def _bytes_needed(self, entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Total size of entries, from the manifest or a HEAD request per object"""
+        from concurrent.futures import ThreadPoolExecutor
+
+        def size_of(entry: Dict[str, Any]) -> Optional[int]:
+            if entry.get('size') is not None:
+                return entry['size']
+            overlay_url = entry.get('overlay_url') or self.config['overlay_url']
+            headers = {'Authorization': f"Bearer {entry['access_token']}"} if entry.get('access_token') else {}
+            try:
+                response = self.session.head(f"{overlay_url}/v1/content/{entry['uhrp_hash']}/download",
+                                             headers=headers, allow_redirects=True, timeout=30)
+                if response.ok and response.headers.get('content-length'):
+                    return int(response.headers['content-length'])
+            except requests.RequestException as e:
+                logger.debug(f"Size lookup failed for {entry['uhrp_hash']}: {e}")
+            return None
+
+        if not entries:
+            return {'bytes_needed': 0, 'unknown_sizes': 0}
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=min(BATCH_CONCURRENCY, len(entries))) as executor:
+            sizes = await asyncio.gather(*[loop.run_in_executor(executor, size_of, entry) for entry in entries])
+        return {
+            'bytes_needed': sum(size for size in sizes if size is not None),
+            'unknown_sizes': sum(1 for size in sizes if size is None)
+        }
+
+    def _get_store(self, cache_dir: str = None):
+        """Local content store shared with the BRC-26 client's cache"""
+        from brc_integrations.brc26_store import ContentStore, DEFAULT_MAX_BYTES
+
+        cache_dir = cache_dir or self.config.get('cache_dir') or './cache'
+        key = os.path.abspath(cache_dir)
+        if key not in self._stores:
+            self._stores[key] = ContentStore(cache_dir, max_bytes=self.config.get('max_cache_bytes') or DEFAULT_MAX_BYTES)
+        return self._stores[key]
+
+    def _get_transfers(self):
+        """Registry of the end-of-transfer records of this CLI's downloads"""
+        if self._transfers is None:
+            from brc_integrations.brc26_metrics import TransferRegistry
+            self._transfers = TransferRegistry()
+        return self._transfers
+
+    def _get_bandwidth(self):
+        """Bandwidth governor shared by every download this CLI runs"""
+        if self._bandwidth is None:
+            from brc_integrations.brc26_bandwidth import BandwidthGovernor
+            self._bandwidth = BandwidthGovernor(
+                global_rate=self.config.get('bandwidth_limit') or None,
+                per_host_rate=self.config.get('per_host_bandwidth_limit') or None,
+                # Receipts from `purchase` still cap `download` runs in later processes
+                state_path=os.path.join(self.config['cache_dir'], 'receipts.json')
+            )
+        return self._bandwidth
+
+    def _load_manifest(self, manifest_path: str) -> List[Dict[str, Any]]:
+        """Read a JSON, JSONL or CSV manifest of uhrp_hash, output_path and access_token entries"""
+        with open(manifest_path, 'r', newline='') as f:
+            if manifest_path.endswith('.csv'):
+                rows = list(csv.DictReader(f))
+            elif manifest_path.endswith('.jsonl') or manifest_path.endswith('.ndjson'):
+                rows = [json.loads(line) for line in f if line.strip()]
+            else:
+                rows = json.load(f)
+                if isinstance(rows, dict):
+                    rows = rows.get('files', [])
+
+        entries = []
+        for number, row in enumerate(rows, 1):
+            uhrp_hash = row.get('uhrp_hash') or row.get('hash')
+            if not uhrp_hash:
+                raise ValueError(f"Manifest entry {number} has no uhrp_hash")
+            entries.append({
+                'uhrp_hash': uhrp_hash,
+                'output_path': row.get('output_path') or row.get('output') or None,
+                'access_token': row.get('access_token') or None,
+                'overlay_url': row.get('overlay_url') or None,
+                'size': int(row['size']) if row.get('size') not in (None, '') else None
+            })
+        return entries
+
+    def _is_verified_file(self, path: str, uhrp_hash: str) -> bool:
+        """True if path already holds the content of uhrp_hash"""
+        from brc_integrations.brc26_transfer import hash_file_range
+
+        if not os.path.isfile(path):
+            return False
+        return hash_file_range(path).hexdigest() == uhrp_hash.lower()
 
     async def get_usage_history(self, days: int = 30, include_costs: bool = True,
                               export_format: str = None) -> Dict[str, Any]:
@@ -494,6 +1041,93 @@ class OverlayConsumerCLI:
                 sys.exit(1)
             raise
 
+    async def preview_dataset(self, uhrp_hash: str, policy: Dict[str, Any] = None, access_token: str = None,
+                              sample_bytes: int = None, ranges: int = None, record_format: str = None,
+                              seed: int = None, confidence: float = None) -> Dict[str, Any]:
+        """Estimate D28 quality metrics from a few sampled byte ranges, before buying the dataset.
+
+        The head range and one random range per stratum of the object are
+        fetched (sample_bytes in total, at most MAX_SAMPLE_BYTES) and profiled;
+        the estimates carry confidence intervals, and with a policy the
+        quality constraints are checked against those intervals.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        from brc_integrations.brc26_records import record_format_for
+        from brc_integrations.brc26_preview import (
+            SampleProfiler, plan_sample_ranges, head_range_size, evaluate_preview,
+            DEFAULT_SAMPLE_BYTES, DEFAULT_SAMPLE_RANGES, DEFAULT_CONFIDENCE
+        )
+
+        try:
+            sample_bytes = sample_bytes or DEFAULT_SAMPLE_BYTES
+            ranges = ranges or DEFAULT_SAMPLE_RANGES
+            started_at = time.monotonic()
+
+            head_size = head_range_size(sample_bytes, ranges)
+            head, total_size, content_type = self._fetch_sample_range(uhrp_hash, 0, head_size, access_token)
+            record_format = record_format or record_format_for(content_type) \
+                or ('jsonl' if head.lstrip().startswith(b'{') else 'csv')
+
+            plan = plan_sample_ranges(total_size, sample_bytes, ranges, seed)
+            if plan[0][1] > len(head):
+                # Small object: it is sampled whole
+                rest, _, _ = self._fetch_sample_range(uhrp_hash, len(head), plan[0][1], access_token)
+                head += rest
+            loop = asyncio.get_running_loop()
+            with ThreadPoolExecutor(max_workers=min(BATCH_PER_HOST, max(1, len(plan) - 1))) as executor:
+                samples = await asyncio.gather(*[
+                    loop.run_in_executor(executor, self._fetch_sample_range, uhrp_hash, start, end, access_token)
+                    for start, end in plan[1:]
+                ])
+
+            profiler = SampleProfiler(record_format, total_size, confidence=confidence or DEFAULT_CONFIDENCE)
+            profiler.add_range(0, head[:plan[0][1]])
+            for (start, _), (data, _, _) in zip(plan[1:], samples):
+                profiler.add_range(start, data)
+
+            result = {
+                'uhrp_hash': uhrp_hash,
+                'content_type': content_type,
+                'profile': profiler.profile(),
+                'duration_seconds': round(time.monotonic() - started_at, 3),
+                'timestamp': datetime.now().isoformat()
+            }
+            if policy:
+                result.update(evaluate_preview(result['profile'], policy))
+            logger.info(f"Previewed {uhrp_hash}: {profiler.sampled_bytes} of {total_size} bytes sampled")
+            return result
+
+        except Exception as e:
+            logger.error(f"Dataset preview failed: {e}")
+            raise
+
+    def _fetch_sample_range(self, uhrp_hash: str, start: int, end: int,
+                            access_token: Optional[str] = None) -> tuple:
+        """Bytes [start, end) of an object with its total size and content type; never reads past end"""
+        overlay_url = self.config['overlay_url']
+        headers = {'Range': f"bytes={start}-{end - 1}"}
+        if access_token:
+            headers['Authorization'] = f"Bearer {access_token}"
+
+        with self.session.get(f"{overlay_url}/v1/content/{uhrp_hash}/download",
+                              headers=headers, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            content_range = response.headers.get('content-range', '')
+            if response.status_code == 206 and '/' in content_range and not content_range.endswith('/*'):
+                total_size = int(content_range.rsplit('/', 1)[1])
+            elif response.status_code == 200 and start == 0 and response.headers.get('content-length'):
+                # No range support: the full body is coming, read only the head of it
+                total_size = int(response.headers['content-length'])
+            else:
+                raise Exception(f"Content server did not honour the range request for {uhrp_hash}")
+
+            data = bytearray()
+            for chunk in response.iter_content(chunk_size=min(DOWNLOAD_CHUNK_SIZE, end - start)):
+                data += chunk
+                if len(data) >= end - start:
+                    break
+            return bytes(data[:end - start]), total_size, response.headers.get('content-type')
+
     async def _fetch_content_metadata(self, version_id: str) -> 'ContentMetadata':
         """Fetch content metadata from overlay network for policy validation"""
         try:
@@ -652,6 +1286,18 @@ Examples:
   # Download content
   %(prog)s download --uhrp-hash="ba7816bf..." --verify-integrity --output="./downloads"
 
+  # Stream content into another program; the JSON result goes to stderr
+  %(prog)s download --uhrp-hash="ba7816bf..." --verify-integrity --output=- | zstd -d > data.csv
+
+  # Download every file listed in a manifest
+  %(prog)s download-batch --manifest="dataset.jsonl" --concurrency=16 --output-dir="./downloads"
+
+  # Check a dataset against quality limits from 1 MiB of samples before buying it
+  %(prog)s preview --uhrp-hash="ba7816bf..." --policy='{"min_row_count": 10000, "max_null_value_percentage": 2}'
+
+  # Pin a training set in the local cache and fetch what is missing
+  %(prog)s cache warm --manifest="dataset.jsonl" --concurrency=16
+
   # View history
   %(prog)s history --days=30 --show-costs --export-format="csv"
 
@@ -722,8 +1368,44 @@ Examples:
     download_parser.add_argument('--config', type=str, help='Configuration file path')
     download_parser.add_argument('--uhrp-hash', type=str, required=True, help='UHRP hash')
     download_parser.add_argument('--verify-integrity', action='store_true', help='Verify content integrity')
-    download_parser.add_argument('--output', type=str, help='Output file path')
+    download_parser.add_argument('--output', type=str, help="Output file path, or '-' to write the content to stdout")
+    download_parser.add_argument('--result-fd', type=int,
+                                 help='File descriptor for the JSON result when streaming to stdout (default: stderr)')
     download_parser.add_argument('--access-token', type=str, help='Access token from payment')
+    download_parser.add_argument('--bandwidth-limit', type=int, help='Maximum download rate in bytes/second')
+
+    download_batch_parser = subparsers.add_parser('download-batch', help='Download every file in a manifest')
+    download_batch_parser.add_argument('--config', type=str, help='Configuration file path')
+    download_batch_parser.add_argument('--manifest', type=str, required=True,
+                                       help='JSON, JSONL or CSV manifest (uhrp_hash, output_path, access_token)')
+    download_batch_parser.add_argument('--output-dir', type=str, help='Directory for entries without an output path')
+    download_batch_parser.add_argument('--concurrency', type=int, default=BATCH_CONCURRENCY,
+                                       help='Maximum concurrent downloads')
+    download_batch_parser.add_argument('--per-host', type=int, default=BATCH_PER_HOST,
+                                       help='Maximum concurrent downloads per overlay host')
+    download_batch_parser.add_argument('--no-verify', action='store_true', help='Keep files that fail verification')
+    download_batch_parser.add_argument('--bandwidth-limit', type=int,
+                                       help='Maximum combined download rate in bytes/second')
+
+    # Local content cache commands
+    cache_parser = subparsers.add_parser('cache', help='Manage the local content cache')
+    cache_parser.add_argument('--config', type=str, help='Configuration file path')
+    cache_sub = cache_parser.add_subparsers(dest='cache_action')
+
+    cache_pin_parser = cache_sub.add_parser('pin', help='Exempt the cached objects of a manifest from eviction')
+    cache_unpin_parser = cache_sub.add_parser('unpin', help='Make the objects of a manifest evictable again')
+    cache_warm_parser = cache_sub.add_parser('warm', help='Fetch the objects of a manifest the cache is missing')
+    for action_parser in (cache_pin_parser, cache_unpin_parser, cache_warm_parser):
+        action_parser.add_argument('--manifest', type=str, required=True,
+                                   help='JSON, JSONL or CSV manifest (uhrp_hash, size, access_token)')
+        action_parser.add_argument('--cache-dir', type=str, help='Content store directory (default: CACHE_DIR)')
+        action_parser.add_argument('--max-cache-bytes', type=int, help='Cache budget in bytes')
+    cache_warm_parser.add_argument('--concurrency', type=int, default=BATCH_CONCURRENCY,
+                                   help='Maximum concurrent downloads')
+    cache_warm_parser.add_argument('--no-pin', action='store_true', help='Do not pin warmed objects')
+    cache_warm_parser.add_argument('--dry-run', action='store_true', help='Only report the bytes still needed')
+    cache_warm_parser.add_argument('--bandwidth-limit', type=int,
+                                   help='Maximum combined download rate in bytes/second')
 
     # History commands
     history_parser = subparsers.add_parser('history', help='View consumption history')
@@ -794,6 +1476,22 @@ Examples:
     ready_parser.add_argument('--exit-code-on-failure', action='store_true',
                             help='Exit with code 1 on failure')
 
+    preview_parser = subparsers.add_parser('preview', help='Estimate dataset quality from sampled byte ranges')
+    preview_parser.add_argument('--config', type=str, help='Configuration file path')
+    preview_parser.add_argument('--uhrp-hash', type=str, required=True, help='UHRP hash')
+    preview_parser.add_argument('--policy', type=str,
+                                help='Policy JSON with min_row_count, max_row_count, '
+                                     'max_null_value_percentage and/or min_uniqueness_ratio')
+    preview_parser.add_argument('--sample-bytes', type=int, help='Total bytes to sample (default: 1 MiB, max 16 MiB)')
+    preview_parser.add_argument('--ranges', type=int, help='Number of ranges to sample (default: 16)')
+    preview_parser.add_argument('--format', choices=['csv', 'jsonl'], help='Record format (default: from content type)')
+    preview_parser.add_argument('--seed', type=int, help='Seed for the random range offsets')
+    preview_parser.add_argument('--confidence', type=float, choices=[0.8, 0.9, 0.95, 0.98, 0.99],
+                                help='Confidence level of the intervals (default: 0.95)')
+    preview_parser.add_argument('--access-token', type=str, help='Access token, if the server requires one')
+    preview_parser.add_argument('--exit-code-on-failure', action='store_true',
+                                help='Exit with code 1 if the policy blocks')
+
     args = parser.parse_args()
 
     if args.debug:
@@ -806,6 +1504,8 @@ Examples:
     # Initialize CLI - use subcommand config if provided, otherwise use global config
     config_path = getattr(args, 'config', None) or args.config if hasattr(args, 'config') else None
     cli = OverlayConsumerCLI(config_path=config_path)
+    if getattr(args, 'bandwidth_limit', None):
+        cli.config['bandwidth_limit'] = args.bandwidth_limit
 
     try:
         if args.command == 'init':
@@ -922,13 +1622,72 @@ Examples:
         elif args.command == 'download':
             await cli.setup_identity(register_overlay=False)
 
-            result = await cli.download_content(
-                uhrp_hash=args.uhrp_hash,
-                access_token=args.access_token,
-                output_path=args.output,
-                verify_integrity=args.verify_integrity
+            if args.output == '-':
+                # stdout carries the content; the result goes to stderr or --result-fd
+                sys.stdout.flush()
+                result = await cli.download_to_fd(
+                    uhrp_hash=args.uhrp_hash,
+                    out_fd=sys.stdout.fileno(),
+                    access_token=args.access_token,
+                    verify_integrity=args.verify_integrity
+                )
+                if args.result_fd is not None:
+                    with open(args.result_fd, 'w') as result_file:
+                        result_file.write(json.dumps(result, indent=2) + '\n')
+                else:
+                    print(json.dumps(result, indent=2), file=sys.stderr)
+            else:
+                result = await cli.download_content(
+                    uhrp_hash=args.uhrp_hash,
+                    access_token=args.access_token,
+                    output_path=args.output,
+                    verify_integrity=args.verify_integrity
+                )
+                print(json.dumps(result, indent=2))
+
+        elif args.command == 'download-batch':
+            await cli.setup_identity(register_overlay=False)
+
+            # One NDJSON line per file as it finishes, then the summary
+            summary = await cli.download_batch(
+                manifest_path=args.manifest,
+                concurrency=args.concurrency,
+                per_host=args.per_host,
+                verify_integrity=not args.no_verify,
+                output_dir=args.output_dir,
+                on_result=lambda result: print(json.dumps(result), flush=True)
             )
-            print(json.dumps(result, indent=2))
+            print(json.dumps({'summary': summary}), flush=True)
+            if summary['failed']:
+                sys.exit(1)
+
+        elif args.command == 'cache':
+            if not args.cache_action:
+                cache_parser.print_help()
+                sys.exit(1)
+            if args.max_cache_bytes:
+                cli.config['max_cache_bytes'] = args.max_cache_bytes
+
+            if args.cache_action == 'warm':
+                await cli.setup_identity(register_overlay=False)
+                summary = await cli.cache_warm(
+                    manifest_path=args.manifest,
+                    concurrency=args.concurrency,
+                    pin=not args.no_pin,
+                    cache_dir=args.cache_dir,
+                    dry_run=args.dry_run,
+                    on_result=lambda result: print(json.dumps(result), flush=True)
+                )
+                print(json.dumps({'summary': summary}), flush=True)
+                if summary.get('failed'):
+                    sys.exit(1)
+            else:
+                result = await cli.cache_pin(
+                    manifest_path=args.manifest,
+                    pinned=args.cache_action == 'pin',
+                    cache_dir=args.cache_dir
+                )
+                print(json.dumps(result, indent=2))
 
         elif args.command == 'history':
             await cli.setup_identity(register_overlay=False)
@@ -1093,9 +1852,27 @@ Examples:
             )
             print(json.dumps(result, indent=2))
 
+        elif args.command == 'preview':
+            result = await cli.preview_dataset(
+                uhrp_hash=args.uhrp_hash,
+                policy=json.loads(args.policy) if args.policy else None,
+                access_token=args.access_token,
+                sample_bytes=args.sample_bytes,
+                ranges=args.ranges,
+                record_format=args.format,
+                seed=args.seed,
+                confidence=args.confidence
+            )
+            print(json.dumps(result, indent=2))
+            if args.exit_code_on_failure and result.get('decision') == 'block':
+                sys.exit(1)
+
     except KeyboardInterrupt:
         logger.info("Operation cancelled by user")
         sys.exit(130)
+    except BrokenPipeError:
+        logger.info("Output pipe closed by reader")
+        sys.exit(141)
     except Exception as e:
         logger.error(f"Command failed: {e}")
         if args.debug:
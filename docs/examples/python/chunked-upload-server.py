@@ -0,0 +1,174 @@
+"""
+BSV Overlay Network - Chunked Upload Stand-in Server
+
+A local, dependency-free implementation of the chunked upload endpoints used
+by BSVOverlayClient.upload_file_chunked in complete-integration.py, for
+trying out and testing resumable uploads without a full overlay node.
+
+    python chunked-upload-server.py --port 8788 --storage-dir ./uploads
+    python chunked-upload-server.py --fail-once 2,5   # 500 on first try of parts 2 and 5
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import secrets
+import shutil
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+COPY_BUFFER_SIZE = 1024 * 1024
+
+UPLOADS = re.compile(r'^/overlay/files/uploads$')
+UPLOAD = re.compile(r'^/overlay/files/uploads/([0-9a-f]+)$')
+PART = re.compile(r'^/overlay/files/uploads/([0-9a-f]+)/parts/(\d+)$')
+COMPLETE = re.compile(r'^/overlay/files/uploads/([0-9a-f]+)/complete$')
+DOWNLOAD = re.compile(r'^/overlay/files/download/([0-9a-f]{64})$')
+
+
+class UploadHandler(BaseHTTPRequestHandler):
+    storage_dir = './uploads'
+    fail_once = set()
+    lock = threading.Lock()
+
+    def _send_json(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def _upload_dir(self, upload_id: str) -> str:
+        return os.path.join(self.storage_dir, 'partial', upload_id)
+
+    def _parts(self, upload_id: str) -> list:
+        with open(os.path.join(self._upload_dir(upload_id), 'upload.json')) as f:
+            return sorted(json.load(f)['parts'].values(), key=lambda part: part['partNumber'])
+
+    def do_POST(self):
+        if UPLOADS.match(self.path):
+            request = json.loads(self._read_body() or b'{}')
+            upload_id = secrets.token_hex(16)
+            os.makedirs(self._upload_dir(upload_id))
+            state = {'request': request, 'parts': {}}
+            with open(os.path.join(self._upload_dir(upload_id), 'upload.json'), 'w') as f:
+                json.dump(state, f)
+            logger.info(f"Upload {upload_id} created for {request.get('filename')} ({request.get('size')} bytes)")
+            return self._send_json(201, {'uploadId': upload_id, 'partSize': request.get('partSize')})
+
+        match = COMPLETE.match(self.path)
+        if match:
+            upload_id = match.group(1)
+            if not os.path.isdir(self._upload_dir(upload_id)):
+                return self._send_json(404, {'message': 'Unknown upload'})
+            request = json.loads(self._read_body() or b'{}')
+            stored = {part['partNumber']: part for part in self._parts(upload_id)}
+            content_hash = hashlib.sha256()
+            assembled = os.path.join(self._upload_dir(upload_id), 'assembled')
+            with open(assembled, 'wb') as out:
+                for part in request.get('parts', []):
+                    if stored.get(part['partNumber'], {}).get('sha256') != part['sha256']:
+                        return self._send_json(409, {'message': f"Part {part['partNumber']} missing or different"})
+                    with open(os.path.join(self._upload_dir(upload_id), str(part['partNumber'])), 'rb') as f:
+                        for block in iter(lambda: f.read(COPY_BUFFER_SIZE), b''):
+                            content_hash.update(block)
+                            out.write(block)
+            if content_hash.hexdigest() != request.get('contentHash'):
+                return self._send_json(422, {'message': f"Content hash mismatch: {content_hash.hexdigest()}"})
+
+            final_path = os.path.join(self.storage_dir, content_hash.hexdigest())
+            os.replace(assembled, final_path)
+            shutil.rmtree(self._upload_dir(upload_id))
+            logger.info(f"Upload {upload_id} complete: {content_hash.hexdigest()}")
+            return self._send_json(200, {
+                'success': True,
+                'contentHash': content_hash.hexdigest(),
+                'size': os.path.getsize(final_path)
+            })
+
+        self._send_json(404, {'message': 'Not found'})
+
+    def do_PUT(self):
+        match = PART.match(self.path)
+        if not match:
+            return self._send_json(404, {'message': 'Not found'})
+        upload_id, part_number = match.group(1), int(match.group(2))
+        if not os.path.isdir(self._upload_dir(upload_id)):
+            return self._send_json(404, {'message': 'Unknown upload'})
+        data = self._read_body()
+
+        with self.lock:
+            if part_number in self.fail_once:
+                self.fail_once.discard(part_number)
+                return self._send_json(500, {'message': 'Injected failure'})
+
+        part_hash = hashlib.sha256(data).hexdigest()
+        if self.headers.get('X-Part-SHA256') not in (None, part_hash):
+            return self._send_json(422, {'message': f"Part {part_number} hash mismatch"})
+
+        with open(os.path.join(self._upload_dir(upload_id), str(part_number)), 'wb') as f:
+            f.write(data)
+        with self.lock:
+            state_path = os.path.join(self._upload_dir(upload_id), 'upload.json')
+            with open(state_path) as f:
+                state = json.load(f)
+            state['parts'][str(part_number)] = {'partNumber': part_number, 'sha256': part_hash, 'size': len(data)}
+            with open(state_path, 'w') as f:
+                json.dump(state, f)
+        self._send_json(200, {'partNumber': part_number, 'sha256': part_hash, 'size': len(data)})
+
+    def do_GET(self):
+        match = UPLOAD.match(self.path)
+        if match:
+            if not os.path.isdir(self._upload_dir(match.group(1))):
+                return self._send_json(404, {'message': 'Unknown upload'})
+            return self._send_json(200, {'uploadId': match.group(1), 'parts': self._parts(match.group(1))})
+
+        match = DOWNLOAD.match(self.path)
+        if match and os.path.exists(os.path.join(self.storage_dir, match.group(1))):
+            path = os.path.join(self.storage_dir, match.group(1))
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/octet-stream')
+            self.send_header('Content-Length', str(os.path.getsize(path)))
+            self.end_headers()
+            with open(path, 'rb') as f:
+                shutil.copyfileobj(f, self.wfile, COPY_BUFFER_SIZE)
+            return
+
+        self._send_json(404, {'message': 'Not found'})
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Chunked upload stand-in server')
+    parser.add_argument('--port', type=int, default=8788)
+    parser.add_argument('--storage-dir', default='./uploads')
+    parser.add_argument('--fail-once', default='', help='Comma-separated part numbers to fail once')
+    args = parser.parse_args()
+
+    os.makedirs(os.path.join(args.storage_dir, 'partial'), exist_ok=True)
+    UploadHandler.storage_dir = args.storage_dir
+    UploadHandler.fail_once = {int(part) for part in args.fail_once.split(',') if part}
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), UploadHandler)
+    logger.info(f'Chunked upload stand-in listening on http://127.0.0.1:{args.port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
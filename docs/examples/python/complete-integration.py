@@ -21,11 +21,46 @@ from pathlib import Path
 from typing import Dict, List, Optional, Any, Union
 from dataclasses import dataclass
 from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+import io
+import os
+import zlib
+
+try:
+    import zstandard  # Optional: enables zstd transfer compression
+except ImportError:
+    zstandard = None
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Chunked uploads: files at least this large are sent in parts
+CHUNKED_UPLOAD_THRESHOLD = 16 * 1024 * 1024
+UPLOAD_PART_SIZE = 8 * 1024 * 1024
+UPLOAD_WORKERS = 4
+UPLOAD_PART_RETRIES = 3
+HASH_READ_SIZE = 1024 * 1024
+
+# Decoding steps are bounded so a small compressed body cannot expand into
+# memory at once: gzip output per step, zstd input per step (zstd expands at
+# most ~32768x, so 256-byte slices decode to at most 8 MiB)
+DECODE_PIECE_SIZE = 1024 * 1024
+ZSTD_INPUT_SLICE = 256
+
+
+def decode_pieces(decoder, data: bytes):
+    """Decode data in bounded steps, yielding each step's output"""
+    if isinstance(decoder, type(zlib.decompressobj())):
+        while data:
+            yield decoder.decompress(data, DECODE_PIECE_SIZE)
+            data = decoder.unconsumed_tail
+    else:
+        view = memoryview(data)
+        for i in range(0, len(view), ZSTD_INPUT_SLICE):
+            yield decoder.decompress(view[i:i + ZSTD_INPUT_SLICE])
+
 
 @dataclass
 class TransactionInput:
@@ -47,6 +82,10 @@ class FileMetadata:
     custom: Optional[Dict[str, Any]] = None
 
 
+class ChunkedUploadUnsupported(Exception):
+    """The server does not implement the chunked upload endpoints"""
+
+
 class BSVOverlayClient:
     """Complete BSV Overlay Network client for Python"""
 
@@ -55,6 +94,8 @@ class BSVOverlayClient:
         self.identity_key = identity_key
         self.jwt_token = None
         self.token_expiration = None
+        self.last_download_stats: Optional[Dict[str, Any]] = None
+        self.last_upload_stats: Optional[Dict[str, Any]] = None
 
         # Setup session with default headers
         self.session = requests.Session()
@@ -346,40 +387,37 @@ class BSVOverlayClient:
         """Calculate SHA-256 content hash for file"""
         sha256_hash = hashlib.sha256()
         with open(file_path, 'rb') as f:
-            for chunk in iter(lambda: f.read(4096), b""):
+            for chunk in iter(lambda: f.read(HASH_READ_SIZE), b""):
                 sha256_hash.update(chunk)
         return sha256_hash.hexdigest()
 
-    def upload_file(self, file_path: Union[str, Path], metadata: FileMetadata = None) -> Dict[str, Any]:
-        """Upload file to overlay network"""
+    def upload_file(self, file_path: Union[str, Path], metadata: FileMetadata = None,
+                    chunked: Optional[bool] = None) -> Dict[str, Any]:
+        """Upload file to overlay network
+
+        Files of CHUNKED_UPLOAD_THRESHOLD bytes or more use the resumable
+        chunked protocol (see upload_file_chunked); set chunked to force either way.
+        """
         file_path = Path(file_path)
         logger.info(f'📤 Uploading file: {file_path}')
 
         if not file_path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
 
+        if chunked is None:
+            chunked = file_path.stat().st_size >= CHUNKED_UPLOAD_THRESHOLD
+        if chunked:
+            try:
+                return self.upload_file_chunked(file_path, metadata)
+            except ChunkedUploadUnsupported:
+                logger.info('Server has no chunked upload endpoint, sending a single request')
+
         # Prepare file and metadata
         files = {'file': open(file_path, 'rb')}
         data = {}
 
         if metadata:
-            metadata_dict = {}
-            if metadata.description:
-                metadata_dict['description'] = metadata.description
-            if metadata.category:
-                metadata_dict['category'] = metadata.category
-            if metadata.tags:
-                metadata_dict['tags'] = metadata.tags
-            if metadata.content_type:
-                metadata_dict['contentType'] = metadata.content_type
-            if metadata.author:
-                metadata_dict['author'] = metadata.author
-            if metadata.license:
-                metadata_dict['license'] = metadata.license
-            if metadata.custom:
-                metadata_dict['custom'] = metadata.custom
-
-            data['metadata'] = json.dumps(metadata_dict)
+            data['metadata'] = json.dumps(self._metadata_dict(metadata))
 
         try:
             headers = self._add_auth_headers({})
@@ -400,28 +438,253 @@ class BSVOverlayClient:
         finally:
             files['file'].close()
 
+    def upload_file_chunked(self, file_path: Union[str, Path], metadata: FileMetadata = None,
+                            part_size: int = UPLOAD_PART_SIZE,
+                            workers: int = UPLOAD_WORKERS) -> Dict[str, Any]:
+        """Upload a file in parts, resuming an interrupted upload of the same file
+
+        The file is read once: each part updates the whole-file SHA-256 and is
+        handed to a worker pool, so hashing and sending overlap and at most
+        `workers` parts are held in memory. Upload state is kept beside the
+        file in <name>.upload.json; parts the server already acknowledged
+        with a matching hash are not sent again.
+
+        Protocol:
+          POST /overlay/files/uploads                      -> {uploadId, partSize}
+          GET  /overlay/files/uploads/{id}                 -> {parts: [{partNumber, sha256, size}]}
+          PUT  /overlay/files/uploads/{id}/parts/{n}       (X-Part-SHA256 header)
+          POST /overlay/files/uploads/{id}/complete        {contentHash, size, parts}
+        """
+        file_path = Path(file_path)
+        stat = file_path.stat()
+        state_path = file_path.with_name(file_path.name + '.upload.json')
+        started = time.perf_counter()
+
+        self.session.mount(self.base_url, HTTPAdapter(pool_connections=1, pool_maxsize=max(workers, 10)))
+
+        state = self._load_upload_state(state_path, stat)
+        acknowledged = {}
+        if state:
+            try:
+                status = self._handle_response(self.session.get(
+                    f"{self.base_url}/overlay/files/uploads/{state['uploadId']}",
+                    headers=self._add_auth_headers({})
+                ))
+                acknowledged = {part['partNumber']: part['sha256'] for part in status.get('parts', [])}
+                logger.info(f'🔁 Resuming upload {state["uploadId"]}: {len(acknowledged)} parts acknowledged')
+            except Exception as e:
+                logger.warning(f'Cannot resume upload {state["uploadId"]}, starting over: {e}')
+                state = None
+
+        if not state:
+            response = self.session.post(
+                f"{self.base_url}/overlay/files/uploads",
+                json={
+                    'filename': file_path.name,
+                    'size': stat.st_size,
+                    'partSize': part_size,
+                    'metadata': self._metadata_dict(metadata) if metadata else {}
+                },
+                headers=self._add_auth_headers({})
+            )
+            if response.status_code in (404, 405):
+                raise ChunkedUploadUnsupported(f"Chunked upload not available at {self.base_url}")
+            created = self._handle_response(response)
+            state = {
+                'uploadId': created['uploadId'],
+                'partSize': created.get('partSize', part_size),
+                'size': stat.st_size,
+                'mtimeNs': stat.st_mtime_ns
+            }
+            temp_path = state_path.with_name(state_path.name + '.tmp')
+            with open(temp_path, 'w') as f:
+                json.dump(state, f)
+            os.replace(temp_path, state_path)
+
+        upload_id = state['uploadId']
+        part_size = state['partSize']
+        content_hash = hashlib.sha256()
+        parts = []
+        in_flight = []
+        parts_sent = bytes_sent = 0
+
+        with open(file_path, 'rb') as f, ThreadPoolExecutor(max_workers=workers) as pool:
+            part_number = 0
+            while True:
+                data = f.read(part_size)
+                if not data and part_number:
+                    break
+                content_hash.update(data)
+                part_hash = hashlib.sha256(data).hexdigest()
+                parts.append({'partNumber': part_number, 'sha256': part_hash, 'size': len(data)})
+
+                if acknowledged.get(part_number) != part_hash:
+                    # Wait for the oldest part before reading further, bounding memory
+                    if len(in_flight) >= workers:
+                        in_flight.pop(0).result()
+                    in_flight.append(pool.submit(self._upload_part, upload_id, part_number, data, part_hash))
+                    parts_sent += 1
+                    bytes_sent += len(data)
+
+                part_number += 1
+                if len(data) < part_size:
+                    break
+
+            for future in in_flight:
+                future.result()
+
+        result = self._handle_response(self.session.post(
+            f"{self.base_url}/overlay/files/uploads/{upload_id}/complete",
+            json={'contentHash': content_hash.hexdigest(), 'size': stat.st_size, 'parts': parts},
+            headers=self._add_auth_headers({})
+        ))
+        if result.get('contentHash', content_hash.hexdigest()) != content_hash.hexdigest():
+            raise Exception(f"Upload {upload_id} completed with hash {result.get('contentHash')}, "
+                            f"expected {content_hash.hexdigest()}")
+        state_path.unlink(missing_ok=True)
+
+        duration = time.perf_counter() - started
+        self.last_upload_stats = {
+            'upload_id': upload_id,
+            'parts': len(parts),
+            'parts_resumed': len(parts) - parts_sent,
+            'bytes_sent': bytes_sent,
+            'duration_seconds': round(duration, 3),
+            'bytes_per_second': round(bytes_sent / duration) if duration else 0
+        }
+        logger.info(f'✅ File uploaded in {len(parts)} parts '
+                    f'({self.last_upload_stats["parts_resumed"]} resumed): {content_hash.hexdigest()}')
+        return result
+
+    def _upload_part(self, upload_id: str, part_number: int, data: bytes, part_hash: str) -> Dict[str, Any]:
+        """Send one part, retrying transient failures with backoff"""
+        headers = self._add_auth_headers({
+            'Content-Type': 'application/octet-stream',
+            'X-Part-SHA256': part_hash
+        })
+        for attempt in range(UPLOAD_PART_RETRIES):
+            try:
+                response = self.session.put(
+                    f"{self.base_url}/overlay/files/uploads/{upload_id}/parts/{part_number}",
+                    data=data,
+                    headers=headers
+                )
+                if response.status_code < 500:
+                    return self._handle_response(response)
+                error = Exception(f"Part {part_number} failed with HTTP {response.status_code}")
+            except requests.ConnectionError as e:
+                error = e
+            if attempt < UPLOAD_PART_RETRIES - 1:
+                time.sleep(0.5 * 2 ** attempt)
+        raise error
+
+    def _load_upload_state(self, state_path: Path, stat: os.stat_result) -> Optional[Dict[str, Any]]:
+        """Saved state of an interrupted upload, if the file is unchanged since"""
+        try:
+            with open(state_path, 'r') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get('size') != stat.st_size or state.get('mtimeNs') != stat.st_mtime_ns:
+            logger.info('File changed since the interrupted upload, starting over')
+            state_path.unlink(missing_ok=True)
+            return None
+        return state
+
+    def _metadata_dict(self, metadata: FileMetadata) -> Dict[str, Any]:
+        metadata_dict = {}
+        if metadata.description:
+            metadata_dict['description'] = metadata.description
+        if metadata.category:
+            metadata_dict['category'] = metadata.category
+        if metadata.tags:
+            metadata_dict['tags'] = metadata.tags
+        if metadata.content_type:
+            metadata_dict['contentType'] = metadata.content_type
+        if metadata.author:
+            metadata_dict['author'] = metadata.author
+        if metadata.license:
+            metadata_dict['license'] = metadata.license
+        if metadata.custom:
+            metadata_dict['custom'] = metadata.custom
+        return metadata_dict
+
     def download_file(self, content_hash: str, output_path: Union[str, Path] = None) -> Union[bytes, str]:
-        """Download file from overlay network"""
+        """Download file from overlay network
+
+        Negotiates zstd or gzip transfer compression, decodes the body as it
+        streams in and verifies the uncompressed bytes against content_hash.
+        """
         logger.info(f'📥 Downloading file: {content_hash}')
 
         response = self.session.get(
             f"{self.base_url}/overlay/files/download/{content_hash}",
+            headers={'Accept-Encoding': 'zstd, gzip;q=0.9' if zstandard else 'gzip'},
             stream=True
         )
 
         if response.status_code >= 400:
             self._handle_response(response)
 
-        if output_path:
-            output_path = Path(output_path)
-            with open(output_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+        encoding = response.headers.get('Content-Encoding', 'identity').lower()
+        if encoding in ('gzip', 'x-gzip'):
+            decoder = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        elif encoding == 'zstd' and zstandard:
+            decoder = zstandard.ZstdDecompressor().decompressobj()
+        elif encoding == 'identity':
+            decoder = None
+        else:
+            raise Exception(f"Unsupported content encoding: {encoding}")
 
+        sha256_hash = hashlib.sha256()
+        transferred = decoded = 0
+        decode_cpu = 0.0
+        sink = open(output_path, 'wb') if output_path else io.BytesIO()
+        try:
+            # Read the raw (still encoded) body so decoding is explicit and measured
+            for chunk in response.raw.stream(1024 * 1024, decode_content=False):
+                transferred += len(chunk)
+                started = time.thread_time()
+                for piece in (decode_pieces(decoder, chunk) if decoder else [chunk]):
+                    decode_cpu += time.thread_time() - started
+                    sha256_hash.update(piece)
+                    sink.write(piece)
+                    decoded += len(piece)
+                    started = time.thread_time()
+            if decoder and encoding != 'zstd':
+                tail = decoder.flush()
+                sha256_hash.update(tail)
+                sink.write(tail)
+                decoded += len(tail)
+            content = sink.getvalue() if not output_path else None
+        finally:
+            sink.close()
+
+        if decoder and not decoder.eof:
+            if output_path:
+                os.remove(output_path)
+            raise Exception(f"Truncated {encoding} body for {content_hash} after {transferred} bytes")
+        if sha256_hash.hexdigest() != content_hash:
+            if output_path:
+                os.remove(output_path)
+            raise Exception(f"Integrity check failed for {content_hash}: got {sha256_hash.hexdigest()}")
+
+        self.last_download_stats = {
+            'content_encoding': encoding,
+            'bytes_transferred': transferred,
+            'bytes_decoded': decoded,
+            'compression_ratio': round(decoded / transferred, 2) if transferred else 1.0,
+            'decode_cpu_seconds': round(decode_cpu, 4)
+        }
+        logger.info(f'🗜️ Transfer: {transferred} bytes {encoding}, '
+                    f'{self.last_download_stats["compression_ratio"]}x, '
+                    f'{self.last_download_stats["decode_cpu_seconds"]}s decode CPU')
+
+        if output_path:
             logger.info(f'✅ File downloaded to: {output_path}')
             return str(output_path)
 
-        return response.content
+        return content
 
     def resolve_content(self, content_hash: str) -> Dict[str, Any]:
         """Resolve content metadata"""
@@ -0,0 +1,93 @@
+"""
+Tests for BSVOverlayClient.upload_file_chunked against the chunked upload
+stand-in server (chunked-upload-server.py).
+
+    python -m pytest docs/examples/python/test_chunked_upload.py
+"""
+
+import hashlib
+import importlib.util
+import os
+import threading
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+EXAMPLES_DIR = Path(__file__).resolve().parent
+
+
+def _load(name: str, filename: str):
+    spec = importlib.util.spec_from_file_location(name, EXAMPLES_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+integration = _load('complete_integration', 'complete-integration.py')
+upload_server = _load('chunked_upload_server', 'chunked-upload-server.py')
+
+PART_SIZE = 64 * 1024
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Stand-in server on a free port, storing uploads under tmp_path"""
+    storage_dir = tmp_path / 'uploads'
+    os.makedirs(storage_dir / 'partial')
+    handler = type('Handler', (upload_server.UploadHandler,), {
+        'storage_dir': str(storage_dir),
+        'fail_once': set()
+    })
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield handler, f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def source_file(tmp_path):
+    path = tmp_path / 'dataset.bin'
+    path.write_bytes(os.urandom(5 * PART_SIZE + 1234))
+    return path
+
+
+def test_failed_part_is_retried_and_round_trips(server, source_file):
+    """Test a part failing once is resent and the assembled file downloads intact"""
+    handler, base_url = server
+    handler.fail_once = {2}
+    client = integration.BSVOverlayClient(base_url)
+
+    with patch.object(client.session, 'put', wraps=client.session.put) as put:
+        result = client.upload_file_chunked(source_file, part_size=PART_SIZE, workers=3)
+
+    content = source_file.read_bytes()
+    assert result['contentHash'] == hashlib.sha256(content).hexdigest()
+    assert client.last_upload_stats['parts'] == 6
+    sent_parts = [call.args[0].rsplit('/', 1)[1] for call in put.call_args_list]
+    assert sorted(sent_parts) == ['0', '1', '2', '2', '3', '4', '5']
+    assert handler.fail_once == set()
+    assert not source_file.with_name(source_file.name + '.upload.json').exists()
+
+    assert client.download_file(result['contentHash']) == content
+
+
+def test_interrupted_upload_resumes_acknowledged_parts(server, source_file):
+    """Test a rerun after a part kept failing only sends the parts the server lacks"""
+    handler, base_url = server
+    handler.fail_once = {4}
+    client = integration.BSVOverlayClient(base_url)
+
+    with patch.object(integration, 'UPLOAD_PART_RETRIES', 1):
+        with pytest.raises(Exception, match='Part 4 failed'):
+            client.upload_file_chunked(source_file, part_size=PART_SIZE, workers=1)
+    assert source_file.with_name(source_file.name + '.upload.json').exists()
+
+    result = client.upload_file_chunked(source_file, part_size=PART_SIZE, workers=1)
+
+    assert client.last_upload_stats['parts_resumed'] == 4
+    assert client.last_upload_stats['bytes_sent'] == PART_SIZE + 1234
+    assert client.download_file(result['contentHash']) == source_file.read_bytes()